@@ -0,0 +1,105 @@
+"""
+Micro-benchmarks of the local pipeline stages over src/mock/resume*.json:
+PromptBuilder.build, SectionScoreAggregator.aggregate, GlobalAggregator.fn0 and the vectorized
+AggregationEngine doing both (one resume per call, and per resume within one batch call).
+LLM answers come from the simulated provider with zero latency, no API key needed.
+
+Run from the repo root:
+    python benchmarks/bench_micro.py [--iterations 300]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+os.chdir(ROOT)
+
+from core.aggregationengine import AggregationEngine
+from core.globalaggregator import GlobalAggregator
+from core.pipeline import COMPOSITE_SECTIONS, DEFAULT_TARGET_ROLE
+from core.promptbuilder import PromptBuilder
+from core.providers import SimulatedProvider
+from core.scoreaggregator import SectionScoreAggregator
+from report import percentiles
+
+def load_resumes():
+    return [json.load(open(p, encoding="utf-8")) for p in sorted(glob.glob("src/mock/resume*.json"))]
+
+def summarize(samples: list) -> dict:
+    # samples in seconds -> microseconds
+    us = [s * 1e6 for s in samples]
+    return {
+        "n": len(us),
+        "ops_per_s": round(len(us) / sum(samples), 1),
+        **{f"{k}_us": round(v, 2) for k, v in percentiles(us).items()},
+    }
+
+def run_micro(iterations: int = 300) -> dict:
+    resumes    = load_resumes()
+    provider   = SimulatedProvider({"simulated": {"latency": {"distribution": "fixed", "seconds": 0}}})
+    aggregator = SectionScoreAggregator()
+    engine     = AggregationEngine()
+
+    # LLM answers per resume and section, computed once outside the timed loops
+    answers = []
+    for resume in resumes:
+        prompts = [
+            PromptBuilder(section, criteria, DEFAULT_TARGET_ROLE, resume).build()
+            for section, criteria in COMPOSITE_SECTIONS
+        ]
+        answers.append([
+            json.loads(re.sub(r"^```json|```$", "", provider.models.generate_content("simulated", str(p)).text).strip())
+            for p in prompts
+        ])
+
+    build, aggregate, fn0, engine_one = [], [], [], []
+    for i in range(iterations):
+        resume_index = i % len(resumes)
+        for section, criteria in COMPOSITE_SECTIONS:
+            start = perf_counter()
+            PromptBuilder(section, criteria, DEFAULT_TARGET_ROLE, resumes[resume_index]).build()
+            build.append(perf_counter() - start)
+        section_outputs = []
+        for answer in answers[resume_index]:
+            start = perf_counter()
+            section_outputs.append(aggregator.aggregate(answer))
+            aggregate.append(perf_counter() - start)
+        start = perf_counter()
+        GlobalAggregator(section_outputs).fn0()
+        fn0.append(perf_counter() - start)
+        start = perf_counter()
+        engine.aggregate_composites([answers[resume_index]])[0].to_dict()
+        engine_one.append(perf_counter() - start)
+
+    # One call for the whole batch, reported per resume
+    batch = [answers[i % len(resumes)] for i in range(iterations)]
+    engine_batch = []
+    for _ in range(20):
+        start = perf_counter()
+        [result.to_dict() for result in engine.aggregate_composites(batch)]
+        engine_batch.append((perf_counter() - start) / iterations)
+
+    return {
+        "PromptBuilder.build": summarize(build),
+        "SectionScoreAggregator.aggregate": summarize(aggregate),
+        "GlobalAggregator.fn0": summarize(fn0),
+        "AggregationEngine (1 resume)": summarize(engine_one),
+        "AggregationEngine (batch, per resume)": summarize(engine_batch),
+    }
+
+def print_micro(results: dict):
+    print(f"{'micro benchmark':<38} {'n':>7} {'ops/s':>11} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9}")
+    for name, r in results.items():
+        print(f"{name:<38} {r['n']:>7} {r['ops_per_s']:>11.1f} {r['p50_us']:>9.2f} {r['p95_us']:>9.2f} {r['p99_us']:>9.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=300, help="composite requests worth of work")
+    args = parser.parse_args()
+    print_micro(run_micro(args.iterations))
@@ -0,0 +1,75 @@
+"""
+Micro-benchmark for PromptBuilder.build : cold (prefix compiled every call, the old behaviour)
+vs warm (memoized static prefix, only the resume is appended).
+
+Run from the repo root:
+    python benchmarks/bench_promptbuilder.py [--iterations 2000]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import tracemalloc
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)                      # config paths are relative to the repo root
+
+from core.promptbuilder import PromptBuilder, clear_prompt_cache
+
+SECTIONS = [
+    ("Profile",    ["Completeness", "ContentQuality"]),
+    ("Summary",    ["Completeness", "ContentQuality","Grammar","Length","RoleRelevance"]),
+    ("Education",  ["Completeness","RoleRelevance"]),
+    ("Experience", ["Completeness", "ContentQuality","Grammar","Length","RoleRelevance"]),
+    ("Activities", ["Completeness", "ContentQuality","Grammar","Length"]),
+    ("Skills",     ["Completeness","Length","RoleRelevance"]),
+]
+
+def load_resumes():
+    return [json.load(open(p, encoding="utf-8")) for p in sorted(glob.glob("src/mock/resume*.json"))]
+
+def run(resumes, iterations, cold):
+    # One "build" = one composite request worth of prompts for one resume
+    start = perf_counter()
+    for i in range(iterations):
+        resume = resumes[i % len(resumes)]
+        if cold:
+            clear_prompt_cache()
+        for section, criteria in SECTIONS:
+            PromptBuilder(section, criteria, "Data science", resume).build()
+    return (perf_counter() - start) / (iterations * len(SECTIONS))
+
+def allocations(resumes, cold):
+    PromptBuilder("Profile", SECTIONS[0][1], "Data science", resumes[0]).build()   # warm registry
+    if cold:
+        clear_prompt_cache()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for section, criteria in SECTIONS:
+        if cold:
+            clear_prompt_cache()
+        PromptBuilder(section, criteria, "Data science", resumes[0]).build()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats  = after.compare_to(before, "filename")
+    blocks = sum(max(s.count_diff, 0) for s in stats)
+    return peak / len(SECTIONS), blocks / len(SECTIONS)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    resumes = load_resumes()
+    print(f"{'mode':<6} {'us/build':>10} {'peak B/build':>14} {'new blocks/build':>18}")
+    for label, cold in (("cold", True), ("warm", False)):
+        per_build = run(resumes, args.iterations, cold)
+        peak, blocks = allocations(resumes, cold)
+        print(f"{label:<6} {per_build * 1e6:>10.1f} {peak:>14.0f} {blocks:>18.1f}")
+
+if __name__ == "__main__":
+    main()
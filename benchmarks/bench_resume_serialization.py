@@ -0,0 +1,75 @@
+"""
+Bytes and estimated tokens of the resume block : Python dict repr (old prompt format)
+vs the canonical serializer (minified JSON and terse text), for the full resume and the per-section slices.
+
+Run from the repo root:
+    python benchmarks/bench_resume_serialization.py
+"""
+import glob
+import json
+import os
+import sys
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)
+
+from core.configregistry import get_config
+from core.helper import Helper
+from core.promptbuilder import slice_resume
+from core.resumeserializer import serialize_resume
+
+FORMATS = ("repr", "json", "text")
+
+def render(resume, fmt):
+    return str(resume) if fmt == "repr" else serialize_resume(resume, fmt)
+
+def measure(resume):
+    # (bytes, estimated tokens) per format
+    return {
+        fmt: (len(render(resume, fmt).encode("utf-8")), Helper.estimate_tokens(render(resume, fmt)))
+        for fmt in FORMATS
+    }
+
+def main():
+    resume_fields = get_config("prompt").get("resume_fields", {})
+    totals = {fmt: [0, 0] for fmt in FORMATS}
+    header = "".join(f"{fmt + ' B':>9}{fmt + ' tok':>10}" for fmt in FORMATS)
+    print(f"{'resume':<14} {'slice':<11}{header}")
+    for path in sorted(glob.glob("src/mock/resume*.json")):
+        resume = json.load(open(path, encoding="utf-8"))
+        name   = os.path.basename(path)
+        rows   = [("full", resume)] + [
+            (section, slice_resume(resume, paths)) for section, paths in resume_fields.items()
+        ]
+        for label, payload in rows:
+            sizes = measure(payload)
+            if label != "full":
+                for fmt in FORMATS:
+                    totals[fmt][0] += sizes[fmt][0]
+                    totals[fmt][1] += sizes[fmt][1]
+            cells = "".join(f"{sizes[fmt][0]:>9}{sizes[fmt][1]:>10}" for fmt in FORMATS)
+            print(f"{name:<14} {label:<11}{cells}")
+
+        # Key order must not change the bytes
+        shuffled = json.loads(json.dumps(resume), object_pairs_hook=lambda kv: dict(reversed(kv)))
+        for fmt in ("json", "text"):
+            assert serialize_resume(shuffled, fmt) == serialize_resume(resume, fmt)
+
+    base_b, base_t = totals["repr"]
+    print("\nsection slices, all mock resumes, vs dict repr :")
+    for fmt in ("json", "text"):
+        b, t = totals[fmt]
+        print(f"  {fmt:<5} {base_b} -> {b} bytes ({100 * (base_b - b) / base_b:.1f}% saved), "
+              f"{base_t} -> {t} tokens ({100 * (base_t - t) / base_t:.1f}% saved)")
+
+    resumes = [json.load(open(p, encoding="utf-8")) for p in sorted(glob.glob("src/mock/resume*.json"))]
+    n = 2000
+    start = perf_counter()
+    for i in range(n):
+        serialize_resume(resumes[i % len(resumes)])
+    print(f"serialize_resume : {(perf_counter() - start) / n * 1e6:.1f} us per full resume")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Cold start of the API, each run in a fresh uvicorn subprocess on the simulated provider (zero LLM
+latency, response cache off, no API key): `import main` time, time until the first HTTP answer
+(interpreter, import, startup hooks and warmup included) and the latency of the first two composite
+evaluations. Runs with the startup warmup (model.yaml -> warmup) and without it.
+
+Run from the repo root:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+from time import perf_counter, sleep
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)
+
+import httpx
+
+def serve(port: int, warmup: bool):
+    """Server side of the benchmark (runs in the subprocess), prints the import time on its first line."""
+    os.environ["LLM_PROVIDER"] = "simulated"
+    start = perf_counter()
+    import main
+    import_ms = (perf_counter() - start) * 1000
+    import uvicorn
+    from core.providers import SimulatedProvider
+    from core.responsecache import ResponseCache
+
+    main.caller.client = SimulatedProvider({"simulated": {"latency": {"distribution": "fixed", "seconds": 0}}})
+    main.caller.cache  = ResponseCache(enabled=False)
+    if not warmup:
+        main.app.router.on_startup.remove(main.warm_up_llm)
+    print(json.dumps({"import_ms": import_ms}), flush=True)
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+def cold_start(port: int, warmup: bool, payloads: list) -> dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port)]
+    if not warmup:
+        cmd.append("--no-warmup")
+    # One client for polling and requests : a new httpx client per poll would compete with the server for CPU
+    client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=60)
+    start  = perf_counter()
+    proc   = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    try:
+        while True:
+            try:
+                if client.get("/", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if proc.poll() is not None:
+                raise RuntimeError("benchmark server exited during startup")
+            if perf_counter() - start > 60:
+                raise RuntimeError("benchmark server did not start")
+            sleep(0.01)
+        result = {"ready_ms": (perf_counter() - start) * 1000, **json.loads(proc.stdout.readline())}
+        for name, payload in zip(("first_request_ms", "second_request_ms"), payloads):
+            sent = perf_counter()
+            client.post("/evaluation/final-resume-score", json=payload).raise_for_status()
+            result[name] = (perf_counter() - sent) * 1000
+    finally:
+        client.close()
+        proc.terminate()
+        proc.wait(timeout=10)
+    return result
+
+def run_startup(runs: int = 5, port: int = 4106) -> dict:
+    resumes  = [json.load(open(p, encoding="utf-8")) for p in sorted(glob.glob("src/mock/resume*.json"))]
+    payloads = [{"output_lang": "en", "resume_json": resume} for resume in resumes[:2]]
+    results  = {}
+    for warmup in (False, True):
+        samples = [cold_start(port, warmup, payloads) for _ in range(runs)]
+        results["warmup" if warmup else "no_warmup"] = {
+            key: round(statistics.median(sample[key] for sample in samples), 1) for key in samples[0]
+        }
+    return results
+
+def print_startup(results: dict):
+    keys = ["import_ms", "ready_ms", "first_request_ms", "second_request_ms"]
+    print(f"{'median of runs':<14} " + " ".join(f"{key:>18}" for key in keys))
+    for name, row in results.items():
+        print(f"{name:<14} " + " ".join(f"{row[key]:>18.1f}" for key in keys))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="fresh server processes per mode")
+    parser.add_argument("--port", type=int, default=4106)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--no-warmup", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.port, not args.no_warmup)
+    else:
+        print_startup(run_startup(args.runs, args.port))
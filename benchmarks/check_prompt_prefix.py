@@ -0,0 +1,173 @@
+"""
+Offline check of the cache-friendly prompt layout and the Gemini context-cache reuse in LlmCaller.
+The layout is checked with the real config (model.yaml -> context_cache): the criteria rubric sits in
+the static prefix only when that prefix is big enough to be cached. The reuse, expiry and retry paths
+are then exercised with the size threshold lowered. Uses a local fake client, no API key or network needed.
+
+Run from the repo root:
+    python benchmarks/check_prompt_prefix.py
+"""
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)
+
+from core.configregistry import registry
+from core.llmcaller import LlmCaller
+from core.promptbuilder import PromptBuilder, FusedPromptBuilder
+from core.responsecache import ResponseCache
+
+SECTIONS = [
+    ("Profile",    ["Completeness", "ContentQuality"]),
+    ("Summary",    ["Completeness", "ContentQuality","Grammar","Length","RoleRelevance"]),
+    ("Education",  ["Completeness","RoleRelevance"]),
+    ("Experience", ["Completeness", "ContentQuality","Grammar","Length","RoleRelevance"]),
+    ("Activities", ["Completeness", "ContentQuality","Grammar","Length"]),
+    ("Skills",     ["Completeness","Length","RoleRelevance"]),
+]
+
+class FakeError(Exception):
+    def __init__(self, code):
+        super().__init__(f"fake error {code}")
+        self.code = code
+
+def fake_answer(contents):
+    # Fill the response template of the prompt, so the answers pass LlmCaller's validation
+    template = json.loads(re.search(r"Otput :\n(\{.*?\n\})\n", contents, re.S).group(1))
+    for section in template.get("sections", [template]):
+        section["scores"] = {criterion: {"score": 3, "feedback": ""} for criterion in section["scores"]}
+    return json.dumps(template)
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeCaches:
+    def __init__(self):
+        self.created  = []
+        self.fail_next = []         # error codes raised by the next create calls
+    def create(self, model, config):
+        if self.fail_next:
+            raise FakeError(self.fail_next.pop(0))
+        name = f"cachedContents/fake-{len(self.created)}"
+        self.created.append((name, config.contents[0]))
+        return type("Cached", (), {"name": name})()
+
+class FakeModels:
+    def __init__(self, caches):
+        self.caches   = caches
+        self.requests = []
+        self.expire_next = False
+    def generate_content(self, model, contents, config=None):
+        cached = getattr(config, "cached_content", None) if config is not None else None
+        if cached is not None and self.expire_next:
+            self.expire_next = False
+            raise FakeError(404)
+        self.requests.append((cached, contents))
+        return FakeResponse(fake_answer(contents))
+
+class FakeClient:
+    def __init__(self):
+        self.caches = FakeCaches()
+        self.models = FakeModels(self.caches)
+
+def build_all_prompts():
+    prompts = []
+    for path in sorted(glob.glob("src/mock/resume*.json")):
+        resume = json.load(open(path, encoding="utf-8"))
+        for lang in ("en", "th"):
+            for section, criteria in SECTIONS:
+                prompts.append(PromptBuilder(section, criteria, "Data science", resume, output_lang=lang).build())
+            prompts.append(FusedPromptBuilder(SECTIONS, "Data science", resume, output_lang=lang).build())
+    return prompts
+
+def check_prefix_stability(prompts):
+    prefixes = {p.static_prefix for p in prompts}
+    assert len(prefixes) == 1, f"expected one shared static prefix, got {len(prefixes)}"
+    prefix = prefixes.pop()
+    assert all(p.startswith(prefix) for p in prompts)
+    assert "CV/Resume" not in prefix and "Data science" not in prefix
+    print(f"ok  {len(prompts)} prompts share one {len(prefix)}-char static prefix")
+
+def check_rubric_placement(prompts):
+    """With the real config : the rubric is in the prefix only when the prefix can be context cached."""
+    caller = LlmCaller(client=FakeClient())
+    prefix = prompts[0].static_prefix
+    tokens = caller.estimate_tokens(prefix)
+    cfg    = registry.get("model").get("context_cache", {})
+    criteria_cfg = registry.get("prompt").get("criteria", {})
+    if caller._context_cache_key(prefix) is not None:
+        assert "Criteria rubric" in prefix
+        print(f"ok  static prefix ~{tokens} tokens >= min_prefix_tokens {cfg.get('min_prefix_tokens')} : rubric cached in the prefix")
+        return
+    assert "Criteria rubric" not in prefix
+    for prompt in prompts:
+        builder = getattr(prompt, "builder", None)
+        if builder is None:
+            continue
+        for crit in criteria_cfg:
+            sent = f"- {crit}\n    score 5" in prompt.suffix
+            assert sent == (crit in builder.criteria), (builder.section, crit)
+    print(f"ok  static prefix ~{tokens} tokens < min_prefix_tokens {cfg.get('min_prefix_tokens')} (or caching off) :"
+          " not cached, each prompt carries its own criteria's rubric")
+
+def check_context_cache_reuse(prompts):
+    client = FakeClient()
+    caller = LlmCaller(client=client)
+    caller.cache = ResponseCache(enabled=False)
+    # Threshold lowered so the (small) prefix is cached and the reuse path runs
+    caller.context_cache_cfg = {"enabled": True, "ttl_seconds": 3600, "min_prefix_tokens": 0}
+    caller.call_many(prompts)
+    assert len(client.caches.created) == 1, client.caches.created
+    name, cached_prefix = client.caches.created[0]
+    assert cached_prefix == prompts[0].static_prefix
+    assert all(cached == name for cached, _ in client.models.requests)
+    assert all(not contents.startswith(cached_prefix) for _, contents in client.models.requests)
+    print(f"ok  {len(prompts)} calls reused one cached content object (threshold lowered)")
+
+    # Server side expiry : the call falls back to the full prompt and the next one re-creates the cache
+    client.models.expire_next = True
+    caller.call(prompts[0])
+    assert client.models.requests[-1] == (None, str(prompts[0]))
+    caller.call(prompts[1])
+    assert len(client.caches.created) == 2
+    print("ok  expired cache falls back to the full prompt and is re-created")
+
+def check_context_cache_retry(prompts):
+    client = FakeClient()
+    caller = LlmCaller(client=client)
+    caller.cache = ResponseCache(enabled=False)
+    caller.context_cache_cfg = {"enabled": True, "ttl_seconds": 3600, "min_prefix_tokens": 0}
+    caller.retry_cfg = {**caller.retry_cfg, "base_delay_seconds": 0.05, "max_delay_seconds": 0.05}
+
+    # 503 on creation : this call goes without the cache, one after the backoff creates it
+    client.caches.fail_next = [503]
+    caller.call(prompts[0])
+    assert client.models.requests[-1] == (None, str(prompts[0])) and not client.caches.created
+    caller.call(prompts[1])
+    assert client.models.requests[-1][0] is None            # still inside the backoff
+    time.sleep(0.06)
+    caller.call(prompts[2])
+    assert len(client.caches.created) == 1 and client.models.requests[-1][0] == client.caches.created[0][0]
+    print("ok  transient creation failure is retried after a backoff")
+
+    # 400 on creation : the prefix is not cacheable, no further attempts
+    caller._context_caches.clear()
+    client.caches.fail_next = [400]
+    for prompt in prompts[3:6]:
+        caller.call(prompt)
+    assert len(client.caches.created) == 1 and all(cached is None for cached, _ in client.models.requests[-3:])
+    print("ok  permanent creation failure stops asking for that prefix")
+
+if __name__ == "__main__":
+    prompts = build_all_prompts()
+    check_prefix_stability(prompts)
+    check_rubric_placement(prompts)
+    check_context_cache_reuse(prompts)
+    check_context_cache_retry(prompts)
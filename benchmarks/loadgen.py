@@ -0,0 +1,167 @@
+"""
+Open-loop load generator for the HTTP endpoints, fully offline.
+
+Starts the API in a uvicorn subprocess on the simulated LLM provider (model.yaml -> simulated) with
+the response cache off, then sends requests to each endpoint at a fixed rate. Requests go out on
+schedule whether or not earlier ones have returned, and latency is measured from the scheduled send
+time, so server-side queueing is not hidden (no coordinated omission).
+
+Run from the repo root:
+    python benchmarks/loadgen.py [--rps 4] [--duration 10] [--warmup 2] [--latency-median 2.0]
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+os.chdir(ROOT)
+
+import httpx
+from report import percentiles
+
+ENDPOINTS = [
+    "/evaluation/profile",
+    "/evaluation/summary",
+    "/evaluation/education",
+    "/evaluation/experience",
+    "/evaluation/activities",
+    "/evaluation/skills",
+    "/evaluation/final-resume-score",
+]
+
+def serve(port: int, latency_median: float | None):
+    """Server side of the benchmark (runs in the subprocess)."""
+    os.environ["LLM_PROVIDER"] = "simulated"
+    import uvicorn
+    import main
+    from core.configregistry import get_config, thaw
+    from core.providers import SimulatedProvider
+    from core.responsecache import ResponseCache
+
+    model_cfg = thaw(get_config("model"))
+    model_cfg.setdefault("simulated", {})["seed"] = 0       # same latency samples on every run
+    if latency_median is not None:
+        model_cfg.setdefault("simulated", {}).setdefault("latency", {})["median_seconds"] = latency_median
+    main.caller.client = SimulatedProvider(model_cfg)
+    main.caller.cache  = ResponseCache(enabled=False)       # every request must reach the (simulated) LLM
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+def start_server(port: int, latency_median: float | None):
+    cmd = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port)]
+    if latency_median is not None:
+        cmd += ["--latency-median", str(latency_median)]
+    proc = subprocess.Popen(cmd, cwd=ROOT)
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            if httpx.get(base + "/", timeout=1).status_code == 200:
+                return proc, base
+        except httpx.HTTPError:
+            pass
+        if proc.poll() is not None:
+            raise RuntimeError("benchmark server exited during startup")
+        sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("benchmark server did not start")
+
+def memory_mb(pid: int) -> dict:
+    # Linux only, RSS now and peak RSS of the server process (one uvicorn worker)
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return {"rss_mb": None, "rss_peak_mb": None}
+    return {
+        "rss_mb": round(int(fields["VmRSS"].split()[0]) / 1024, 1),
+        "rss_peak_mb": round(int(fields["VmHWM"].split()[0]) / 1024, 1),
+    }
+
+def drive(client, url: str, payloads: list, rps: float, duration: float, warmup: float, max_inflight: int) -> dict:
+    total    = int((warmup + duration) * rps)
+    results  = []        # (scheduled offset, latency seconds, ok)
+    lock     = threading.Lock()
+
+    def send(i, scheduled):
+        try:
+            ok = client.post(url, json=payloads[i % len(payloads)]).status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        with lock:
+            results.append((scheduled - start, perf_counter() - scheduled, ok))
+
+    with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+        start = perf_counter()
+        for i in range(total):
+            scheduled = start + i / rps
+            delay = scheduled - perf_counter()
+            if delay > 0:
+                sleep(delay)
+            pool.submit(send, i, scheduled)
+    measured  = [r for r in results if r[0] >= warmup]
+    ok        = [latency * 1000 for _, latency, good in measured if good]
+    errors    = len(measured) - len(ok)
+    # Steady state : successful responses that completed inside the measured window
+    completed = sum(1 for offset, latency, good in results if good and warmup <= offset + latency < warmup + duration)
+    return {
+        "target_rps": rps,
+        "sent": len(measured),
+        "errors": errors,
+        "error_rate": round(errors / len(measured), 4) if measured else None,
+        "throughput_rps": round(completed / duration, 2),
+        **{f"{k}_ms": round(v, 1) if v is not None else None for k, v in percentiles(ok).items()},
+    }
+
+def run_load(endpoints=ENDPOINTS, rps: float = 4, duration: float = 10, warmup: float = 2,
+             latency_median: float | None = None, port: int = 4105, max_inflight: int = 256) -> dict:
+    resumes  = [json.load(open(p, encoding="utf-8")) for p in sorted(glob.glob("src/mock/resume*.json"))]
+    payloads = [{"output_lang": "en", "resume_json": resume} for resume in resumes]
+    proc, base = start_server(port, latency_median)
+    results = {}
+    try:
+        limits = httpx.Limits(max_connections=max_inflight, max_keepalive_connections=max_inflight)
+        with httpx.Client(base_url=base, timeout=120, limits=limits) as client:
+            for endpoint in endpoints:
+                results[endpoint] = {
+                    **drive(client, endpoint, payloads, rps, duration, warmup, max_inflight),
+                    **memory_mb(proc.pid),
+                }
+                print_load({endpoint: results[endpoint]}, header=len(results) == 1)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return results
+
+def print_load(results: dict, header: bool = True):
+    if header:
+        print(f"{'endpoint':<38} {'rps':>5} {'sent':>5} {'err':>4} {'thru/s':>7} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rss MB':>7} {'peak MB':>8}")
+    def cell(value, width, digits=1):
+        return f"{value:>{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+    for endpoint, r in results.items():
+        print(f"{endpoint:<38} {r['target_rps']:>5} {r['sent']:>5} {r['errors']:>4} {cell(r['throughput_rps'], 7, 2)} "
+              f"{cell(r['p50_ms'], 8)} {cell(r['p95_ms'], 8)} {cell(r['p99_ms'], 8)} "
+              f"{cell(r['rss_mb'], 7)} {cell(r['rss_peak_mb'], 8)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rps", type=float, default=4)
+    parser.add_argument("--duration", type=float, default=10, help="measured seconds per endpoint")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds per endpoint left out of the stats")
+    parser.add_argument("--latency-median", type=float, default=None,
+                        help="simulated LLM median latency in seconds (default: model.yaml -> simulated)")
+    parser.add_argument("--endpoints", nargs="*", default=ENDPOINTS)
+    parser.add_argument("--port", type=int, default=4105)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.port, args.latency_median)
+    else:
+        run_load(args.endpoints, args.rps, args.duration, args.warmup, args.latency_median, args.port)
@@ -0,0 +1,99 @@
+"""
+Shared helpers for the benchmark suite: percentiles, baseline file and regression check.
+"""
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone, timedelta
+
+ROOT          = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+def percentiles(samples: list, points=(50, 95, 99)) -> dict:
+    """Nearest-rank percentiles, in the unit of the samples."""
+    if not samples:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(samples)
+    return {
+        f"p{p}": ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+        for p in points
+    }
+
+def environment() -> dict:
+    return {
+        "timestamp": str(datetime.now(tz=timezone(timedelta(hours=7)))),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def load_baseline(path: str = BASELINE_PATH) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_report(report: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+# metric name -> direction that counts as worse
+_LOWER_IS_BETTER  = ("p50_us", "p95_us", "p99_us", "p50_ms", "p95_ms", "p99_ms", "error_rate", "rss_peak_mb")
+_HIGHER_IS_BETTER = ("throughput_rps", "ops_per_s")
+
+# A percentile is only gated when at least this many samples of both runs lie above it. With fewer the
+# value is one or two outliers (p99 of 50 samples is the highest one), so it is shown but not gated
+MIN_TAIL_SAMPLES = 5
+
+def sample_count(entry: dict) -> int | None:
+    """Samples behind a micro (n) or load (successful requests) entry."""
+    if "n" in entry:
+        return entry["n"]
+    if "sent" in entry:
+        return entry["sent"] - entry.get("errors", 0)
+    return None
+
+def gated(metric: str, samples: int | None) -> bool:
+    if not metric.startswith("p") or samples is None:
+        return True
+    point = int(metric[1:].split("_")[0])
+    return samples * (100 - point) / 100 >= MIN_TAIL_SAMPLES
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.20) -> list:
+    """
+    Rows of (suite, name, metric, baseline, current, change, status) for every metric present in both
+    reports. change is (current - baseline) / baseline, so a lower latency or a higher throughput can be
+    negative or positive. status is "REGRESSION" when the metric got more than tolerance worse,
+    "not gated" for a percentile with too few samples above it (MIN_TAIL_SAMPLES), else "".
+    """
+    rows = []
+    for suite in ("micro", "load"):
+        for name, now in current.get(suite, {}).items():
+            before = baseline.get(suite, {}).get(name)
+            if before is None:
+                continue
+            counts  = [count for count in (sample_count(before), sample_count(now)) if count is not None]
+            samples = min(counts) if counts else None
+            for metric in _LOWER_IS_BETTER + _HIGHER_IS_BETTER:
+                old, new = before.get(metric), now.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                worse  = change if metric in _LOWER_IS_BETTER else -change
+                if not gated(metric, samples):
+                    status = "not gated"
+                else:
+                    status = "REGRESSION" if worse > tolerance else ""
+                rows.append((suite, name, metric, old, new, change, status))
+    return rows
+
+def print_comparison(rows: list, tolerance: float) -> int:
+    """Print the comparison table and return the number of regressions."""
+    print(f"\nvs baseline (change = current vs baseline, regression when more than {tolerance:.0%} worse,"
+          f" percentiles with fewer than {MIN_TAIL_SAMPLES} samples above them are not gated)")
+    print(f"{'suite':<6} {'benchmark':<38} {'metric':<15} {'baseline':>12} {'current':>12} {'change':>8}")
+    for suite, name, metric, old, new, change, status in rows:
+        print(f"{suite:<6} {name:<38} {metric:<15} {old:>12.3f} {new:>12.3f} {change:>+8.1%}  {status}".rstrip())
+    return sum(status == "REGRESSION" for *_, status in rows)
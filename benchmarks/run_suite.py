@@ -0,0 +1,71 @@
+"""
+Benchmark suite: micro-benchmarks + offline load test, compared against benchmarks/baseline.json.
+Exits with status 1 when a metric is more than --tolerance worse than the baseline. A p95 / p99 is only
+gated when at least 5 samples lie above it (report.MIN_TAIL_SAMPLES): at the default 4 rps x 10 s the
+load test gates p50 only, --duration 30 adds p95. Micro p99 needs 500 iterations' worth of samples.
+
+Run from the repo root:
+    python benchmarks/run_suite.py                      # run and compare
+    python benchmarks/run_suite.py --save-baseline      # run and store the result as the new baseline
+    python benchmarks/run_suite.py --skip-load          # micro-benchmarks only (a few seconds)
+
+Baselines are machine dependent: compare runs from the same machine / CI runner type only.
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bench_micro import run_micro, print_micro
+from loadgen import ENDPOINTS, run_load
+from report import BASELINE_PATH, compare, environment, load_baseline, print_comparison, save_report
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=300, help="micro-benchmark iterations")
+    parser.add_argument("--rps", type=float, default=4)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--latency-median", type=float, default=None)
+    parser.add_argument("--endpoints", nargs="*", default=ENDPOINTS)
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "last_run.json"))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    report = {
+        "environment": environment(),
+        "settings": {
+            "iterations": args.iterations, "rps": args.rps, "duration": args.duration,
+            "warmup": args.warmup, "latency_median": args.latency_median,
+        },
+        "micro": run_micro(args.iterations),
+    }
+    print_micro(report["micro"])
+    if not args.skip_load:
+        print()
+        report["load"] = run_load(args.endpoints, args.rps, args.duration, args.warmup, args.latency_median)
+
+    save_report(report, args.output)
+    print(f"\nreport written to {os.path.relpath(args.output, ROOT)}")
+    if args.save_baseline:
+        save_report(report, args.baseline)
+        print(f"baseline written to {os.path.relpath(args.baseline, ROOT)}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print("no baseline yet, run with --save-baseline to create one")
+        return 0
+    if baseline.get("settings") != report["settings"]:
+        print(f"warning: baseline settings differ {baseline.get('settings')}")
+    regressions = print_comparison(compare(report, baseline, args.tolerance), args.tolerance)
+    print(f"\n{regressions} regression(s)")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager
+from core.helper import Helper
+from core.configregistry import get_config
+from core.metrics import EVALUATIONS_INFLIGHT, EVALUATIONS_QUEUED, EVALUATIONS_REJECTED
+
+class Overloaded(Exception):
+    """No evaluation slot within queue_timeout_seconds, or the waiting line is full (HTTP 503)."""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionControl(Helper):
+    """
+    Backpressure for the async evaluation handlers (model.yaml -> backpressure). At most
+    max_inflight_evaluations run at once per process, up to max_queued_evaluations wait in line
+    for queue_timeout_seconds, and the rest are turned away at once with a 503.
+    """
+    def __init__(self, max_inflight: int = 400, max_queued: int = 800, queue_timeout_seconds: float = 10):
+        self.max_inflight = max_inflight
+        self.max_queued   = max_queued
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.inflight     = 0
+        self.queued       = 0
+        self._slots       = asyncio.Semaphore(max_inflight)
+        EVALUATIONS_INFLIGHT.set_function(lambda: self.inflight)
+        EVALUATIONS_QUEUED.set_function(lambda: self.queued)
+
+    @classmethod
+    def from_config(cls):
+        cfg = get_config("model").get("backpressure", {})
+        return cls(
+            max_inflight          = cfg.get("max_inflight_evaluations", 400),
+            max_queued            = cfg.get("max_queued_evaluations", 800),
+            queue_timeout_seconds = cfg.get("queue_timeout_seconds", 10),
+        )
+
+    def check(self):
+        """Raise Overloaded when a new evaluation would be turned away at once (every slot busy, line full)."""
+        if self._slots.locked() and self.queued >= self.max_queued:
+            EVALUATIONS_REJECTED.labels("queue_full").inc()
+            raise Overloaded(f"{self.queued} evaluations already waiting", self.queue_timeout_seconds)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one evaluation slot for the duration of the block, raise Overloaded when none frees up."""
+        self.check()
+        if self._slots.locked():
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout_seconds)
+            except TimeoutError:
+                EVALUATIONS_REJECTED.labels("queue_timeout").inc()
+                raise Overloaded(
+                    f"no evaluation slot within {self.queue_timeout_seconds}s", self.queue_timeout_seconds
+                ) from None
+            finally:
+                self.queued -= 1
+        else:
+            await self._slots.acquire()
+        self.inflight += 1
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {"inflight": self.inflight, "queued": self.queued, "max_inflight": self.max_inflight}
@@ -0,0 +1,198 @@
+import threading
+import numpy as np
+from core.helper import Helper
+from core.configregistry import registry
+from core.globalaggregator import GlobalAggregator, renormalize
+from core.metrics import observe_stage
+from core.responseschema import SCORE_MAX
+
+class CompiledWeights:
+    """A weight.yaml `weights` block as a section x criterion matrix (NaN where a weight is not defined)."""
+    __slots__ = ("sections", "section_index", "criteria", "criterion_index", "matrix",
+                 "section_weights", "section_weight_values")
+
+    def __init__(self, weights):
+        self.sections        = tuple(weights)
+        self.section_index   = {section: k for k, section in enumerate(self.sections)}
+        criteria = []
+        for section in self.sections:
+            criteria += [c for c in weights[section] if c != "section_weight" and c not in criteria]
+        self.criteria        = tuple(criteria)
+        self.criterion_index = {criterion: j for j, criterion in enumerate(self.criteria)}
+        self.matrix = np.full((len(self.sections), len(self.criteria)), np.nan)
+        for k, section in enumerate(self.sections):
+            for criterion, weight in weights[section].items():
+                if criterion != "section_weight":
+                    self.matrix[k, self.criterion_index[criterion]] = weight
+        # Raw YAML values go into the JSON output unchanged (an int weight must not turn into a float)
+        self.section_weight_values = tuple(weights[section].get("section_weight") for section in self.sections)
+        self.section_weights = np.array(
+            [np.nan if w is None else w for w in self.section_weight_values], dtype=float
+        )
+
+
+_COMPILED      = {}       # weight.yaml generation -> CompiledWeights
+_COMPILED_LOCK = threading.Lock()
+
+def compiled_weights(snapshot=None) -> CompiledWeights:
+    """CompiledWeights of a weight.yaml snapshot (the current one by default), compiled once per generation."""
+    snapshot = snapshot or registry.snapshot("weight")
+    compiled = _COMPILED.get(snapshot.generation)
+    if compiled is None:
+        compiled = CompiledWeights(snapshot.data["weights"])
+        with _COMPILED_LOCK:
+            _COMPILED.clear()                    # only the current generation is ever asked for again
+            _COMPILED[snapshot.generation] = compiled
+    return compiled
+
+
+class SectionResult:
+    """SectionScoreAggregator output without the nested dicts, to_dict() gives the same JSON."""
+    __slots__ = ("section", "total_score", "criteria", "weighted", "bodies")
+
+    def __init__(self, section, total_score, criteria, weighted, bodies):
+        self.section     = section
+        self.total_score = total_score
+        self.criteria    = criteria      # criteria in the order of the LLM answer
+        self.weighted    = weighted      # weighted score per criterion
+        self.bodies      = bodies        # LLM answer body per criterion (feedback, ...)
+
+    def scores(self) -> dict:
+        return {c: {**body, "score": w} for c, w, body in zip(self.criteria, self.weighted, self.bodies)}
+
+    def to_dict(self) -> dict:
+        return {"section": self.section, "total_score": self.total_score, "scores": self.scores()}
+
+
+class CompositeResult:
+    """GlobalAggregator.fn0 output of one resume without the nested dicts."""
+    __slots__ = ("sections", "section_weights", "contributions", "final_score", "missing_sections")
+
+    def __init__(self, sections, section_weights, contributions, final_score, missing_sections=()):
+        self.sections         = sections          # SectionResult per section, in composite order
+        self.section_weights  = section_weights
+        self.contributions    = contributions
+        self.final_score      = final_score       # renormalized when sections are missing, None if all are
+        self.missing_sections = list(missing_sections)
+
+    def to_dict(self, request_metadata: dict | None = None) -> dict:
+        conclution = {
+            "final_resume_score": Helper.fop(self.final_score) if self.final_score is not None else None,
+            "section_contribution": {
+                result.section: {
+                    "section_total": result.total_score,
+                    "section_weight": weight,
+                    "contribution": Helper.fop(contribution),
+                }
+                for result, weight, contribution in zip(self.sections, self.section_weights, self.contributions)
+            },
+        }
+        if self.missing_sections:
+            conclution["partial"]          = True
+            conclution["missing_sections"] = self.missing_sections
+        return {
+            "conclution": conclution,
+            "section_detail": {
+                result.section: {"total_score": result.total_score, "scores": result.scores()}
+                for result in self.sections
+            },
+            "metadata": GlobalAggregator([], request_metadata).fn3(),
+        }
+
+
+class AggregationEngine(Helper):
+    """
+    SectionScoreAggregator + GlobalAggregator for many answers at once. Raw scores go into one
+    n x max-criteria array and are weighted in a single NumPy pass; sums run column by column, in
+    answer order, so every total is the same float the per-dict aggregators produce.
+    """
+    def __init__(self, weights: CompiledWeights | None = None):
+        self.weights = weights           # None : the current weight.yaml
+
+    def _compiled(self) -> CompiledWeights:
+        return self.weights or compiled_weights()
+
+    def aggregate_sections(self, llm_outputs: list) -> list:
+        """SectionResult per LLM section answer."""
+        with observe_stage("section_aggregate", "batch"):
+            return self._aggregate_sections(llm_outputs, self._compiled())
+
+    def _aggregate_sections(self, llm_outputs: list, compiled: CompiledWeights) -> list:
+        width  = max((len(op["scores"]) for op in llm_outputs), default=0)
+        raw    = np.zeros((len(llm_outputs), width))
+        rows   = np.zeros(raw.shape, dtype=np.intp)
+        cols   = np.zeros(raw.shape, dtype=np.intp)
+        used   = np.zeros(raw.shape, dtype=bool)
+        for i, op in enumerate(llm_outputs):
+            k = compiled.section_index[op["section"]]             # KeyError like SectionScoreAggregator
+            for slot, (criterion, body) in enumerate(op["scores"].items()):
+                raw[i, slot]  = body["score"]
+                rows[i, slot] = k
+                cols[i, slot] = compiled.criterion_index.get(criterion, -1)
+                used[i, slot] = True
+        weight = np.where(cols >= 0, compiled.matrix[rows, cols], np.nan)
+        missing = used & np.isnan(weight)
+        if missing.any():
+            i, slot = map(int, np.argwhere(missing)[0])
+            raise KeyError(list(llm_outputs[i]["scores"])[slot])
+
+        weighted = raw / SCORE_MAX * np.where(used, weight, 0.0)
+        totals   = np.zeros(len(llm_outputs))
+        for slot in range(width):                                 # same summation order as the dict loop
+            totals = totals + weighted[:, slot]
+
+        weighted = weighted.tolist()
+        totals   = totals.tolist()
+        return [
+            SectionResult(
+                op["section"], totals[i], tuple(op["scores"]),
+                tuple(weighted[i][:len(op["scores"])]), tuple(op["scores"].values())
+            )
+            for i, op in enumerate(llm_outputs)
+        ]
+
+    def aggregate_composites(self, batch: list, missing: list | None = None) -> list:
+        """
+        CompositeResult per resume, batch : list of per-resume lists of LLM section answers.
+        missing : per-resume lists of sections with no answer, their final score is renormalized
+        over the weight of the completed sections like GlobalAggregator's partial results.
+        """
+        compiled = self._compiled()
+        missing  = missing or [()] * len(batch)
+        with observe_stage("section_aggregate", "batch"):
+            flat = self._aggregate_sections([op for outputs in batch for op in outputs], compiled)
+        with observe_stage("global_aggregate"):
+            width  = max((len(outputs) for outputs in batch), default=0)
+            totals = np.zeros((len(batch), width))
+            weight = np.zeros((len(batch), width))
+            start  = 0
+            for i, outputs in enumerate(batch):
+                for slot, result in enumerate(flat[start:start + len(outputs)]):
+                    totals[i, slot] = result.total_score
+                    weight[i, slot] = compiled.section_weights[compiled.section_index[result.section]]
+                start += len(outputs)
+            if np.isnan(weight).any():
+                raise KeyError("section_weight")
+            contributions = totals * weight
+            final = np.zeros(len(batch))
+            for slot in range(width):                             # same order as GlobalAggregator.fn1
+                final = final + contributions[:, slot]
+
+            contributions = contributions.tolist()
+            final         = final.tolist()
+            results, start = [], 0
+            for i, outputs in enumerate(batch):
+                sections = flat[start:start + len(outputs)]
+                start   += len(outputs)
+                section_weights = tuple(compiled.section_weight_values[compiled.section_index[r.section]] for r in sections)
+                final_score = final[i]
+                if missing[i]:
+                    final_score = renormalize(
+                        final_score,
+                        section_weights,
+                        [compiled.section_weight_values[compiled.section_index[section]] for section in missing[i]],
+                    )
+                results.append(CompositeResult(
+                    sections, section_weights, contributions[i][:len(sections)], final_score, missing[i],
+                ))
+            return results
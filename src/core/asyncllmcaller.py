@@ -0,0 +1,65 @@
+import asyncio
+from core.callflow import CallFlow
+from core.singleflight import AsyncSingleFlight
+
+class AsyncLlmCaller(CallFlow):
+    """
+    LlmCaller for coroutines, on the genai async client (client.aio). A call waiting on Gemini, the rate
+    limiter or a retry backoff holds a coroutine instead of a thread, so one worker can keep hundreds
+    of calls in flight. The call flow is LlmCaller's (core/callflow.py) and so are the cache, rate limiter,
+    hedger, context caches and /usage, only the transport (TaskIO) differs.
+    """
+    def __init__(self, caller):
+        super().__init__(caller, TaskIO(caller))
+
+    @property
+    def client(self):
+        return self.caller.client.aio
+
+
+class TaskIO:
+    """CallFlow transport of AsyncLlmCaller : awaits the async client, started calls are tasks."""
+    def __init__(self, caller):
+        self.caller  = caller
+        self.flights = AsyncSingleFlight()
+
+    async def acquire(self, tokens: int, timeout):
+        await self.caller.limiter.acquire_async(tokens, timeout)
+
+    async def generate(self, **kwargs):
+        return await self.caller.client.aio.models.generate_content(model=self.caller.model, **kwargs)
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+    async def cache_get(self, key: str):
+        # The memory LRU on the loop, a miss goes to a thread for its SQLite read (the job workers
+        # share the connection and its lock)
+        output, status = self.caller.cache.get_memory(key)
+        if status is None:
+            output, status = await asyncio.to_thread(self.caller.cache.get_disk, key)
+        return output, status
+
+    async def cache_set(self, key: str, output):
+        await asyncio.to_thread(self.caller.cache.set, key, output)   # SQLite write + commit
+
+    async def offload(self, fn, *args):
+        # Blocking calls (context cache creation, once per prefix and TTL)
+        return await asyncio.to_thread(fn, *args)
+
+    async def flight(self, key: str, fn, timeout):
+        return await self.flights.do(key, fn, timeout=timeout)
+
+    def start(self, fn, section: str):
+        return asyncio.ensure_future(fn())
+
+    async def wait(self, handles, timeout=None, first: bool = False):
+        return await asyncio.wait(
+            handles, timeout=timeout, return_when=asyncio.FIRST_COMPLETED if first else asyncio.ALL_COMPLETED
+        )
+
+    async def within(self, coro, seconds: float):
+        return await asyncio.wait_for(coro, seconds)
+
+    def gate(self, limit: int):
+        return asyncio.Semaphore(limit)
@@ -0,0 +1,104 @@
+import asyncio
+from contextlib import nullcontext
+from time import time
+from core.helper import Helper
+from core.configregistry import get_config
+from core.admission import Overloaded
+from core.aggregationengine import AggregationEngine
+from core.pipeline import COMPOSITE_SECTIONS, build_section_prompts, token_usage
+
+class BatchEvaluator(Helper):
+    """
+    Composite evaluation for many resumes on an AsyncLlmCaller. Section calls from every resume are
+    tasks, at most max_concurrency of them across every batch running at once, at most
+    max_inflight_resumes resumes are open per batch, and each resume's result is yielded as soon as
+    its last section finishes. Resumes finishing together are scored in one AggregationEngine pass
+    (the same JSON as SectionScoreAggregator + GlobalAggregator). With an AdmissionControl every
+    open resume holds one evaluation slot, like a single composite request.
+    """
+    def __init__(self, caller, admission=None):
+        batch_cfg = get_config("model").get("batch", {})
+        self.caller               = caller
+        self.engine               = AggregationEngine()     # current weight.yaml at every pass
+        self.admission            = admission
+        self.max_concurrency      = batch_cfg.get("max_concurrency", 16)
+        self.max_inflight_resumes = batch_cfg.get("max_inflight_resumes", 32)
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+
+    async def _call(self, prompt):
+        async with self.slots:
+            return await self.caller.call_with_meta(prompt)
+
+    async def run(self, items):
+        """
+        Async generator. items : iterable of dicts with resume_json, output_lang, targetrole and an optional id.
+        Yields one dict per resume in completion order (not input order), "index" points back to the input.
+        """
+        items   = enumerate(items)
+        pending = set()     # one task per open resume
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < self.max_inflight_resumes:
+                    try:
+                        index, item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(self._evaluate(index, item)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for line in self._finish([task.result() for task in done]):
+                    yield line
+        finally:
+            # Client went away or the generator was closed early : cancel the resumes still running
+            for task in pending:
+                task.cancel()
+
+    async def _evaluate(self, index: int, item: dict) -> dict:
+        """
+        Section answers of one resume ({"line", "outputs", "metas", "start"}), or {"line"} with an error
+        when its prompts fail, a section call fails or it gets no evaluation slot (model.yaml -> backpressure).
+        """
+        line = {"index": index, "id": item.get("id")}
+        try:
+            prompts = build_section_prompts(item["resume_json"], item.get("output_lang", "en"), item["targetrole"])
+        except Exception as e:
+            return {"line": {**line, "error": f"{type(e).__name__}: {e}"}}
+        start = time()
+        try:
+            async with self.admission.slot() if self.admission is not None else nullcontext():
+                results = await asyncio.gather(*(self._call(prompt) for prompt in prompts), return_exceptions=True)
+        except Overloaded as e:
+            return {"line": {**line, "error": f"Overloaded: {e}"}}
+        for (section, _), result in zip(COMPOSITE_SECTIONS, results):
+            if isinstance(result, BaseException):
+                return {"line": {**line, "error": f"{section}: {type(result).__name__}: {result}"}}
+        return {
+            "line": line, "start": start,
+            "outputs": [output for output, _ in results], "metas": [meta for _, meta in results],
+        }
+
+    def _finish(self, states: list) -> list:
+        """
+        Result lines of finished resumes. Their answers go through one AggregationEngine pass, when it
+        fails (unknown section or criterion) each resume is scored alone so only the faulty one errors.
+        """
+        lines  = [state["line"] for state in states if "outputs" not in state]
+        scored = [state for state in states if "outputs" in state]
+        if not scored:
+            return lines
+        try:
+            results = self.engine.aggregate_composites([state["outputs"] for state in scored])
+        except Exception as e:
+            if len(scored) > 1:
+                return lines + [line for state in scored for line in self._finish([state])]
+            return lines + [{**scored[0]["line"], "error": f"{type(e).__name__}: {e}"}]
+        for state, result in zip(scored, results):
+            lines.append({
+                **state["line"],
+                "response": result.to_dict({"token_usage": token_usage(state["metas"], self.caller.model)}),
+                "response_time": f"{time() - state['start']:.5f} s",
+            })
+        return lines
@@ -0,0 +1,346 @@
+"""
+The LLM call flow shared by LlmCaller (threads) and AsyncLlmCaller (coroutines): response cache,
+coalescing, context cache, rate limiter, retries, hedging, answer checking and re-asking, fan-out and
+request deadlines. It is written once, as coroutines over a transport (`io`) that does the waiting:
+
+    io.acquire(tokens, timeout)             rate limiter slot and tokens
+    io.generate(**kwargs)                   one generate_content call
+    io.sleep(seconds)                       retry backoff
+    io.cache_get(key) / io.cache_set(key, output)
+    io.offload(fn, *args)                   blocking work (context cache creation)
+    io.flight(key, fn, timeout)             SingleFlight.do with a coroutine function
+    io.start(fn, section) -> handle         run a coroutine function concurrently (Future / Task API)
+    io.wait(handles, timeout, first)        concurrent.futures.wait / asyncio.wait
+    io.within(coro, seconds)                bound one section call by its deadline
+    io.gate(limit)                          semaphore for `async with`, caps one fan-out's calls in flight
+
+LlmCaller's transport (ThreadIO) blocks instead of suspending, run_sync drives a flow to its end.
+"""
+from time import perf_counter
+from core.helper import Helper
+from core.deadline import DeadlineExceeded, current_deadline
+from core.ratelimiter import RateLimitTimeout
+from core.usagetracker import add_usage, empty_usage
+from core.responseschema import check_section
+from core.metrics import (
+    CACHE_LOOKUPS, LLM_COALESCED, LLM_HEDGES, LLM_INFLIGHT, LLM_REPAIRS, SECTIONS_MISSING, observe_stage
+)
+
+def run_sync(coro):
+    """Result of a flow coroutine on ThreadIO, whose awaits all complete without suspending."""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("LLM call flow suspended on a blocking transport")
+
+
+class CallFlow(Helper):
+    """One LLM call flow over the state and helpers of a LlmCaller, waiting through `io`."""
+    def __init__(self, caller, io):
+        self.caller     = caller
+        self.io         = io
+        self.section_of = caller.section_of
+
+    @property
+    def model(self):
+        return self.caller.model
+
+    @property
+    def cache(self):
+        return self.caller.cache
+
+    async def call_with_meta(self, prompt: str, use_cache: bool = True):
+        # meta["cache"] : hit_memory | hit_disk | miss | disabled | bypass | coalesced
+        # meta["usage"] : tokens spent by this call, zeros when answered from the cache or another call
+        section = self.section_of(prompt)
+        if not use_cache:
+            CACHE_LOOKUPS.labels("bypass", section).inc()
+            output, usage = await self._generate(prompt)
+            return output, {"cache": "bypass", "usage": usage}
+        key = self.caller._cache_key(prompt)
+        output, status = await self.io.cache_get(key)
+        CACHE_LOOKUPS.labels(status, section).inc()
+        usage = empty_usage()
+        if output is None:
+            # The cache key covers section, criteria, role, language, resume slice, model and config versions
+            deadline = current_deadline.get()
+            (output, spent), shared = await self.io.flight(
+                key, lambda: self._generate_and_store(key, prompt), deadline and deadline.remaining()
+            )
+            if shared:
+                LLM_COALESCED.labels(section).inc()
+                status = "coalesced"
+            else:
+                usage = spent
+        return output, {"cache": status, "usage": usage}
+
+    async def _generate_and_store(self, key: str, prompt: str):
+        # Stored before the waiting callers are released, so later arrivals hit the cache
+        output, usage = await self._generate(prompt)
+        await self.io.cache_set(key, output)
+        return output, usage
+
+    async def _context_cache_name(self, prefix: str):
+        """Return the Gemini cached-content name holding this static prefix, creating it once."""
+        key = self.caller._context_cache_key(prefix)
+        if key is None:
+            return None
+        known, name = self.caller._known_context_cache(key)
+        if known:
+            return name
+        return await self.io.offload(self.caller._create_context_cache, key, prefix)
+
+    async def _round_trip(self, section: str, reserve_tokens: int, **kwargs):
+        """
+        One generate_content call through the process-wide rate limiter, timed and counted under the
+        section label. 429 / 5xx answers are retried with jittered exponential backoff (model.yaml -> retry).
+        Under a request deadline (core/deadline.py) the wait, every attempt and the retries fit in the time left.
+        """
+        caller   = self.caller
+        deadline = current_deadline.get()
+        attempt  = 0
+        while True:
+            attempt += 1
+            timeout = None
+            if deadline is not None:
+                timeout = deadline.remaining()
+                if timeout <= 0:
+                    raise DeadlineExceeded(f"{section}: request deadline reached before the LLM call")
+            await self.io.acquire(reserve_tokens, timeout)
+            outcome, delay = "error", None
+            try:
+                if deadline is not None:
+                    kwargs["config"] = caller._with_timeout(kwargs.get("config"), deadline.remaining())
+                with observe_stage("llm_round_trip", section), LLM_INFLIGHT.labels(section).track_inprogress():
+                    resp = await self.io.generate(**kwargs)
+                outcome = "ok"
+                return resp
+            except Exception as e:
+                outcome, delay = caller._on_error(e, section, attempt, deadline)
+                if delay is None:
+                    raise
+            finally:
+                caller.limiter.release(outcome)
+            await self.io.sleep(delay)                  # outside the limiter slot
+
+    async def _timed_round_trip(self, section: str, reserve_tokens: int, **kwargs):
+        start = perf_counter()
+        resp  = await self._round_trip(section, reserve_tokens, **kwargs)
+        self.caller.hedger.observe(section, perf_counter() - start)
+        return resp
+
+    async def _hedged_round_trip(self, prompt: str, section: str, reserve_tokens: int, **kwargs):
+        """
+        _round_trip, plus one duplicate call when it has not answered after the section's hedge delay
+        (model.yaml -> hedging). The first answer wins and the other call is cancelled. A call that
+        cannot be cancelled any more (a thread) still has its tokens counted once it answers.
+        """
+        hedger = self.caller.hedger
+        delay  = hedger.delay(section)
+        if delay is None:
+            return await self._timed_round_trip(section, reserve_tokens, **kwargs)
+        def start():
+            return self.io.start(lambda: self._timed_round_trip(section, reserve_tokens, **kwargs), section)
+        primary = start()
+        hedge   = winner = None
+        try:
+            done, _ = await self.io.wait([primary], timeout=delay)
+            if not done:
+                if not hedger.try_hedge():
+                    LLM_HEDGES.labels(section, "budget_exhausted").inc()
+                    await self.io.wait([primary])
+                else:
+                    LLM_HEDGES.labels(section, "fired").inc()
+                    hedge   = start()
+                    pending = {primary, hedge}
+                    while True:
+                        done, pending = await self.io.wait(pending, first=True)
+                        answered = [task for task in done if task.exception() is None]
+                        if answered or not pending:
+                            break
+                    if answered:
+                        winner = primary if primary in answered else answered[0]
+                        if winner is hedge:
+                            LLM_HEDGES.labels(section, "won").inc()
+                        return winner.result()
+            winner = primary
+            return primary.result()                     # both failed : the original call's error
+        finally:
+            for task in (primary, hedge):
+                if task is not None and task is not winner and not task.cancel():
+                    task.add_done_callback(lambda task: self.caller._record_loser(prompt, task, reserve_tokens))
+
+    async def _complete(self, prompt: str):
+        """Return (raw response, token usage) for one model call."""
+        caller     = self.caller
+        section    = self.section_of(prompt)
+        # TPM reservation : prompt estimate + expected answer / thinking, settled with the real usage below
+        reserve    = self.estimate_tokens(prompt) + caller.expected_output_tokens
+        prefix     = getattr(prompt, "static_prefix", "")
+        cache_name = await self._context_cache_name(prefix) if prefix else None
+        if cache_name is not None:
+            try:
+                resp = await self._hedged_round_trip(
+                    prompt, section, reserve,
+                    contents = prompt.suffix,
+                    config   = caller._generation_config(prompt, cache_name)
+                )
+                return resp, caller._record_usage(prompt, resp, reserve)
+            except Exception as e:
+                # Cache expired or was deleted server side, fall back to the full prompt once
+                if getattr(e, "code", None) not in (400, 403, 404):
+                    raise
+                caller._drop_context_cache(cache_name)
+        resp = await self._hedged_round_trip(
+            prompt, section, reserve, contents=str(prompt), config=caller._generation_config(prompt, None)
+        )
+        return resp, caller._record_usage(prompt, resp, reserve)
+
+    async def _repair(self, builder, answer: dict, missing: list, usage: dict):
+        """Re-ask only for the missing / invalid criteria of one section (model.yaml -> structured_output)."""
+        attempts = self.caller.structured_cfg.get("repair_attempts", 1)
+        while missing and attempts > 0:
+            attempts -= 1
+            LLM_REPAIRS.labels(builder.section).inc()
+            partial = builder.subset(missing)
+            resp, spent = await self._complete(partial.build())
+            usage = add_usage(usage, spent)
+            fixed, missing = self.caller._section_answer(partial, resp)
+            answer["scores"].update(fixed["scores"])
+        if missing:
+            raise ValueError(f"{builder.section}: no valid answer for {', '.join(missing)}")
+        answer["scores"] = {criterion: answer["scores"][criterion] for criterion in builder.criteria}
+        return answer, usage
+
+    async def _generate(self, prompt: str):
+        """Return (checked output, token usage) for one prompt, including any partial re-ask."""
+        resp, usage = await self._complete(prompt)
+        builder = getattr(prompt, "builder", None)
+        if builder is not None:
+            answer, missing = self.caller._section_answer(builder, resp)
+            return await self._repair(builder, answer, missing, usage)
+        builders = getattr(prompt, "builders", None)
+        if builders is None:
+            return self.caller._parse(resp, self.section_of(prompt)), usage     # free-form prompt (health check)
+        # Fused answer : check every section, a broken answer re-asks each section on its own
+        by_section = self.caller._fused_answers(resp)
+        sections = []
+        for builder in builders:
+            answer, missing = check_section(by_section.get(builder.section), builder.section, builder.criteria)
+            answer, usage = await self._repair(builder, answer, missing, usage)
+            sections.append(answer)
+        return {"sections": sections}, usage
+
+    async def call(self, prompt: str, use_cache: bool = True):
+        return (await self.call_with_meta(prompt, use_cache))[0]
+
+    async def call_fused(self, prompt: str, sections: list, with_meta: bool = False, deadline=None):
+        # Under a deadline a fused call that did not finish leaves every section missing (None)
+        (output, meta), = await self.call_many([prompt], with_meta=True, deadline=deadline)
+        ops = self.caller.split_sections(output, sections) if output is not None else [None] * len(sections)
+        return (ops, meta) if with_meta else ops
+
+    async def call_many(self, prompts: list, with_meta: bool = False, deadline=None):
+        """
+        Fan out independent prompts, results come back in the same order as prompts. At most
+        model.yaml -> concurrency.max_parallel_calls of them are in flight, and the rate limiter bounds
+        the calls of every request together. With a Deadline, calls not done in time come back as (None, meta).
+        """
+        if deadline is not None:
+            results = await self._call_many_within(prompts, deadline)
+        else:
+            gate  = self._gate(len(prompts))
+            tasks = [self.io.start(self._caller_of(prompt, gate), self.section_of(prompt)) for prompt in prompts]
+            try:
+                if tasks:
+                    await self.io.wait(tasks)
+                results = [task.result() for task in tasks]
+            finally:
+                for task in tasks:
+                    task.cancel()                       # no-op once done
+        return results if with_meta else [output for output, _ in results]
+
+    def _gate(self, count: int):
+        return self.io.gate(max(1, min(self.caller.max_parallel_calls, count)))
+
+    def _caller_of(self, prompt: str, gate):
+        async def call():
+            async with gate:
+                return await self.call_with_meta(prompt)
+        return call
+
+    async def _call_within(self, prompt: str, deadline, gate):
+        async with gate:
+            # The section budget starts once the call has its turn
+            if deadline.expired():
+                raise DeadlineExceeded("request deadline reached before the call started")
+            section_deadline = deadline.section()
+            current_deadline.set(section_deadline)      # the started call's own context
+            return await self.io.within(self.call_with_meta(prompt), section_deadline.remaining())
+
+    async def _call_many_within(self, prompts: list, deadline):
+        """
+        call_many under a request Deadline : returns when every call is done or the deadline passes.
+        A call that ran out of time comes back as (None, meta) with meta["cache"] = "timeout", any other
+        error is raised like call_many without a deadline.
+        """
+        gate  = self._gate(len(prompts))
+        tasks = [
+            self.io.start(lambda prompt=prompt: self._call_within(prompt, deadline, gate), self.section_of(prompt))
+            for prompt in prompts
+        ]
+        late  = []
+        try:
+            if tasks:
+                await self.io.wait(tasks, timeout=deadline.remaining())
+        finally:
+            # Calls still running at the deadline are cancelled (tasks : their HTTP request with them,
+            # threads : their HTTP timeout ends them)
+            late = [task for task in tasks if not task.done()]
+            for task in late:
+                task.cancel()
+        return [self._result_within(prompt, task, task in late) for prompt, task in zip(prompts, tasks)]
+
+    def _result_within(self, prompt: str, task, late: bool):
+        """(output, meta) of a call started under a Deadline, (None, meta) when it ran out of time."""
+        if late or task.cancelled():
+            error = DeadlineExceeded("request deadline reached")
+        else:
+            error = task.exception()
+            if error is None:
+                return task.result()
+            if not isinstance(error, (TimeoutError, RateLimitTimeout)):
+                raise error                             # provider errors, invalid answers, bugs
+        SECTIONS_MISSING.labels(self.section_of(prompt), "timeout").inc()
+        return None, {"cache": "timeout", "usage": empty_usage(), "error": f"{type(error).__name__}: {error}"}
+
+    async def iter_many(self, prompts: list, deadline=None):
+        """
+        Like call_many but yields (index, output, meta) as each call finishes. With a Deadline, the calls
+        still running when it passes are cancelled and yielded last as (index, None, meta).
+        """
+        gate = self._gate(len(prompts))
+        if deadline is None:
+            starter = lambda prompt: self._caller_of(prompt, gate)
+        else:
+            starter = lambda prompt: lambda: self._call_within(prompt, deadline, gate)
+        tasks   = {self.io.start(starter(prompt), self.section_of(prompt)): i for i, prompt in enumerate(prompts)}
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = deadline.remaining() if deadline is not None else None
+                done, pending = await self.io.wait(pending, timeout=timeout, first=True)
+                if not done:
+                    break                               # deadline reached
+                for task in done:
+                    index = tasks[task]
+                    output, meta = task.result() if deadline is None else self._result_within(prompts[index], task, False)
+                    yield index, output, meta
+            for task in sorted(pending, key=tasks.get):
+                task.cancel()
+                yield tasks[task], *self._result_within(prompts[tasks[task]], task, True)
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,86 @@
+import os
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping
+from core.helper import Helper
+
+CONFIG_PATHS = {
+    "global": "src/config/global.yaml",
+    "model":  "src/config/model.yaml",
+    "prompt": "src/config/prompt.yaml",
+    "weight": "src/config/weight.yaml",
+}
+
+def freeze(value):
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def thaw(value):
+    """Inverse of freeze, for handing config back to JSON/YAML writers."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+@dataclass(frozen=True, eq=False)
+class ConfigSnapshot:
+    name: str
+    path: str
+    mtime_ns: int
+    generation: int                 # bumps on every reload of any file, unique per snapshot
+    data: Mapping[str, Any]
+
+    @property
+    def version(self) -> str:
+        return self.data.get("version", "unknown")
+
+class ConfigRegistry(Helper):
+    """Parse each YAML config once and serve frozen snapshots until the file changes."""
+    def __init__(self, paths: dict = CONFIG_PATHS):
+        self.paths       = dict(paths)
+        self._snapshots  = {}
+        self._lock       = threading.Lock()
+        self._generation = 0
+
+    def snapshot(self, name: str) -> ConfigSnapshot:
+        path  = self.paths[name]
+        mtime = os.stat(path).st_mtime_ns
+        snap  = self._snapshots.get(name)
+        if snap is not None and snap.mtime_ns == mtime:
+            return snap
+        with self._lock:
+            snap = self._snapshots.get(name)
+            if snap is None or snap.mtime_ns != mtime:
+                self._generation += 1
+                snap = ConfigSnapshot(
+                    name       = name,
+                    path       = path,
+                    mtime_ns   = mtime,
+                    generation = self._generation,
+                    data       = freeze(self.load_yaml(path)),
+                )
+                self._snapshots[name] = snap
+        return snap
+
+    def get(self, name: str) -> Mapping[str, Any]:
+        return self.snapshot(name).data
+
+    def invalidate(self, name: str | None = None):
+        # Called after admin updates, mtime granularity can hide a quick rewrite
+        with self._lock:
+            if name is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(name, None)
+
+
+registry = ConfigRegistry()
+
+def get_config(name: str) -> Mapping[str, Any]:
+    return registry.get(name)
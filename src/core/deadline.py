@@ -0,0 +1,49 @@
+import contextvars
+from time import monotonic
+from core.helper import Helper
+from core.configregistry import get_config
+
+class DeadlineExceeded(TimeoutError):
+    """An LLM call could not start or finish within the request deadline."""
+
+# Deadline of the section call running in this context, set by LlmCaller.call_many and carried
+# into the threads of started calls by in_context.
+current_deadline = contextvars.ContextVar("current_deadline", default=None)
+
+class Deadline(Helper):
+    """
+    Time budget of one request (global.yaml -> deadline). Each section call gets its own budget, the
+    smaller of the time left and section_timeout_seconds, which bounds its rate limiter wait, retries
+    and the HTTP timeout of every Gemini call it makes.
+    """
+    def __init__(self, seconds: float, section_timeout_seconds: float | None = None):
+        self.seconds    = seconds
+        self.section_timeout_seconds = section_timeout_seconds
+        self.expires_at = monotonic() + seconds
+
+    @classmethod
+    def from_request(cls, header_seconds: float | None = None, body_seconds: float | None = None):
+        """Deadline of a request, the smaller of the header and body timeouts (default_seconds when neither is set)."""
+        cfg = get_config("global").get("deadline", {})
+        requested = [s for s in (header_seconds, body_seconds) if s is not None]
+        if not requested and not cfg.get("enabled", True):
+            return None
+        seconds = min(requested) if requested else cfg.get("default_seconds", 60)
+        seconds = min(max(seconds, 0.0), cfg.get("max_seconds", 300))
+        return cls(seconds, cfg.get("section_timeout_seconds"))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def section(self):
+        """Deadline of one section call starting now."""
+        seconds = self.remaining()
+        if self.section_timeout_seconds is not None:
+            seconds = min(seconds, self.section_timeout_seconds)
+        return Deadline(seconds)
+
+    def to_dict(self) -> dict:
+        return {"budget_seconds": self.seconds, "section_timeout_seconds": self.section_timeout_seconds}
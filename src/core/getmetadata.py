@@ -1,19 +1,21 @@
 from core.helper import Helper
+from core.configregistry import CONFIG_PATHS, registry, thaw
 import os 
 from datetime import datetime,timezone,timedelta
 
 def get_metadata():
-    global_cfg  = Helper.load_yaml("src/config/global.yaml")
-    model_cfg   = Helper.load_yaml("src/config/model.yaml")
-    prompt_cfg  = Helper.load_yaml("src/config/prompt.yaml")
-    weight_cfg  = Helper.load_yaml("src/config/weight.yaml")
+    snapshots   = {name: registry.snapshot(name) for name in CONFIG_PATHS}
+    global_cfg  = snapshots["global"].data
+    model_cfg   = snapshots["model"].data
+    prompt_cfg  = snapshots["prompt"].data
+    weight_cfg  = snapshots["weight"].data
 
     metadata = {
         "global": {
             "version": global_cfg.get("version"),
             "GOOGLE_API_KEY_set": os.getenv("GOOGLE_API_KEY") is not None
         },
-        "model": model_cfg.get("model"),
+        "model": thaw(model_cfg.get("model")),
         "prompt_metadata": {
             "version": prompt_cfg.get("version"),
             "roles_count": len(prompt_cfg.get("role", {})),
@@ -28,6 +30,10 @@ def get_metadata():
                 for sec in weight_cfg["weights"]
             }
         },
+        "config_snapshots": {
+            name: {"version": snap.version, "generation": snap.generation}
+            for name, snap in snapshots.items()
+        },
         "system": {
             "timestamp": str(datetime.now(tz=(timezone(timedelta(hours=7))))),
             "environment": "docker/dev",
@@ -1,13 +1,23 @@
 from datetime import datetime,timezone,timedelta
 from core.helper import Helper
+from core.configregistry import get_config
+
+def renormalize(total: float, completed_weights: list, missing_weights: list) -> float | None:
+    """Final score of a partial result over the weight of every expected section (None if none completed)."""
+    completed = sum(completed_weights)
+    expected  = completed + sum(missing_weights)
+    return total * expected / completed if completed else None
 
 class GlobalAggregator(Helper):
-    def __init__(self,SectionScoreAggregator_output:list):
+    def __init__(self,SectionScoreAggregator_output:list,request_metadata:dict | None = None,
+                 missing_sections:list | None = None):
         self.section_outputs = SectionScoreAggregator_output
+        self.request_metadata = request_metadata or {}   # per-request facts (token estimates, ...) for fn3
+        self.missing_sections = missing_sections or []   # sections with no result (deadline, failed call)
         self.timestamp       = str(datetime.now(tz=(timezone(timedelta(hours=7)))))
-        self.model_config    = Helper.load_yaml("src/config/model.yaml")     # should include model name
-        self.weight_config   = Helper.load_yaml("src/config/weight.yaml")    # includes weights + version
-        self.prompt_config   = Helper.load_yaml("src/config/prompt.yaml")    # includes prompt version
+        self.model_config    = get_config("model")      # should include model name
+        self.weight_config   = get_config("weight")     # includes weights + version
+        self.prompt_config   = get_config("prompt")     # includes prompt version
     def fn1(self):
         weights = self.weight_config["weights"]
         contribution = {}
@@ -23,10 +33,21 @@ class GlobalAggregator(Helper):
                 "contribution": Helper.fop(section_contrib)
             }
             total = total + section_contrib
-        return {
+        conclution = {
             "final_resume_score":Helper.fop(total),
             "section_contribution":contribution
         }
+        if self.missing_sections:
+            # Partial result : the final score is renormalized over the weight of the completed sections
+            final = renormalize(
+                total,
+                [weights[s["section"]]["section_weight"] for s in self.section_outputs],
+                [weights[section]["section_weight"] for section in self.missing_sections],
+            )
+            conclution["final_resume_score"] = Helper.fop(final) if final is not None else None
+            conclution["partial"]          = True
+            conclution["missing_sections"] = self.missing_sections
+        return conclution
     def fn2(self):
         details = {}
         for section_data in self.section_outputs:
@@ -40,7 +61,8 @@ class GlobalAggregator(Helper):
             "model_name": self.model_config['model']['generation_model'],
             "timestamp": self.timestamp,
             "weights_version": self.weight_config.get("version", "unknown"),
-            "prompt_version": self.prompt_config.get("version", "unknown")
+            "prompt_version": self.prompt_config.get("version", "unknown"),
+            **self.request_metadata
         }
     def fn0(self):
         conclution_part = self.fn1()
@@ -1,4 +1,5 @@
 from core.helper import Helper
+from core.configregistry import registry
 
 def deep_merge(old: dict, new: dict):
     for key, value in new.items():
@@ -15,6 +16,7 @@ def update_global(payload: dict):
     updated = deep_merge(config, clean_payload)
     print(updated)
     Helper.save_yaml(updated,config_path)
+    registry.invalidate("global")
     return updated
 
 
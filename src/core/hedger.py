@@ -0,0 +1,100 @@
+import threading
+from collections import deque
+from core.helper import Helper
+from core.configregistry import get_config
+from core.metrics import HEDGE_DELAY
+
+class LatencyWindow:
+    """Latencies of the last `size` calls of one section, the percentile is re-sorted every `refresh` calls."""
+    __slots__ = ("samples", "refresh", "added", "cached")
+
+    def __init__(self, size: int, refresh: int):
+        self.samples = deque(maxlen=size)
+        self.refresh = refresh
+        self.added   = 0
+        self.cached  = None
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.added += 1
+        if self.added % self.refresh == 0:
+            self.cached = None
+
+    def percentile(self, q: float) -> float:
+        if self.cached is None:
+            ordered     = sorted(self.samples)
+            self.cached = ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+        return self.cached
+
+
+class Hedger(Helper):
+    """
+    When a slow LLM call gets a duplicate (model.yaml -> hedging): once it has run longer than the
+    configured percentile of the recent calls of the same section, and only while the hedge budget lasts.
+    Every call earns max_hedge_rate of budget and a hedge spends 1, so hedges stay under that share of calls.
+    """
+    def __init__(self, enabled: bool = True, percentile: float = 95, window: int = 500, min_samples: int = 20,
+                 refresh: int = 10, min_delay_seconds: float = 0.05, max_hedge_rate: float = 0.05,
+                 max_budget: float = 10):
+        self.enabled           = enabled
+        self.percentile        = percentile
+        self.window            = window
+        self.min_samples       = min_samples
+        self.refresh           = refresh
+        self.min_delay_seconds = min_delay_seconds
+        self.max_hedge_rate    = max_hedge_rate
+        self.max_budget        = max_budget
+        self.budget            = 0.0
+        self._windows = {}          # section -> LatencyWindow
+        self._lock    = threading.Lock()
+
+    @classmethod
+    def from_config(cls):
+        cfg = get_config("model").get("hedging", {})
+        return cls(
+            enabled           = cfg.get("enabled", True),
+            percentile        = cfg.get("percentile", 95),
+            window            = cfg.get("window", 500),
+            min_samples       = cfg.get("min_samples", 20),
+            min_delay_seconds = cfg.get("min_delay_seconds", 0.05),
+            max_hedge_rate    = cfg.get("max_hedge_rate", 0.05),
+        )
+
+    def observe(self, section: str, seconds: float):
+        """Latency of a call that returned an answer."""
+        with self._lock:
+            window = self._windows.get(section)
+            if window is None:
+                window = self._windows[section] = LatencyWindow(self.window, self.refresh)
+            window.add(seconds)
+
+    def delay(self, section: str) -> float | None:
+        """Seconds to wait before hedging a new call of this section, None : do not hedge it."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.budget = min(self.max_budget, self.budget + self.max_hedge_rate)
+            window = self._windows.get(section)
+            if window is None or len(window.samples) < self.min_samples:
+                return None
+            delay = max(self.min_delay_seconds, window.percentile(self.percentile))
+        HEDGE_DELAY.labels(section).set(delay)
+        return delay
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            if self.budget < 1:
+                return False
+            self.budget -= 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "budget": round(self.budget, 3),
+                "delay_seconds": {
+                    section: round(window.percentile(self.percentile), 4)
+                    for section, window in self._windows.items() if len(window.samples) >= self.min_samples
+                },
+            }
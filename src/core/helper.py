@@ -1,6 +1,7 @@
 import yaml
 import json
 import os
+import re
 
 class LiteralString(str):
     """Force YAML to use block literal style '|'."""
@@ -12,6 +13,9 @@ def literal_representer(dumper,value):
 # Register custom representer
 yaml.add_representer(LiteralString, literal_representer)
 
+# Latin words, digit runs, single non-ASCII characters (Thai, ...), ASCII punctuation runs
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|[0-9]+|[^\x00-\x7f]|[^\sA-Za-z0-9\x80-\U0010ffff]+")
+
 class Helper:
     @staticmethod
     def load_file(filepath: str) -> str:
@@ -37,6 +41,26 @@ class Helper:
     def fop(num: float) -> float:
         return float(f"{num:.1f}")
     
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """
+        Cheap local token estimate, no tokenizer call.
+        Words count one token per 6 letters, digits one per 3, punctuation one per 2 characters
+        and every non-ASCII character one.
+        """
+        tokens = 0
+        for piece in _TOKEN_PIECES.findall(text):
+            first = piece[0]
+            if not first.isascii():
+                tokens += 1
+            elif first.isalpha():
+                tokens += (len(piece) + 5) // 6
+            elif first.isdigit():
+                tokens += (len(piece) + 2) // 3
+            else:
+                tokens += (len(piece) + 1) // 2
+        return tokens
+
     @staticmethod
     def prettyjson(txt:str) -> str:
         return str(json.dumps(txt,indent=4, ensure_ascii=False))
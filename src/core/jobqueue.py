@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone, timedelta
+from time import time
+from core.helper import Helper
+from core.configregistry import get_config
+
+class QueueFullError(Exception):
+    pass
+
+def _timestamp(ts):
+    if ts is None:
+        return None
+    return str(datetime.fromtimestamp(ts, tz=timezone(timedelta(hours=7))))
+
+class JobQueue(Helper):
+    """
+    Durable local job queue: jobs are rows in a SQLite file and a small pool of worker threads
+    runs them with `runner(payload) -> result`. Queued jobs survive a restart, and jobs that were
+    running when the process died are queued again on start (up to max_attempts).
+    """
+    def __init__(self, runner, workers: int = 2, max_queue_depth: int = 100,
+                 sqlite_path: str = ".cache/jobs.sqlite3", max_attempts: int = 3,
+                 keep_finished_seconds: float = 86400, poll_interval: float = 1.0):
+        self.runner                = runner
+        self.workers               = workers
+        self.max_queue_depth       = max_queue_depth
+        self.max_attempts          = max_attempts
+        self.keep_finished_seconds = keep_finished_seconds
+        self.poll_interval         = poll_interval
+        self._lock    = threading.Lock()
+        self._wakeup  = threading.Event()
+        self._stop    = threading.Event()
+        self._threads = []
+        self.sqlite_path = sqlite_path
+        self._db = None                   # opened on first use, see _conn
+
+    def _conn(self) -> sqlite3.Connection:
+        """The SQLite file, created on first use. Call with _lock held."""
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.sqlite_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.sqlite_path, check_same_thread=False, timeout=30)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, "
+                "result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    @classmethod
+    def from_config(cls, runner):
+        cfg = get_config("global").get("jobs", {})
+        return cls(
+            runner                = runner,
+            workers               = cfg.get("workers", 2),
+            max_queue_depth       = cfg.get("max_queue_depth", 100),
+            sqlite_path           = cfg.get("sqlite_path", ".cache/jobs.sqlite3"),
+            max_attempts          = cfg.get("max_attempts", 3),
+            keep_finished_seconds = cfg.get("keep_finished_seconds", 86400),
+        )
+
+    def start(self):
+        if self._threads:
+            return
+        with self._lock:
+            db = self._conn()
+            # Jobs left "running" by a previous process never finished
+            db.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+            db.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time() - self.keep_finished_seconds,)
+            )
+            db.commit()
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._wakeup.set()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, payload: dict) -> dict:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            db    = self._conn()
+            depth = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if depth >= self.max_queue_depth:
+                raise QueueFullError(f"job queue is full ({depth} queued)")
+            db.execute(
+                "INSERT INTO jobs (id, status, payload, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, json.dumps(payload, ensure_ascii=False), time())
+            )
+            db.commit()
+        self._wakeup.set()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            db  = self._conn()
+            row = db.execute(
+                "SELECT id, status, result, error, attempts, created_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, status, result, error, attempts, created_at, started_at, finished_at = row
+            job = {
+                "id": job_id,
+                "status": status,
+                "attempts": attempts,
+                "created_at": _timestamp(created_at),
+                "started_at": _timestamp(started_at),
+                "finished_at": _timestamp(finished_at),
+            }
+            if status == "queued":
+                job["queue_position"] = db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (created_at,)
+                ).fetchone()[0]
+        if result is not None:
+            job["result"] = json.loads(result)
+        if error is not None:
+            job["error"] = error
+        return job
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "workers": len(self._threads),
+            "max_queue_depth": self.max_queue_depth,
+            **{status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")},
+        }
+
+    def _claim(self):
+        with self._lock:
+            db  = self._conn()
+            row = db.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1) "
+                "RETURNING id, payload, attempts", (time(),)
+            ).fetchone()
+            db.commit()
+        return row
+
+    def _finish(self, job_id: str, status: str, result=None, error: str | None = None):
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, None if result is None else json.dumps(result, ensure_ascii=False),
+                 error, time(), job_id)
+            )
+            db.commit()
+
+    def _work(self):
+        while not self._stop.is_set():
+            row = self._claim()
+            if row is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            job_id, payload, attempts = row
+            if attempts > self.max_attempts:
+                # Crashed the process on every previous try, do not run it again
+                self._finish(job_id, "failed", error=f"gave up after {attempts - 1} attempts")
+                continue
+            try:
+                result = self.runner(json.loads(payload))
+            except Exception as e:
+                self._finish(job_id, "failed", error=f"{type(e).__name__}: {e}")
+            else:
+                self._finish(job_id, "done", result=result)
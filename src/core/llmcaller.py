@@ -1,27 +1,253 @@
-from google import genai
-import json
-import re
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, wait
+from time import time, sleep
+import hashlib
+import random
+import threading
 from core.helper import Helper
+from core.configregistry import get_config, registry
+from core.responsecache import ResponseCache, get_response_cache
+from core.providers import create_provider
+from core.ratelimiter import get_rate_limiter
+from core.singleflight import SingleFlight
+from core.hedger import Hedger
+from core.callflow import CallFlow, run_sync
+from core.usagetracker import extract_usage, usage_tracker
+from core.responseschema import check_section, parse_json, salvage_scores
+from core.metrics import LLM_ERRORS, LLM_RETRIES, PARSE_FAILURES, current_endpoint, in_context, observe_stage
 import os
 
 class LlmCaller(Helper):
-    def __init__(self):
+    def __init__(self, client = None):
         # self.global_cfg = self.load_yaml("src/config/global.yaml")
         # api_key         = self.global_cfg["setting"]["GOOGLE_API_KEY"]
-        api_key         = os.getenv("GOOGLE_API_KEY")
-        self.model_cfg  = self.load_yaml("src/config/model.yaml")
-        self.client     = genai.Client(api_key=api_key)
+        self.model_cfg  = get_config("model")
+        # client : any provider shaped like genai.Client (core/providers.py), model.yaml -> model.provider by default,
+        # created on first use so the API starts without importing google-genai or building an HTTP client
+        self._client    = client
+        self._client_lock = threading.Lock()
         self.model      = self.model_cfg["model"]["generation_model"]
-    def _parse(self,resp):
-        text = resp.text.strip()
-        text = re.sub(r"^```json|```$", "", text).strip()
-        return json.loads(text)
-    def call(self,prompt:str):
-        resp = self.client.models.generate_content(
-            model    = self.model,
-            contents = prompt 
+        self.cache      = get_response_cache()
+        self.context_cache_cfg = self.model_cfg.get("context_cache", {})
+        self.limiter    = get_rate_limiter()
+        self.retry_cfg  = self.model_cfg.get("retry", {})
+        self.structured_cfg = self.model_cfg.get("structured_output", {})
+        self.hedger     = Hedger.from_config()
+        self.max_parallel_calls = self.model_cfg.get("concurrency", {}).get("max_parallel_calls", 6)
+        self.expected_output_tokens = self.model_cfg.get("rate_limit", {}).get("expected_output_tokens", 1000)
+        self._context_caches   = {}                 # (model, prefix sha256) -> (cache name or None, expires_at) or None
+        self._context_failures = {}                 # (model, prefix sha256) -> transient creation failures in a row
+        self._context_lock     = threading.Lock()
+        self._prefix_tokens    = {}                 # static prefix -> token estimate (same few prefixes every call)
+        # Call flow shared with AsyncLlmCaller (core/callflow.py), here on threads and the sync client
+        self._flow      = CallFlow(self, ThreadIO(self))
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = create_provider(self.model_cfg)
+        return self._client
+    @client.setter
+    def client(self,client):
+        self._client = client
+    @staticmethod
+    def section_of(prompt) -> str:
+        # Metrics / usage label of a prompt built by PromptBuilder or FusedPromptBuilder
+        if hasattr(prompt, "sections"):
+            return "fused"
+        return getattr(prompt, "section", "other")
+    def _parse(self,resp,section:str = "other"):
+        with observe_stage("json_parse", section):
+            try:
+                return parse_json(resp.text)
+            except (ValueError, AttributeError, TypeError):
+                PARSE_FAILURES.labels(section, current_endpoint.get()).inc()
+                raise
+    def _cache_key(self,prompt:str):
+        prompt_version = registry.snapshot("prompt").version
+        weight_version = registry.snapshot("weight").version
+        return ResponseCache.make_key(prompt, self.model, prompt_version, weight_version)
+    def _context_cache_key(self,prefix:str):
+        cfg = self.context_cache_cfg
+        if not cfg.get("enabled", False):
+            return None
+        tokens = self._prefix_tokens.get(prefix)
+        if tokens is None:
+            tokens = self._prefix_tokens[prefix] = self.estimate_tokens(prefix)
+        if tokens < cfg.get("min_prefix_tokens", 1024):
+            return None                                 # Gemini rejects cached contents below a minimum size
+        return (self.model, hashlib.sha256(prefix.encode("utf-8")).hexdigest())
+    def _known_context_cache(self,key):
+        """
+        (True, name) when the prefix has a live cache, or (True, None) while it is known not to be cacheable or
+        waiting out a failed creation, else (False, None).
+        """
+        entry = self._context_caches.get(key, False)
+        if entry is None or (entry and entry[1] > time()):
+            return True, entry and entry[0]
+        return False, None
+    def _create_context_cache(self,key,prefix:str):
+        """Create the Gemini cached content of a static prefix (blocking), once per key and TTL."""
+        cfg = self.context_cache_cfg
+        with self._context_lock:
+            known, name = self._known_context_cache(key)
+            if known:
+                return name
+            ttl = cfg.get("ttl_seconds", 3600)
+            from google.genai import types
+            try:
+                cached = self.client.caches.create(
+                    model  = self.model,
+                    config = types.CreateCachedContentConfig(
+                        contents     = [prefix],
+                        ttl          = f"{ttl}s",
+                        display_name = f"cvresume-prefix-{key[1][:12]}"
+                    )
+                )
+            except Exception as e:
+                if getattr(e, "code", None) in set(self.retry_cfg.get("retry_on", (429, 500, 502, 503, 504))):
+                    # Transient (429 / 5xx) : calls go without the cache until the backoff has passed
+                    failures = self._context_failures[key] = self._context_failures.get(key, 0) + 1
+                    delay    = min(self.retry_cfg.get("max_delay_seconds", 8),
+                                   self.retry_cfg.get("base_delay_seconds", 0.5) * 2 ** (failures - 1))
+                    self._context_caches[key] = (None, time() + delay)
+                    return None
+                # Not cacheable for this model (size, region, permissions), stop asking for this prefix
+                self._context_caches[key] = None
+                return None
+            self._context_failures.pop(key, None)
+            # Refresh a minute before the server side expiry
+            self._context_caches[key] = (cached.name, time() + max(ttl - 60, 1))
+            return cached.name
+    def _drop_context_cache(self,name:str):
+        with self._context_lock:
+            for key, entry in list(self._context_caches.items()):
+                if entry is not None and entry[0] == name:
+                    del self._context_caches[key]
+    def _record_usage(self,prompt:str,resp,reserved:int = 0):
+        usage    = extract_usage(resp)
+        criteria = [] if hasattr(prompt, "sections") else getattr(prompt, "criteria", [])
+        usage_tracker.record(self.model, self.section_of(prompt), criteria, usage)
+        if usage["input"]:                              # no usage_metadata : keep the reservation as is
+            self.limiter.settle(reserved, usage["input"] + usage["output"] + usage["thinking"])
+        return usage
+    def _on_error(self,e:Exception,section:str,attempt:int,deadline) -> tuple:
+        """(rate limiter outcome, backoff delay) of a failed attempt, delay None : do not retry."""
+        max_attempts = self.retry_cfg.get("max_attempts", 4)
+        retry_on     = set(self.retry_cfg.get("retry_on", (429, 500, 502, 503, 504)))
+        code  = getattr(e, "code", None)
+        label = str(code or type(e).__name__)
+        LLM_ERRORS.labels(section, current_endpoint.get(), label).inc()
+        outcome = "rate_limited" if code == 429 else "error"
+        if code not in retry_on or attempt >= max_attempts:
+            return outcome, None
+        if deadline is not None and deadline.remaining() <= 0:
+            return outcome, None
+        LLM_RETRIES.labels(section, label).inc()
+        return outcome, self._backoff(attempt)
+    def _backoff(self,attempt:int) -> float:
+        # Full jitter : uniform in [0, min(max_delay, base * 2^(attempt-1))]
+        base = self.retry_cfg.get("base_delay_seconds", 0.5)
+        cap  = self.retry_cfg.get("max_delay_seconds", 8)
+        return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+    @staticmethod
+    def _with_timeout(config,seconds:float):
+        # Gemini HTTP timeout (milliseconds) of one call, so a hung call gives its thread back at the deadline
+        from google.genai import types
+        http_options = types.HttpOptions(timeout=max(1, int(seconds * 1000)))
+        if config is None:
+            return types.GenerateContentConfig(http_options=http_options)
+        return config.model_copy(update={"http_options": http_options})
+    def _record_loser(self,prompt:str,future,reserved:int):
+        if not future.cancelled() and future.exception() is None:
+            self._record_usage(prompt, future.result(), reserved)
+    def _generation_config(self,prompt:str,cache_name:str | None):
+        # Schema-constrained JSON (model.yaml -> structured_output) for prompts built by PromptBuilder
+        schema = getattr(prompt, "response_schema", None) if self.structured_cfg.get("enabled", True) else None
+        if cache_name is None and schema is None:
+            return None
+        from google.genai import types
+        return types.GenerateContentConfig(
+            cached_content     = cache_name,
+            response_mime_type = "application/json" if schema is not None else None,
+            response_schema    = schema,
         )
-        return self._parse(resp)
+    def _fused_answers(self,resp):
+        """{section: answer} of a fused answer, empty when it cannot be read (every section gets re-asked)."""
+        try:
+            output = self._parse(resp, "fused")
+        except (ValueError, AttributeError, TypeError):
+            output = {}
+        items = output.get("sections") if isinstance(output, dict) else None
+        return {item.get("section"): item for item in items or [] if isinstance(item, dict)}
+    def _section_answer(self,builder,resp):
+        """(valid part of a section answer, criteria to re-ask), reading what it can from a broken answer."""
+        try:
+            output = self._parse(resp, builder.section)
+        except (ValueError, AttributeError, TypeError):
+            output = {"scores": salvage_scores(getattr(resp, "text", None) or "", builder.criteria)}
+        return check_section(output, builder.section, builder.criteria)
+    def call_with_meta(self,prompt:str,use_cache:bool = True):
+        # meta["cache"] : hit_memory | hit_disk | miss | disabled | bypass | coalesced (CallFlow.call_with_meta)
+        return run_sync(self._flow.call_with_meta(prompt, use_cache))
+    def call(self,prompt:str,use_cache:bool = True):
+        return self.call_with_meta(prompt, use_cache)[0]
+    def call_many(self,prompts:list,with_meta:bool = False):
+        # Fan out independent prompts, one thread each (the rate limiter bounds the calls in flight),
+        # results come back in the same order as prompts
+        return run_sync(self._flow.call_many(prompts, with_meta))
+    def split_sections(self,output:dict,sections:list):
+        # Fused answers come back as {"sections": [...]}, re-key them so order follows the request
+        by_section = {item["section"]: item for item in output["sections"]}
+        return [by_section[section] for section in sections]
+
+class ThreadIO:
+    """CallFlow transport of LlmCaller : blocking calls on the sync client, one thread per started call."""
+    def __init__(self, caller):
+        self.caller  = caller
+        self.flights = SingleFlight()               # identical prompts in flight share one LLM call
+    async def acquire(self,tokens:int,timeout):
+        self.caller.limiter.acquire(tokens, timeout)
+    async def generate(self,**kwargs):
+        return self.caller.client.models.generate_content(model=self.caller.model, **kwargs)
+    async def sleep(self,seconds:float):
+        sleep(seconds)
+    async def cache_get(self,key:str):
+        return self.caller.cache.get(key)
+    async def cache_set(self,key:str,output):
+        self.caller.cache.set(key, output)
+    async def offload(self,fn,*args):
+        return fn(*args)
+    async def flight(self,key:str,fn,timeout):
+        return self.flights.do(key, lambda: run_sync(fn()), timeout=timeout)
+    def start(self,fn,section:str):
+        # A thread rather than a shared pool : started calls start calls of their own (hedges) and
+        # would deadlock a bounded pool. A call still queued can be cancelled, a running one cannot.
+        future = Future()
+        def run():
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(run_sync(fn()))
+                except BaseException as e:
+                    future.set_exception(e)
+        threading.Thread(target=in_context(run), daemon=True).start()
+        return future
+    async def wait(self,handles,timeout = None,first:bool = False):
+        return wait(handles, timeout=timeout, return_when=FIRST_COMPLETED if first else ALL_COMPLETED)
+    async def within(self,coro,seconds:float):
+        # The section's HTTP timeout (LlmCaller._with_timeout) bounds the call, a thread cannot be interrupted
+        return await coro
+    def gate(self,limit:int):
+        return ThreadGate(limit)
+
+class ThreadGate:
+    """threading.Semaphore for `async with` in a CallFlow on ThreadIO (blocks, never suspends)."""
+    def __init__(self, limit:int):
+        self.semaphore = threading.Semaphore(limit)
+    async def __aenter__(self):
+        self.semaphore.acquire()
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
 
 # x = LlmCaller()
 # resp = x.call("Hello,This is Gemini conection testing if you here me return {'status': 'connected'} as a json format")
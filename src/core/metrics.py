@@ -0,0 +1,168 @@
+import contextvars
+from contextlib import contextmanager
+from time import perf_counter
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.openmetrics import exposition as openmetrics
+from starlette.routing import Match
+
+# Route template of the request being served ("/evaluation/skills", "/jobs/{job_id}", ...).
+# Set by MetricsMiddleware, carried into the threads of started calls by in_context.
+current_endpoint = contextvars.ContextVar("current_endpoint", default="other")
+
+# LLM round trips take seconds, the local stages take micro to milliseconds
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "cvresume_stage_seconds",
+    "Time spent per pipeline stage: prompt_build, llm_round_trip, json_parse, section_aggregate, global_aggregate",
+    ["stage", "section", "endpoint"],
+    buckets=_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "cvresume_request_seconds",
+    "HTTP request time until the response body is fully sent",
+    ["endpoint", "method"],
+    buckets=_BUCKETS,
+)
+LLM_ERRORS = Counter(
+    "cvresume_llm_errors",
+    "Failed LLM calls by error type (HTTP status code when the SDK exposes one)",
+    ["section", "endpoint", "error"],
+)
+PARSE_FAILURES = Counter(
+    "cvresume_llm_parse_failures",
+    "LLM answers that were not valid JSON",
+    ["section", "endpoint"],
+)
+CACHE_LOOKUPS = Counter(
+    "cvresume_response_cache_lookups",
+    "Response cache lookups by status (hit_memory, hit_disk, miss, disabled, bypass)",
+    ["status", "section"],
+)
+LLM_INFLIGHT = Gauge(
+    "cvresume_llm_inflight_calls",
+    "LLM calls currently waiting on the provider",
+    ["section"],
+)
+LLM_COALESCED = Counter(
+    "cvresume_llm_coalesced",
+    "Calls answered by an identical LLM call already in flight instead of a new one",
+    ["section"],
+)
+SECTIONS_REUSED = Counter(
+    "cvresume_sections_reused",
+    "Composite sections answered from the last evaluation of the same resume id (input unchanged)",
+    ["section"],
+)
+SECTIONS_MISSING = Counter(
+    "cvresume_sections_missing",
+    "Sections left out of a composite result because their call ran out of request deadline (reason=timeout)",
+    ["section", "reason"],
+)
+LLM_HEDGES = Counter(
+    "cvresume_llm_hedges",
+    "Hedged Gemini calls: fired (duplicate sent), won (duplicate answered first), budget_exhausted (slow call not hedged)",
+    ["section", "event"],
+)
+HEDGE_DELAY = Gauge(
+    "cvresume_llm_hedge_delay_seconds",
+    "Current hedge delay per section, the configured latency percentile of its recent calls",
+    ["section"],
+)
+LLM_REPAIRS = Counter(
+    "cvresume_llm_repairs",
+    "Follow-up calls re-asking only for the criteria that came back missing or invalid",
+    ["section"],
+)
+LLM_RETRIES = Counter(
+    "cvresume_llm_retries",
+    "LLM calls retried after a 429 / 5xx, by the error that caused the retry",
+    ["section", "error"],
+)
+EVALUATIONS_INFLIGHT = Gauge(
+    "cvresume_evaluations_inflight",
+    "Evaluations holding a slot of the async handlers (model.yaml -> backpressure)",
+)
+EVALUATIONS_QUEUED = Gauge(
+    "cvresume_evaluations_queued",
+    "Evaluations waiting for a slot of the async handlers",
+)
+EVALUATIONS_REJECTED = Counter(
+    "cvresume_evaluations_rejected",
+    "Evaluations turned away with a 503 (reason=queue_full|queue_timeout)",
+    ["reason"],
+)
+WARMUP_SECONDS = Gauge(
+    "cvresume_warmup_seconds",
+    "Duration of each startup warmup step (model.yaml -> warmup)",
+    ["step"],
+)
+RATELIMIT_CONCURRENCY = Gauge(
+    "cvresume_ratelimit_concurrency_limit",
+    "Current AIMD limit on LLM calls in flight",
+)
+RATELIMIT_INFLIGHT = Gauge(
+    "cvresume_ratelimit_inflight",
+    "LLM calls admitted by the rate limiter and not yet released",
+)
+RATELIMIT_AVAILABLE = Gauge(
+    "cvresume_ratelimit_available",
+    "Tokens left in the rate limiter buckets (bucket=requests|tokens)",
+    ["bucket"],
+)
+RATELIMIT_WAIT = Histogram(
+    "cvresume_ratelimit_wait_seconds",
+    "Time LLM calls waited for the rate limiter",
+    buckets=_BUCKETS,
+)
+
+@contextmanager
+def observe_stage(stage: str, section: str = "all"):
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage, section, current_endpoint.get()).observe(perf_counter() - start)
+
+def in_context(fn):
+    """
+    Wrap fn for a new thread: runs it in a copy of the starting thread's context, so metrics keep the
+    endpoint label and the call its deadline.
+    """
+    ctx = contextvars.copy_context()
+    def run(*args, **kwargs):
+        return ctx.run(fn, *args, **kwargs)
+    return run
+
+def render_metrics(accept: str = "") -> tuple:
+    """(body, content type), OpenMetrics when the scraper asks for it, Prometheus text otherwise."""
+    if "application/openmetrics-text" in accept:
+        return openmetrics.generate_latest(REGISTRY), openmetrics.CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+class MetricsMiddleware:
+    """ASGI middleware labelling everything a request does with its route template."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        endpoint = _route_template(scope)
+        token    = current_endpoint.set(endpoint)
+        start    = perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            REQUEST_SECONDS.labels(endpoint, scope["method"]).observe(perf_counter() - start)
+            current_endpoint.reset(token)
+
+def _route_template(scope) -> str:
+    # Raw paths would give one label per job id, use the matching route's template instead
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
@@ -1,4 +1,6 @@
 from core.helper import Helper
+from core.configregistry import registry
+from core.responsecache import get_response_cache
 def update_model(payload):
     config_file  = Helper.load_yaml("src/config/model.yaml")
     config_value = config_file["model"]
@@ -17,6 +19,9 @@ def update_model(payload):
     #     return yaml.dump(config_file,f,sort_keys=False)
 
     Helper.save_yaml(config_file,"src/config/model.yaml")
+    registry.invalidate("model")
+    # Cached answers were produced by the old model
+    get_response_cache().clear()
 
 # pl0 = {
 #     "provider":"google",
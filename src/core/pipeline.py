@@ -0,0 +1,122 @@
+from core.helper import Helper
+from core.promptbuilder import PromptBuilder
+from core.globalaggregator import GlobalAggregator
+from core.usagetracker import summarize_usage
+from core.metrics import SECTIONS_REUSED, observe_stage
+from core.sectionstore import get_section_store
+
+# Sections scored by the composite evaluation, in GlobalAggregator order
+COMPOSITE_SECTIONS = [
+    ("Profile",    ["Completeness", "ContentQuality"]),
+    ("Summary",    ["Completeness", "ContentQuality","Grammar","Length","RoleRelevance"]),
+    ("Education",  ["Completeness","RoleRelevance"]),
+    ("Experience", ["Completeness", "ContentQuality","Grammar","Length","RoleRelevance"]),
+    ("Activities", ["Completeness", "ContentQuality","Grammar","Length"]),
+    ("Skills",     ["Completeness","Length","RoleRelevance"]),
+]
+DEFAULT_TARGET_ROLE = "Data science"
+
+def build_section_prompts(resume_json, output_lang: str = "en", targetrole: str = DEFAULT_TARGET_ROLE,
+                          sections: list = COMPOSITE_SECTIONS) -> list:
+    return [
+        PromptBuilder(
+            section     = section,
+            criteria    = criteria,
+            targetrole  = targetrole,
+            cvresume    = resume_json,
+            output_lang = output_lang
+        ).build()
+        for section, criteria in sections
+    ]
+
+def estimate_prompt_tokens(prompts: list, sections: list = COMPOSITE_SECTIONS) -> dict:
+    estimate = {section: Helper.estimate_tokens(prompt) for (section, _), prompt in zip(sections, prompts)}
+    estimate["total"] = sum(estimate.values())
+    return estimate
+
+def token_usage(metas: list, model: str, sections: list = COMPOSITE_SECTIONS) -> dict:
+    """Real token counts and cost of a composite request from the LlmCaller call metas."""
+    return summarize_usage({section: meta["usage"] for (section, _), meta in zip(sections, metas)}, model)
+
+def global_aggregate(section_outputs: list, request_metadata: dict | None = None,
+                     missing_sections: list | None = None) -> dict:
+    with observe_stage("global_aggregate"):
+        return GlobalAggregator(
+            SectionScoreAggregator_output = section_outputs,
+            request_metadata = request_metadata,
+            missing_sections = missing_sections
+        ).fn0()
+
+def aggregate_composite(llm_outputs: list, aggregator, request_metadata: dict | None = None) -> dict:
+    """SectionScoreAggregator on every section answer (in order), then GlobalAggregator.fn0."""
+    section_outputs = [aggregator.aggregate(op) for op in llm_outputs]
+    return global_aggregate(section_outputs, request_metadata)
+
+def reuse_sections(store, resume_id: str | None, prompts: list, model: str, aggregator,
+                   sections: list = COMPOSITE_SECTIONS) -> tuple:
+    """
+    (fingerprints, {index: SectionScoreAggregator output}) for the sections whose prompt is unchanged
+    since the last evaluation of this resume id. A weight change re-aggregates the stored LLM answer.
+    """
+    fingerprints = [store.fingerprint(prompt, model) for prompt in prompts]
+    stored       = store.load(resume_id) if resume_id else {}
+    reused, refreshed = {}, {}
+    for index, ((section, _), fingerprint) in enumerate(zip(sections, fingerprints)):
+        row = stored.get(section)
+        if row is None or row["fingerprint"] != fingerprint:
+            continue
+        weights_fingerprint = store.weights_fingerprint(section)
+        if row["weights_fingerprint"] != weights_fingerprint:
+            row = refreshed[section] = {
+                **row,
+                "weights_fingerprint": weights_fingerprint,
+                "section_output": aggregator.aggregate(row["llm_output"]),
+            }
+        reused[index] = row["section_output"]
+        SECTIONS_REUSED.labels(section).inc()
+    if refreshed:
+        store.save(resume_id, refreshed)
+    return fingerprints, reused
+
+def remember_sections(store, resume_id: str | None, fingerprints: list, results: dict,
+                      sections: list = COMPOSITE_SECTIONS):
+    """Store {index: (LLM answer, SectionScoreAggregator output)} of freshly scored sections."""
+    if not resume_id:
+        return
+    store.save(resume_id, {
+        sections[index][0]: {
+            "fingerprint": fingerprints[index],
+            "weights_fingerprint": store.weights_fingerprint(sections[index][0]),
+            "llm_output": llm_output,
+            "section_output": section_output,
+        }
+        for index, (llm_output, section_output) in results.items()
+    })
+
+def run_composite(caller, aggregator, resume_json, output_lang: str = "en",
+                  targetrole: str = DEFAULT_TARGET_ROLE, resume_id: str | None = None) -> dict:
+    """
+    Whole per-section composite evaluation for one resume, used outside a request (jobs).
+    With a resume id the sections are stored, and unchanged ones reused, like the composite endpoint.
+    """
+    store   = get_section_store()
+    prompts = build_section_prompts(resume_json, output_lang, targetrole)
+    fingerprints, reused = reuse_sections(store, resume_id, prompts, caller.model, aggregator)
+    todo     = [i for i in range(len(prompts)) if i not in reused]
+    sections = [COMPOSITE_SECTIONS[i] for i in todo]
+    changed  = [prompts[i] for i in todo]
+    results  = caller.call_many(changed, with_meta=True)
+    section_outputs = [reused.get(i) for i in range(len(prompts))]
+    for i, (op, _) in zip(todo, results):
+        section_outputs[i] = aggregator.aggregate(op)
+    remember_sections(store, resume_id, fingerprints,
+                      {i: (op, section_outputs[i]) for i, (op, _) in zip(todo, results)})
+    return global_aggregate(section_outputs, {
+        "input_tokens_estimate": estimate_prompt_tokens(changed, sections),
+        "token_usage": token_usage([meta for _, meta in results], caller.model, sections),
+        "incremental": {
+            "resume_id": resume_id,
+            "reused_sections": [COMPOSITE_SECTIONS[i][0] for i in sorted(reused)],
+            "rescored_sections": [section for section, _ in sections],
+        },
+    })
@@ -1,8 +1,118 @@
-from google import genai
 import json
-import os
-import yaml
+import threading
 from core.helper import Helper
+from core.configregistry import registry
+from core.resumeserializer import serialize_resume
+from core.metrics import observe_stage
+from core.responseschema import response_schema
+
+# Compiled prompt segments keyed by (segment kind, ..., prompt.yaml generation).
+# The static prefix depends on the config only, the request head on section/criteria/role/lang.
+_TEMPLATE_CACHE     = {}
+_TEMPLATE_CACHE_MAX = 256
+_TEMPLATE_LOCK      = threading.Lock()
+
+def _memo_template(key: tuple, compile_fn) -> str:
+    text = _TEMPLATE_CACHE.get(key)
+    if text is None:
+        text = compile_fn()
+        with _TEMPLATE_LOCK:
+            while len(_TEMPLATE_CACHE) >= _TEMPLATE_CACHE_MAX:
+                _TEMPLATE_CACHE.pop(next(iter(_TEMPLATE_CACHE)))
+            _TEMPLATE_CACHE[key] = text
+    return text
+
+def clear_prompt_cache():
+    with _TEMPLATE_LOCK:
+        _TEMPLATE_CACHE.clear()
+
+class PromptText(str):
+    """Prompt string that remembers its byte-stable static prefix (shared by every section and resume)."""
+    def __new__(cls, static_prefix: str, suffix: str, **attrs):
+        obj = super().__new__(cls, static_prefix + suffix)
+        obj.static_prefix = static_prefix
+        obj.__dict__.update(attrs)
+        return obj
+
+    @property
+    def suffix(self) -> str:
+        return self[len(self.static_prefix):]
+
+def _criteria_names(criteria) -> str:
+    return "".join(f"- {crit}\n" for crit in criteria)
+
+def _rubric_block(criteria_cfg, criteria, include_fewshot: bool) -> str:
+    blocks = []
+    for crit in criteria:
+        few_cfg = criteria_cfg.get(crit, {})
+        block = f"- {crit}\n"
+        if include_fewshot:
+            for score in [5, 3, 1]:
+                key = f"score{score}"
+                if key in few_cfg:
+                    block += f"    score {score}: {few_cfg[key].strip()}\n"
+        blocks.append(block)
+    return "".join(blocks)
+
+def _prefix_text(config, rubric: str) -> str:
+    prefix = (
+        f"Role :\n{config['role']['role1']}\n\n"
+        f"Objectvie :\n{config['objective']['objective1']}\n"
+        f"Section :\n{config['section']['section1']}\n\n"
+        f"Scale :\n{config['scale']['score1']}\n"
+    )
+    return prefix + (f"Criteria rubric :\n{rubric}\n" if rubric else "")
+
+def rubric_in_prefix(snapshot, include_fewshot: bool = True) -> bool:
+    """
+    True when the static prefix with every criterion's rubric is big enough for a Gemini context cache
+    (model.yaml -> context_cache). Otherwise the prefix is sent in full on every call, so each request
+    carries the rubric of the criteria it scores only.
+    """
+    model = registry.snapshot("model")
+    def compile_rubric_in_prefix():
+        cfg = model.data.get("context_cache", {})
+        if not cfg.get("enabled", False):
+            return False
+        criteria_cfg = snapshot.data.get("criteria", {})
+        prefix = _prefix_text(snapshot.data, _rubric_block(criteria_cfg, criteria_cfg, include_fewshot))
+        return Helper.estimate_tokens(prefix) >= cfg.get("min_prefix_tokens", 1024)
+    key = ("rubric_in_prefix", include_fewshot, snapshot.generation, model.generation)
+    return _memo_template(key, compile_rubric_in_prefix)
+
+def build_static_prefix(snapshot, include_fewshot: bool = True, with_rubric: bool = True) -> str:
+    """Role, objective, section rule, scale and, with_rubric, the full criteria rubric, placeholders left unresolved."""
+    def compile_prefix():
+        criteria_cfg = snapshot.data.get("criteria", {})
+        rubric = _rubric_block(criteria_cfg, criteria_cfg, include_fewshot) if with_rubric else ""
+        return _prefix_text(snapshot.data, rubric)
+    return _memo_template(("static", include_fewshot, with_rubric, snapshot.generation), compile_prefix)
+
+def slice_resume(cvresume, paths):
+    """Keep only the dotted paths (e.g. "sections.education") present in the resume; None keeps everything."""
+    if paths is None or not isinstance(cvresume, dict):
+        return cvresume
+    sliced = {}
+    for path in paths:
+        keys = path.split(".")
+        node = cvresume
+        for key in keys:
+            if not isinstance(node, dict) or key not in node:
+                break
+            node = node[key]
+        else:
+            target = sliced
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = node
+    return sliced
+
+def _placeholder_block(section_name: str, targetrole: str) -> str:
+    return (
+        "Placeholders :\n"
+        f"<section_name> = {section_name}\n"
+        f"<targetrole> = {targetrole}\n\n"
+    )
 
 class PromptBuilder(Helper):
     def __init__(self, section, criteria, targetrole, cvresume, include_fewshot: bool = True, output_lang = "en"):
@@ -13,8 +123,13 @@ class PromptBuilder(Helper):
         self.include_fewshot = include_fewshot
         self.output_lang    = output_lang
         
-        self.config = self.load_yaml("src/config/prompt.yaml")
+        self.snapshot = registry.snapshot("prompt")
+        self.config   = self.snapshot.data
         self.criteria_cfg = self.config.get("criteria", {})
+        self.rubric_in_prefix = rubric_in_prefix(self.snapshot, include_fewshot)
+        # Only the resume fields this section is scored on go into the prompt (prompt.yaml -> resume_fields),
+        # the whole resume when it has none of them (another resume shape) rather than nothing
+        self.resume_slice = slice_resume(cvresume, self.config.get("resume_fields", {}).get(section)) or cvresume
 
     def build_response_template(self):
         return {
@@ -23,47 +138,145 @@ class PromptBuilder(Helper):
                 c: {"score": 0, "feedback": ""} for c in self.criteria
             }
         }
+
+    def build_response_schema(self) -> dict:
+        key = ("schema", self.section, tuple(self.criteria), self.snapshot.generation)
+        return _memo_template(key, lambda: response_schema(self.build_response_template()))
+
+    def subset(self, criteria):
+        """Builder for some of this section's criteria only, used to re-ask for missing / invalid ones."""
+        keep = [c for c in self.criteria if c in criteria]
+        return PromptBuilder(
+            self.section, keep[::-1], self.targetrole, self.cvresume, self.include_fewshot, self.output_lang
+        )
     
     def _build_criteria_block(self) -> str:
-        blocks = []
-        for crit in self.criteria:
-            block = f"- {crit}\n"
-            if self.include_fewshot and crit in self.criteria_cfg:
-                few_cfg = self.criteria_cfg[crit]
-                for score in [5, 3, 1]:
-                    key = f"score{score}"
-                    if key in few_cfg:
-                        text = few_cfg[key].strip()
-                        block += f"    score {score}: {text}\n"
-            blocks.append(block)
-        return "".join(blocks)
-    
-    def build(self):
-        config_role      = self.config['role']['role1']
-        config_objective = self.config['objective']['objective1']
-        config_section   = self.config['section']['section1']
+        # Names only when the rubric text lives in the (context cached) static prefix
+        if self.rubric_in_prefix:
+            return _criteria_names(self.criteria)
+        return _rubric_block(self.criteria_cfg, self.criteria, self.include_fewshot)
+
+    def build_static_prefix(self) -> str:
+        return build_static_prefix(self.snapshot, self.include_fewshot, self.rubric_in_prefix)
+
+    def _compile_head(self) -> str:
         config_expected  = self.config['expected_content'][self.section]
-        config_scale     = self.config['scale']['score1']
-        criteria_block   = self._build_criteria_block()
         config_lang      = self.config['Language_output_style'][self.output_lang]
 
-        prompt_role      = f"Role :\n{config_role}\n\n"
-        prompt_objective = f"Objectvie :\n{config_objective}\n"
+        prompt_vars      = _placeholder_block(self.section, self.targetrole)
         promnt_lang      = f"Output Language Instruction::\n{config_lang}\n"
-        prompt_section   = f"Section :\n{config_section}\n\n"
         prompt_expected  = f"Expected :\n{config_expected}\n"
-        prompt_criteria  = f"Criteria :\n{criteria_block}\n"
-        prompt_scale     = f"Scale :\n{config_scale}\n"
+        prompt_criteria  = f"Criteria :\n{self._build_criteria_block()}\n"
         prompt_output    = f"Otput :\n{json.dumps(self.build_response_template(), indent=2)}\n\n"
-        prompt_cvresume  = f"CV/Resume: \n{self.cvresume}\n"
-        prompt = (
-            prompt_role + prompt_objective + prompt_section + promnt_lang
-            + prompt_expected + prompt_criteria + prompt_scale
-            + prompt_output + prompt_cvresume
+        return prompt_vars + promnt_lang + prompt_expected + prompt_criteria + prompt_output
+
+    def build_head(self) -> str:
+        key = (
+            "section", self.section, tuple(self.criteria), self.targetrole,
+            self.output_lang, self.rubric_in_prefix, self.snapshot.generation
         )
-        prompt = prompt.replace("<section_name>", self.section)
-        prompt = prompt.replace("<targetrole>", self.targetrole)
-        return prompt
+        return _memo_template(key, self._compile_head)
+
+    def build(self):
+        # Static prefix first (cacheable across sections), then everything request specific
+        with observe_stage("prompt_build", self.section):
+            return PromptText(
+                self.build_static_prefix(),
+                self.build_head() + f"CV/Resume: \n{serialize_resume(self.resume_slice, self.config.get('resume_format', 'text'))}\n",
+                section  = self.section,
+                criteria = list(self.criteria),
+                builder  = self,
+                response_schema = self.build_response_schema(),
+            )
+
+
+class FusedPromptBuilder(Helper):
+    """Build one prompt that scores several sections in a single LLM call."""
+    def __init__(self, sections, targetrole, cvresume, include_fewshot: bool = True, output_lang = "en"):
+        # sections : list of (section, criteria) pairs, answer order follows this list
+        self.builders = [
+            PromptBuilder(section, criteria, targetrole, cvresume, include_fewshot, output_lang)
+            for section, criteria in sections
+        ]
+        self.sections    = [b.section for b in self.builders]
+        self.cvresume    = cvresume
+        self.targetrole  = targetrole
+        self.include_fewshot = include_fewshot
+        self.output_lang = output_lang
+
+        self.snapshot = registry.snapshot("prompt")
+        self.config   = self.snapshot.data
+        self.rubric_in_prefix = rubric_in_prefix(self.snapshot, include_fewshot)
+        # Union of the per-section fields, the resume is sent once for all sections
+        resume_fields = self.config.get("resume_fields", {})
+        if all(section in resume_fields for section in self.sections):
+            paths = list(dict.fromkeys(p for section in self.sections for p in resume_fields[section]))
+        else:
+            paths = None
+        self.resume_slice = slice_resume(cvresume, paths) or cvresume
+
+    def build_response_template(self):
+        return {
+            "sections": [b.build_response_template() for b in self.builders]
+        }
+
+    def build_response_schema(self) -> dict:
+        key = (
+            "schema", tuple((b.section, tuple(b.criteria)) for b in self.builders), self.snapshot.generation
+        )
+        return _memo_template(key, lambda: response_schema(self.build_response_template()))
+
+    def _build_sections_block(self) -> str:
+        blocks = []
+        for b in self.builders:
+            config_expected = self.config['expected_content'][b.section]
+            blocks.append(
+                f"### {b.section}\n"
+                f"Expected :\n{config_expected}\n"
+                f"Criteria :\n{_criteria_names(b.criteria)}\n"
+            )
+        return "".join(blocks)
+
+    def _build_rubric_block(self) -> str:
+        # The rubric of every criterion scored in any section, once, when it is not in the static prefix
+        if self.rubric_in_prefix:
+            return ""
+        criteria = dict.fromkeys(crit for b in self.builders for crit in b.criteria)
+        return f"Criteria rubric :\n{_rubric_block(self.config.get('criteria', {}), criteria, self.include_fewshot)}\n"
+
+    def build_static_prefix(self) -> str:
+        return build_static_prefix(self.snapshot, self.include_fewshot, self.rubric_in_prefix)
+
+    def _compile_head(self) -> str:
+        config_lang      = self.config['Language_output_style'][self.output_lang]
+
+        prompt_vars      = _placeholder_block(", ".join(self.sections), self.targetrole)
+        prompt_fused     = (
+            "Score every section below independently and return one entry per section "
+            "in the output JSON, in the same order.\n\n"
+        )
+        promnt_lang      = f"Output Language Instruction::\n{config_lang}\n"
+        prompt_rubric    = self._build_rubric_block()
+        prompt_sections  = f"Sections :\n{self._build_sections_block()}"
+        prompt_output    = f"Otput :\n{json.dumps(self.build_response_template(), indent=2)}\n\n"
+        return prompt_vars + prompt_fused + promnt_lang + prompt_rubric + prompt_sections + prompt_output
+
+    def build_head(self) -> str:
+        key = (
+            "fused", tuple((b.section, tuple(b.criteria)) for b in self.builders),
+            self.targetrole, self.output_lang, self.rubric_in_prefix, self.snapshot.generation
+        )
+        return _memo_template(key, self._compile_head)
+
+    def build(self):
+        with observe_stage("prompt_build", "fused"):
+            return PromptText(
+                self.build_static_prefix(),
+                self.build_head() + f"CV/Resume: \n{serialize_resume(self.resume_slice, self.config.get('resume_format', 'text'))}\n",
+                sections = list(self.sections),
+                builders = self.builders,
+                response_schema = self.build_response_schema(),
+            )
 
 
 # class PromptBuilder(Helper):
@@ -1,4 +1,6 @@
 from core.helper import Helper
+from core.configregistry import registry
+from core.responsecache import get_response_cache
 
 def deep_merge(oldconfig: dict, newpayload: dict):
     for key, value in newpayload.items():
@@ -14,4 +16,7 @@ def update_prompt(payload):
     updated     = deep_merge(config,payload)
     updated     = Helper.deep_literal_transform(updated)
     Helper.save_yaml(updated, config_path)
+    registry.invalidate("prompt")
+    # Cached answers were produced by the old prompts
+    get_response_cache().clear()
     return updated
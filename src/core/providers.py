@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+from time import sleep
+from types import SimpleNamespace
+from core.helper import Helper
+
+# A provider is anything shaped like google.genai.Client for the parts LlmCaller uses:
+#   provider.models.generate_content(model=..., contents=..., config=None) -> .text, .usage_metadata
+#   provider.caches.create(model=..., config=CreateCachedContentConfig) -> .name
+#   provider.models.get(model=...) -> .name, model metadata (no tokens), used by the startup warmup
+#   provider.aio.models.generate_content(...) / .get(...), awaitable, used by AsyncLlmCaller
+# Select it with model.yaml -> model.provider (or the LLM_PROVIDER environment variable).
+
+class GoogleProvider:
+    """Gemini through the google-genai SDK."""
+    def __init__(self, model_cfg: dict):
+        from google import genai
+        self.client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+        self.models = self.client.models
+        self.caches = self.client.caches
+        self.aio    = self.client.aio
+
+
+class SimulatedAPIError(Exception):
+    """Raised by the simulated provider, carries .code like google.genai.errors.APIError."""
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+# Response template that PromptBuilder / FusedPromptBuilder put after "Otput :"
+_TEMPLATE = re.compile(r"Otput :\n(\{.*?\n\})\n", re.S)
+
+class _SimulatedModels(Helper):
+    def __init__(self, cfg: dict, caches):
+        self.cfg     = cfg
+        self.caches  = caches
+        self.latency = cfg.get("latency", {})
+        self._random = random.Random(cfg.get("seed"))
+        self._lock   = threading.Lock()
+
+    def _draw(self, fn):
+        with self._lock:
+            return fn(self._random)
+
+    def _latency(self) -> float:
+        kind = self.latency.get("distribution", "lognormal")
+        if kind == "fixed":
+            seconds = self.latency.get("seconds", 1.0)
+        elif kind == "uniform":
+            seconds = self._draw(lambda r: r.uniform(self.latency.get("min_seconds", 0.5), self.latency.get("max_seconds", 3.0)))
+        else:
+            # lognormal : median_seconds is the p50, sigma sets how heavy the tail is
+            median = self.latency.get("median_seconds", 2.0)
+            sigma  = self.latency.get("sigma", 0.4)
+            seconds = self._draw(lambda r: r.lognormvariate(math.log(median), sigma))
+        return min(max(seconds, self.latency.get("min_seconds", 0.0)), self.latency.get("max_seconds", 60.0))
+
+    def _answer(self, contents: str) -> dict:
+        match = _TEMPLATE.search(contents)
+        if match is None:
+            return {"status": "connected"}              # health check and other free-form prompts
+        template = json.loads(match.group(1))
+        # Same prompt -> same scores, so cached and uncached runs stay comparable
+        rng = random.Random(hashlib.sha256(contents.encode("utf-8")).hexdigest())
+        def fill(section):
+            section["scores"] = {
+                criterion: {"score": rng.randint(1, 5), "feedback": f"Simulated feedback for {criterion}."}
+                for criterion in section["scores"]
+            }
+            return section
+        if "sections" in template:
+            template["sections"] = [fill(section) for section in template["sections"]]
+            return template
+        return fill(template)
+
+    def _wait(self, config) -> tuple:
+        """(seconds the call takes, timeout in ms when it ends by timing out instead of answering)"""
+        latency = self._latency()
+        # http_options.timeout (milliseconds) ends a slow call like the SDK's HTTP client does
+        timeout = getattr(getattr(config, "http_options", None), "timeout", None)
+        if timeout is not None and latency > timeout / 1000:
+            return timeout / 1000, timeout
+        return latency, None
+
+    def generate_content(self, model: str, contents, config=None):
+        seconds, timed_out = self._wait(config)
+        sleep(seconds)
+        return self._respond(contents, config, timed_out)
+
+    def get(self, model: str, config=None):
+        return SimpleNamespace(name=f"models/{model}")
+
+    def _respond(self, contents, config, timed_out):
+        if timed_out is not None:
+            raise TimeoutError(f"generate_content timed out after {timed_out} ms (simulated)")
+        contents = contents if isinstance(contents, str) else "\n".join(map(str, contents))
+        roll = self._draw(lambda r: r.random())
+        if roll < self.cfg.get("rate_limit_rate", 0.0):
+            raise SimulatedAPIError(429, "RESOURCE_EXHAUSTED (simulated)")
+        if roll < self.cfg.get("rate_limit_rate", 0.0) + self.cfg.get("error_rate", 0.0):
+            raise SimulatedAPIError(503, "UNAVAILABLE (simulated)")
+        text = json.dumps(self._answer(contents), ensure_ascii=False)
+        if self._draw(lambda r: r.random()) < self.cfg.get("malformed_rate", 0.0):
+            text = text[: len(text) // 2]              # truncated answer, exercises the parse failure path
+        cached = self.caches.tokens(getattr(config, "cached_content", None))
+        if getattr(config, "response_mime_type", None) != "application/json":
+            text = f"```json\n{text}\n```"           # free-form answers come fenced, like Gemini's
+        return SimpleNamespace(
+            text = text,
+            usage_metadata = SimpleNamespace(
+                prompt_token_count         = self.estimate_tokens(contents) + cached,
+                cached_content_token_count = cached,
+                candidates_token_count     = self.estimate_tokens(text),
+                thoughts_token_count       = int(self.cfg.get("thinking_tokens", 0)),
+            ),
+        )
+
+
+class _AsyncSimulatedModels:
+    """client.aio.models of the simulated provider : the same answers, the latency is awaited."""
+    def __init__(self, models: _SimulatedModels):
+        self.models = models
+
+    async def generate_content(self, model: str, contents, config=None):
+        seconds, timed_out = self.models._wait(config)
+        await asyncio.sleep(seconds)
+        return self.models._respond(contents, config, timed_out)
+
+    async def get(self, model: str, config=None):
+        return self.models.get(model, config)
+
+
+class _SimulatedCaches(Helper):
+    def __init__(self):
+        self._tokens = {}     # cache name -> token count of the cached contents
+        self._lock   = threading.Lock()
+
+    def create(self, model: str, config):
+        text = "\n".join(map(str, config.contents))
+        with self._lock:
+            name = f"cachedContents/simulated-{len(self._tokens)}"
+            self._tokens[name] = self.estimate_tokens(text)
+        return SimpleNamespace(name=name, model=model)
+
+    def tokens(self, name) -> int:
+        if name is None:
+            return 0
+        with self._lock:
+            if name not in self._tokens:
+                raise SimulatedAPIError(404, f"{name} not found (simulated)")
+            return self._tokens[name]
+
+
+class SimulatedProvider:
+    """
+    Offline stand-in for Gemini (model.yaml -> simulated): answers every PromptBuilder prompt with
+    schema-valid section JSON after a sampled latency, with configurable error, 429 and malformed-answer
+    rates and token counts from Helper.estimate_tokens.
+    """
+    def __init__(self, model_cfg: dict):
+        self.cfg    = model_cfg.get("simulated", {})
+        self.caches = _SimulatedCaches()
+        self.models = _SimulatedModels(self.cfg, self.caches)
+        self.aio    = SimpleNamespace(models=_AsyncSimulatedModels(self.models))
+
+
+PROVIDERS = {
+    "google": GoogleProvider,
+    "simulated": SimulatedProvider,
+}
+
+def create_provider(model_cfg: dict):
+    name = os.getenv("LLM_PROVIDER") or model_cfg["model"].get("provider", "google")
+    if name not in PROVIDERS:
+        raise ValueError(f"unknown LLM provider {name!r}, expected one of {sorted(PROVIDERS)}")
+    return PROVIDERS[name](model_cfg)
@@ -0,0 +1,208 @@
+import asyncio
+import threading
+from time import monotonic
+from core.helper import Helper
+from core.configregistry import get_config
+from core.metrics import RATELIMIT_CONCURRENCY, RATELIMIT_INFLIGHT, RATELIMIT_AVAILABLE, RATELIMIT_WAIT
+
+class RateLimitTimeout(Exception):
+    """The call could not be admitted within acquire_timeout_seconds."""
+    code = 429
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate     = rate_per_second
+        self.capacity = capacity
+        self.level    = capacity
+        self.updated  = monotonic()
+
+    def refill(self, now: float):
+        self.level   = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+
+class RateLimiter(Helper):
+    """
+    Process-wide admission control for LLM calls.
+    - requests / tokens buckets refilled at the configured RPM / TPM, bursting up to burst_seconds worth
+    - AIMD limit on calls in flight: +1 after `limit` successful calls in a row, x decrease_factor on a 429
+      (at most once per decrease_cooldown_seconds, so one burst of 429s counts once)
+    Token reservations are estimates; settle() corrects the bucket with the real usage afterwards.
+    """
+    def __init__(self, enabled: bool = True, rpm: float = 1000, tpm: float = 1_000_000, burst_seconds: float = 10,
+                 initial_concurrency: int = 16, min_concurrency: int = 1, max_concurrency: int = 64,
+                 decrease_factor: float = 0.5, decrease_cooldown_seconds: float = 2.0,
+                 acquire_timeout_seconds: float = 60):
+        self.enabled         = enabled
+        self.requests        = TokenBucket(rpm / 60, max(1.0, rpm / 60 * burst_seconds))
+        self.tokens          = TokenBucket(tpm / 60, max(1.0, tpm / 60 * burst_seconds))
+        self.limit           = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown_seconds = decrease_cooldown_seconds
+        self.acquire_timeout_seconds   = acquire_timeout_seconds
+        self.inflight        = 0
+        self._successes      = 0
+        self._last_decrease  = float("-inf")
+        self._cond           = threading.Condition()
+        self._async_waiters  = []          # (loop, future) of coroutines waiting in acquire_async, oldest first
+
+    @classmethod
+    def from_config(cls):
+        cfg = get_config("model").get("rate_limit", {})
+        concurrency = cfg.get("concurrency", {})
+        return cls(
+            enabled                   = cfg.get("enabled", True),
+            rpm                       = cfg.get("rpm", 1000),
+            tpm                       = cfg.get("tpm", 1_000_000),
+            burst_seconds             = cfg.get("burst_seconds", 10),
+            initial_concurrency       = concurrency.get("initial", 16),
+            min_concurrency           = concurrency.get("min", 1),
+            max_concurrency           = concurrency.get("max", 64),
+            decrease_factor           = concurrency.get("decrease_factor", 0.5),
+            decrease_cooldown_seconds = concurrency.get("decrease_cooldown_seconds", 2.0),
+            acquire_timeout_seconds   = cfg.get("acquire_timeout_seconds", 60),
+        )
+
+    def _admit(self, tokens: float, start: float, now: float):
+        """Under self._cond : take a slot and return 0, or the seconds to wait (None : wait for a release)."""
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        if self.inflight >= self.limit:
+            return None
+        wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+        if wait == 0:
+            self.requests.level -= 1
+            self.tokens.level   -= tokens
+            self.inflight       += 1
+            RATELIMIT_WAIT.observe(now - start)
+        return wait
+
+    def acquire(self, tokens: float, timeout: float | None = None) -> float:
+        """
+        Block until one call of about `tokens` tokens may start, return the seconds waited.
+        timeout : wait at most this long (a request deadline), acquire_timeout_seconds when shorter.
+        """
+        if not self.enabled:
+            return 0.0
+        tokens   = min(tokens, self.tokens.capacity)       # a huge prompt must still get through eventually
+        start    = monotonic()
+        limit    = self.acquire_timeout_seconds if timeout is None else min(timeout, self.acquire_timeout_seconds)
+        deadline = start + limit
+        with self._cond:
+            while True:
+                now  = monotonic()
+                wait = self._admit(tokens, start, now)
+                if wait == 0:
+                    return now - start
+                if now >= deadline:
+                    raise RateLimitTimeout(f"LLM call not admitted within {limit:.3g}s")
+                self._cond.wait(min(wait if wait is not None else deadline - now, deadline - now))
+
+    async def acquire_async(self, tokens: float, timeout: float | None = None) -> float:
+        """acquire() for coroutines : waits on the event loop instead of a thread, in the same slots and buckets."""
+        if not self.enabled:
+            return 0.0
+        tokens   = min(tokens, self.tokens.capacity)
+        start    = monotonic()
+        limit    = self.acquire_timeout_seconds if timeout is None else min(timeout, self.acquire_timeout_seconds)
+        deadline = start + limit
+        loop     = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                now  = monotonic()
+                wait = self._admit(tokens, start, now)
+                if wait == 0:
+                    return now - start
+                if now >= deadline:
+                    raise RateLimitTimeout(f"LLM call not admitted within {limit:.3g}s")
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter[1], min(wait if wait is not None else deadline - now, deadline - now))
+            except TimeoutError:
+                pass
+            finally:
+                with self._cond:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+
+    def _wake_async(self):
+        # Under self._cond : wake as many waiting coroutines as there are free slots, oldest first
+        free = self.limit - self.inflight
+        while free > 0 and self._async_waiters:
+            loop, future = self._async_waiters.pop(0)
+            loop.call_soon_threadsafe(_wake, future)
+            free -= 1
+
+    def release(self, outcome: str):
+        """outcome : ok | rate_limited | error"""
+        if not self.enabled:
+            return
+        with self._cond:
+            self.inflight -= 1
+            if outcome == "rate_limited":
+                now = monotonic()
+                if now - self._last_decrease >= self.decrease_cooldown_seconds:
+                    self.limit = max(self.min_concurrency, int(self.limit * self.decrease_factor))
+                    self._last_decrease = now
+                self._successes = 0
+            elif outcome == "ok":
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self.limit = min(self.max_concurrency, self.limit + 1)
+                    self._successes = 0
+            self._cond.notify_all()
+            self._wake_async()
+
+    def settle(self, reserved: float, actual: float):
+        """Charge (or refund) the difference between the reserved and the real token count."""
+        if not self.enabled:
+            return
+        with self._cond:
+            self.tokens.level -= actual - min(reserved, self.tokens.capacity)
+            self._cond.notify_all()
+            self._wake_async()
+
+    def available(self, bucket: str) -> float:
+        with self._cond:
+            target = self.requests if bucket == "requests" else self.tokens
+            target.refill(monotonic())
+            return target.level
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "concurrency_limit": self.limit,
+                "inflight": self.inflight,
+                "requests_available": round(self.requests.level, 2),
+                "tokens_available": round(self.tokens.level, 1),
+            }
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+_default_limiter = None
+_default_lock    = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter shared by every LlmCaller (the Gemini quota is per project, not per caller)."""
+    global _default_limiter
+    if _default_limiter is None:
+        with _default_lock:
+            if _default_limiter is None:
+                limiter = RateLimiter.from_config()
+                RATELIMIT_CONCURRENCY.set_function(lambda: limiter.limit)
+                RATELIMIT_INFLIGHT.set_function(lambda: limiter.inflight)
+                RATELIMIT_AVAILABLE.labels("requests").set_function(lambda: limiter.available("requests"))
+                RATELIMIT_AVAILABLE.labels("tokens").set_function(lambda: limiter.available("tokens"))
+                _default_limiter = limiter
+    return _default_limiter
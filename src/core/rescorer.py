@@ -0,0 +1,87 @@
+"""
+Weight-only rescoring of stored composite evaluations, without any LLM call.
+
+The raw 0-5 criterion scores of every stored resume (SectionStore) are rescored with the weights of
+a weight.yaml file by the AggregationEngine, in one NumPy pass.
+
+Run from the repo root:
+    PYTHONPATH=src python -m core.rescorer [--weights new_weight.yaml] [--resume-id ID ...] [--persist]
+"""
+import argparse
+import json
+import sys
+from core.helper import Helper
+from core.configregistry import get_config, thaw
+from core.pipeline import COMPOSITE_SECTIONS
+from core.aggregationengine import AggregationEngine, CompiledWeights, compiled_weights
+from core.sectionstore import SectionStore, get_section_store
+
+class Rescorer(Helper):
+    """Stored raw LLM answers -> AggregationEngine, one pass over every stored resume."""
+    def __init__(self, store: SectionStore | None = None, sections: list = COMPOSITE_SECTIONS):
+        self.store    = store or get_section_store()
+        self.sections = [section for section, _ in sections]
+
+    def rescore(self, weights=None, resume_ids: list | None = None, persist: bool = False) -> dict:
+        """
+        Section totals and final scores of the stored resumes under `weights` (weight.yaml by default).
+        persist=True writes the new SectionScoreAggregator outputs back to the store.
+        """
+        stored  = self.store.load_many(resume_ids, section_outputs=False)
+        ids     = list(stored)
+        engine  = AggregationEngine(compiled_weights() if weights is None else CompiledWeights(weights))
+        batch   = [
+            [stored[resume_id][section]["llm_output"] for section in self.sections if section in stored[resume_id]]
+            for resume_id in ids
+        ]
+        missing = [[section for section in self.sections if section not in stored[resume_id]] for resume_id in ids]
+        results = engine.aggregate_composites(batch, missing)
+        if persist:
+            weights = weights if weights is not None else get_config("weight")["weights"]
+            fingerprints = {section: SectionStore.weights_fingerprint(section, weights) for section in self.sections}
+            self.store.save_many({
+                resume_id: {
+                    section.section: {
+                        **stored[resume_id][section.section],
+                        "weights_fingerprint": fingerprints[section.section],
+                        "section_output": section.to_dict(),
+                    }
+                    for section in result.sections
+                }
+                for resume_id, result in zip(ids, results)
+            })
+        return {
+            "count": len(ids),
+            "results": [
+                {
+                    "resume_id": resume_id,
+                    "final_resume_score": Helper.fop(result.final_score) if result.final_score is not None else None,
+                    "section_totals": {section.section: section.total_score for section in result.sections},
+                    "missing_sections": result.missing_sections,
+                }
+                for resume_id, result in zip(ids, results)
+            ],
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rescore stored evaluations with new weights, no LLM calls.")
+    parser.add_argument("--weights", help="weight.yaml-style file (default: src/config/weight.yaml)")
+    parser.add_argument("--resume-id", action="append", dest="resume_ids", help="only this resume (repeatable)")
+    parser.add_argument("--persist", action="store_true",
+                        help="store the new section results (only with the weight.yaml weights)")
+    parser.add_argument("--output", help="write the full result as JSON to this file")
+    args = parser.parse_args()
+    if args.persist and args.weights:
+        parser.error("--persist only applies the weights of src/config/weight.yaml")
+
+    weight_config = Helper.load_yaml(args.weights) if args.weights else thaw(get_config("weight"))
+    result = Rescorer().rescore(weight_config["weights"], args.resume_ids, args.persist)
+    result["weights_version"] = weight_config.get("version", "unknown")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    else:
+        for item in result["results"]:
+            print(f"{item['resume_id']:<40} {item['final_resume_score']:>6}")
+    print(f"rescored {result['count']} resumes with {result['weights_version']}", file=sys.stderr)
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from time import time
+from core.helper import Helper
+from core.configregistry import get_config
+
+class ResponseCache(Helper):
+    """Two-tier cache for parsed LLM answers: bounded in-memory LRU in front of a SQLite file."""
+    def __init__(self, enabled: bool = True, memory_max_entries: int = 512, ttl_seconds: float = 86400,
+                 sqlite_path: str | None = None, sqlite_max_entries: int = 20000):
+        self.enabled            = enabled
+        self.memory_max_entries = memory_max_entries
+        self.ttl_seconds        = ttl_seconds
+        self.sqlite_max_entries = sqlite_max_entries
+        self._memory  = OrderedDict()     # key -> (stored_at, json text), oldest first
+        self._lock    = threading.Lock()    # memory tier and counters, never held across a SQLite call
+        self._db_lock = threading.Lock()
+        self._inserts = 0
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self.sqlite_path = sqlite_path if enabled and sqlite_path else None
+        self._db = None                   # opened on first use, see _conn
+
+    def _conn(self) -> sqlite3.Connection:
+        """The SQLite tier, created and purged of expired rows on first use. Call with _db_lock held."""
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.sqlite_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            db.execute("DELETE FROM responses WHERE stored_at < ?", (time() - self.ttl_seconds,))
+            db.commit()
+            self._db = db
+        return self._db
+
+    @classmethod
+    def from_config(cls):
+        cfg = get_config("global").get("cache", {})
+        return cls(
+            enabled            = cfg.get("enabled", True),
+            memory_max_entries = cfg.get("memory_max_entries", 512),
+            ttl_seconds        = cfg.get("ttl_seconds", 86400),
+            sqlite_path        = cfg.get("sqlite_path"),
+            sqlite_max_entries = cfg.get("sqlite_max_entries", 20000),
+        )
+
+    @staticmethod
+    def make_key(prompt: str, model: str, prompt_version: str, weight_version: str) -> str:
+        h = hashlib.sha256()
+        for part in (model, prompt_version, weight_version, prompt):
+            h.update(str(part).encode("utf-8"))
+            h.update(b"\x00")
+        return h.hexdigest()
+
+    def get(self, key: str):
+        """Return (value, status) where status is hit_memory, hit_disk, miss or disabled."""
+        value, status = self.get_memory(key)
+        if status is None:
+            return self.get_disk(key)
+        return value, status
+
+    def get_memory(self, key: str):
+        """get without touching SQLite : status None when the answer can only be on disk (see get_disk)."""
+        if not self.enabled:
+            return None, "disabled"
+        now = time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, text = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return json.loads(text), "hit_memory"
+                del self._memory[key]
+            if self.sqlite_path is None:
+                self.counters["misses"] += 1
+                return None, "miss"
+        return None, None
+
+    def get_disk(self, key: str):
+        """The SQLite half of get, one indexed read (blocking, call it off the event loop)."""
+        now = time()
+        with self._db_lock:
+            db  = self._conn()
+            row = db.execute("SELECT value, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                db.commit()
+                row = None
+        with self._lock:
+            if row is None:
+                self.counters["misses"] += 1
+                return None, "miss"
+            text, stored_at = row
+            self._remember(key, stored_at, text)
+            self.counters["disk_hits"] += 1
+        return json.loads(text), "hit_disk"
+
+    def set(self, key: str, value):
+        if not self.enabled:
+            return
+        text = json.dumps(value, ensure_ascii=False)
+        now  = time()
+        with self._lock:
+            self._remember(key, now, text)
+        if self.sqlite_path is not None:
+            with self._db_lock:
+                db = self._conn()
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, text, now)
+                )
+                self._inserts += 1
+                # Evict the oldest rows in batches rather than counting on every insert
+                if self._inserts % 100 == 0:
+                    db.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                        (self.sqlite_max_entries,)
+                    )
+                db.commit()
+
+    def _remember(self, key: str, stored_at: float, text: str):
+        self._memory[key] = (stored_at, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.sqlite_path is not None:
+            with self._db_lock:
+                db = self._conn()
+                db.execute("DELETE FROM responses")
+                db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "memory_entries": len(self._memory),
+                "enabled": self.enabled,
+            }
+
+
+_default_cache = None
+_default_lock  = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide cache shared by every LlmCaller and the config update functions."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache.from_config()
+    return _default_cache
@@ -0,0 +1,109 @@
+import json
+import re
+
+# prompt.yaml -> scale is 0-5, SectionScoreAggregator divides by 5
+SCORE_MIN = 0
+SCORE_MAX = 5
+
+_CRITERION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "score": {"type": "INTEGER", "minimum": SCORE_MIN, "maximum": SCORE_MAX},
+        "feedback": {"type": "STRING"},
+    },
+    "required": ["score", "feedback"],
+    "propertyOrdering": ["score", "feedback"],
+}
+
+def _section_schema(section: str, criteria: list) -> dict:
+    return {
+        "type": "OBJECT",
+        "properties": {
+            "section": {"type": "STRING", "enum": [section]},
+            "scores": {
+                "type": "OBJECT",
+                "properties": {criterion: _CRITERION_SCHEMA for criterion in criteria},
+                "required": list(criteria),
+                "propertyOrdering": list(criteria),
+            },
+        },
+        "required": ["section", "scores"],
+        "propertyOrdering": ["section", "scores"],
+    }
+
+def response_schema(template: dict) -> dict:
+    """Gemini response_schema (OpenAPI subset) for a PromptBuilder / FusedPromptBuilder response template."""
+    if "sections" in template:
+        items = [_section_schema(t["section"], list(t["scores"])) for t in template["sections"]]
+        return {
+            "type": "OBJECT",
+            "properties": {
+                "sections": {
+                    "type": "ARRAY",
+                    "items": {"anyOf": items},
+                    "minItems": len(items),
+                    "maxItems": len(items),
+                },
+            },
+            "required": ["sections"],
+        }
+    return _section_schema(template["section"], list(template["scores"]))
+
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+def parse_json(text: str):
+    """json.loads on the raw text first (structured output), then without ``` fences, then the outer {...}."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    stripped = _FENCE.sub("", text)
+    try:
+        return json.loads(stripped)
+    except ValueError:
+        start, end = stripped.find("{"), stripped.rfind("}")
+        if 0 <= start < end:
+            return json.loads(stripped[start:end + 1])
+        raise
+
+def salvage_scores(text: str, criteria: list) -> dict:
+    """Criteria that can still be read from a truncated or otherwise broken answer."""
+    scores = {}
+    for criterion in criteria:
+        match = re.search(r'"%s"\s*:\s*(\{[^{}]*\})' % re.escape(criterion), text)
+        if match is None:
+            continue
+        try:
+            scores[criterion] = json.loads(match.group(1))
+        except ValueError:
+            pass
+    return scores
+
+def _valid_criterion(body) -> dict | None:
+    if not isinstance(body, dict) or not isinstance(body.get("feedback"), str):
+        return None
+    score = body.get("score")
+    if isinstance(score, str):
+        try:
+            score = float(score)
+        except ValueError:
+            return None
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not SCORE_MIN <= score <= SCORE_MAX:
+        return None
+    if isinstance(score, float) and score.is_integer():
+        score = int(score)
+    return {**body, "score": score}
+
+def check_section(output, section: str, criteria: list) -> tuple:
+    """
+    (answer keeping only valid criteria, criteria that are missing or invalid).
+    The answer always carries the expected section name and its scores follow the criteria order.
+    """
+    scores = output.get("scores") if isinstance(output, dict) else None
+    scores = scores if isinstance(scores, dict) else {}
+    valid  = {}
+    for criterion in criteria:
+        body = _valid_criterion(scores.get(criterion))
+        if body is not None:
+            valid[criterion] = body
+    return {"section": section, "scores": valid}, [c for c in criteria if c not in valid]
@@ -0,0 +1,71 @@
+import json
+import re
+
+# Values that carry no scoring signal : blanks, the "-" placeholder and "No" flags (e.g. has_summary)
+_EMPTY_VALUES = {"", "-", "No"}
+_WHITESPACE   = re.compile(r"\s+")
+_DROP         = object()
+
+def _clean(value):
+    if isinstance(value, dict):
+        cleaned = {}
+        for key in sorted(value, key=str):
+            item = _clean(value[key])
+            if item is not _DROP:
+                cleaned[str(key)] = item
+        return cleaned or _DROP
+    if isinstance(value, (list, tuple)):
+        items = [item for item in map(_clean, value) if item is not _DROP]
+        return items or _DROP
+    if isinstance(value, str):
+        text = _WHITESPACE.sub(" ", value).strip()
+        return _DROP if text in _EMPTY_VALUES else text
+    if value is None:
+        return _DROP
+    return value
+
+def canonicalize(resume):
+    """Drop empty/placeholder fields, collapse whitespace and sort keys, keeping list order."""
+    cleaned = _clean(resume)
+    if cleaned is _DROP:
+        return {} if isinstance(resume, dict) else ""
+    return cleaned
+
+def _is_flat(value) -> bool:
+    return isinstance(value, dict) and not any(isinstance(v, (dict, list)) for v in value.values())
+
+def _to_text(value, indent: str, lines: list):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)):
+                lines.append(f"{indent}{key}:")
+                _to_text(item, indent + "  ", lines)
+            else:
+                lines.append(f"{indent}{key}: {item}")
+    elif isinstance(value, list):
+        for item in value:
+            if _is_flat(item):
+                # e.g. skills : "- level: Advanced | name: Python"
+                lines.append(f"{indent}- " + " | ".join(f"{k}: {v}" for k, v in item.items()))
+            elif isinstance(item, (dict, list)):
+                lines.append(f"{indent}-")
+                _to_text(item, indent + "  ", lines)
+            else:
+                lines.append(f"{indent}- {item}")
+    else:
+        lines.append(f"{indent}{value}")
+
+def serialize_resume(resume, style: str = "text") -> str:
+    """
+    Canonical compact resume for prompts, identical bytes for semantically identical resumes.
+    style="text" : terse indented "key: value" lines, style="json" : minified JSON with sorted keys.
+    Non-dict payloads (e.g. the "resume_json" placeholder) are passed through with whitespace collapsed.
+    """
+    cleaned = canonicalize(resume)
+    if isinstance(cleaned, str):
+        return cleaned
+    if style == "json":
+        return json.dumps(cleaned, ensure_ascii=False, separators=(",", ":"))
+    lines = []
+    _to_text(cleaned, "", lines)
+    return "\n".join(lines)
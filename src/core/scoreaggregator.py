@@ -1,26 +1,28 @@
-import copy
 from core.helper import Helper
+from core.configregistry import get_config
+from core.metrics import observe_stage
 
 class SectionScoreAggregator(Helper):
-    def __init__(self):
-        self.config          = self.load_yaml("src/config/weight.yaml")         # config
+    @property
+    def config(self):
+        return get_config("weight")                    # current weight.yaml snapshot
     def aggregate(self,llm_output:dict):
-        self.llm_output      = llm_output             # op
-        self.section         = llm_output["section"]  # Get section
-        self.section_weights = self.config["weights"][self.section]  # config["weights"][section_key][criteria]
+        with observe_stage("section_aggregate", str(llm_output.get("section", "other"))):
+            return self._aggregate(llm_output)
+    def _aggregate(self,llm_output:dict):
+        # Locals only : one instance is shared by the event loop, the batch path and the job workers
+        section         = llm_output["section"]  # Get section
+        section_weights = self.config["weights"][section]  # config["weights"][section_key][criteria]
         ddict = {}
         total = 0.0
-        # Protect multiple mutation when we run more than one time
-        scores_copy = copy.deepcopy(self.llm_output["scores"])
-        for criteria, body in scores_copy.items():
+        for criteria, body in llm_output["scores"].items():
             raw = body["score"]
-            w   = self.section_weights[criteria]
+            w   = section_weights[criteria]
             weighted = raw / 5 * w
-            body["score"] = weighted
-            ddict[criteria] = body
+            ddict[criteria] = {**body, "score": weighted}     # new dict, the LLM answer is left untouched
             total = total + weighted
         return {
-            "section": self.section,
+            "section": section,
             "total_score":total,
             "scores":ddict
         }
\ No newline at end of file
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from time import time
+from core.helper import Helper
+from core.configregistry import get_config
+
+class SectionStore(Helper):
+    """
+    Last result of every composite section per resume id, in a SQLite file (global.yaml -> incremental).
+    A row keeps the fingerprint of the section input, the raw LLM answer and its SectionScoreAggregator
+    output, so a resubmitted resume only goes back to the LLM for the sections whose input changed.
+    """
+    def __init__(self, enabled: bool = True, sqlite_path: str = ".cache/sections.sqlite3",
+                 ttl_seconds: float = 30 * 86400):
+        self.enabled     = enabled
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = sqlite_path
+        self._lock = threading.Lock()
+        self._db   = None                 # opened on first use, see _conn
+
+    def _conn(self) -> sqlite3.Connection:
+        """The SQLite file, created and purged of expired rows on first use. Call with _lock held."""
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.sqlite_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.sqlite_path, check_same_thread=False, timeout=30)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS sections ("
+                "resume_id TEXT NOT NULL, section TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+                "weights_fingerprint TEXT NOT NULL, llm_output TEXT NOT NULL, section_output TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, PRIMARY KEY (resume_id, section))"
+            )
+            db.execute("DELETE FROM sections WHERE stored_at < ?", (time() - self.ttl_seconds,))
+            db.commit()
+            self._db = db
+        return self._db
+
+    @classmethod
+    def from_config(cls):
+        cfg = get_config("global").get("incremental", {})
+        return cls(
+            enabled     = cfg.get("enabled", True),
+            sqlite_path = cfg.get("sqlite_path", ".cache/sections.sqlite3"),
+            ttl_seconds = cfg.get("ttl_seconds", 30 * 86400),
+        )
+
+    @staticmethod
+    def fingerprint(prompt: str, model: str) -> str:
+        # The section prompt holds the resume slice, criteria, role, language and the whole prompt.yaml text
+        return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def weights_fingerprint(section: str, weights=None) -> str:
+        # weights : a weight.yaml `weights` block, the current weight.yaml by default
+        weights = (weights if weights is not None else get_config("weight")["weights"]).get(section)
+        return hashlib.sha256(json.dumps(weights, sort_keys=True, default=dict).encode("utf-8")).hexdigest()
+
+    def load(self, resume_id: str) -> dict:
+        """section -> stored row of this resume, empty when nothing is stored or the store is off."""
+        return self.load_many([resume_id]).get(resume_id, {})
+
+    def load_many(self, resume_ids: list | None = None, section_outputs: bool = True) -> dict:
+        """
+        resume_id -> section -> stored row, for the given resume ids or every stored resume.
+        section_outputs=False leaves out the stored aggregator outputs (rescoring only needs the raw answers).
+        """
+        if not self.enabled:
+            return {}
+        query = (
+            "SELECT resume_id, section, fingerprint, weights_fingerprint, llm_output, section_output "
+            "FROM sections WHERE stored_at >= ?"
+        )
+        params = [time() - self.ttl_seconds]
+        if resume_ids is not None:
+            query  += f" AND resume_id IN ({', '.join('?' * len(resume_ids))})"
+            params += list(resume_ids)
+        with self._lock:
+            rows = self._conn().execute(query + " ORDER BY resume_id", params).fetchall()
+        stored = {}
+        for resume_id, section, fingerprint, weights_fingerprint, llm_output, section_output in rows:
+            row = stored.setdefault(resume_id, {})[section] = {
+                "fingerprint": fingerprint,
+                "weights_fingerprint": weights_fingerprint,
+                "llm_output": json.loads(llm_output),
+            }
+            if section_outputs:
+                row["section_output"] = json.loads(section_output)
+        return stored
+
+    def save(self, resume_id: str, rows: dict):
+        """rows : section -> {fingerprint, weights_fingerprint, llm_output, section_output}"""
+        self.save_many({resume_id: rows})
+
+    def save_many(self, rows_by_resume: dict):
+        if not self.enabled or not rows_by_resume:
+            return
+        now = time()
+        with self._lock:
+            db = self._conn()
+            db.executemany(
+                "INSERT OR REPLACE INTO sections (resume_id, section, fingerprint, weights_fingerprint, "
+                "llm_output, section_output, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (resume_id, section, row["fingerprint"], row["weights_fingerprint"],
+                     json.dumps(row["llm_output"], ensure_ascii=False),
+                     json.dumps(row["section_output"], ensure_ascii=False), now)
+                    for resume_id, rows in rows_by_resume.items()
+                    for section, row in rows.items()
+                ]
+            )
+            db.commit()
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            resumes, rows = self._conn().execute(
+                "SELECT COUNT(DISTINCT resume_id), COUNT(*) FROM sections"
+            ).fetchone()
+        return {"enabled": True, "resumes": resumes, "sections": rows}
+
+
+_default_store = None
+_default_lock  = threading.Lock()
+
+def get_section_store() -> SectionStore:
+    global _default_store
+    if _default_store is None:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = SectionStore.from_config()
+    return _default_store
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from core.helper import Helper
+
+class SingleFlight(Helper):
+    """
+    Collapse concurrent calls with the same key into one: the first caller runs fn, callers arriving
+    while it is in flight wait for and share its result (or exception). Nothing is kept afterwards.
+    """
+    def __init__(self):
+        self._lock  = threading.Lock()
+        self._calls = {}      # key -> Future of the call in flight
+
+    def do(self, key, fn, timeout: float | None = None):
+        """
+        Return (result, shared), shared is True when the result came from another caller's call.
+        timeout : longest wait for another caller's call (TimeoutError after it), the own call is not bounded.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(timeout), True
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def inflight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight(Helper):
+    """SingleFlight for coroutines of one event loop, fn is a coroutine function."""
+    def __init__(self):
+        self._calls = {}      # key -> asyncio.Future of the call in flight
+
+    async def do(self, key, fn, timeout: float | None = None):
+        future = self._calls.get(key)
+        if future is not None:
+            # shield : a waiter timing out must not cancel the call the others are waiting for
+            return await asyncio.wait_for(asyncio.shield(future), timeout), True
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except BaseException as e:
+            # A cancelled leader (deadline, client gone) fails its waiters instead of cancelling them
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError("shared LLM call was cancelled"))
+            future.exception()                          # retrieved : no "never retrieved" warning without waiters
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
+
+    def inflight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,116 @@
+import re
+import threading
+from core.helper import Helper
+from core.configregistry import get_config
+
+USAGE_FIELDS = ("input", "output", "thinking", "cached")
+
+def empty_usage() -> dict:
+    return dict.fromkeys(USAGE_FIELDS, 0)
+
+def add_usage(a: dict, b: dict) -> dict:
+    return {field: a[field] + b[field] for field in USAGE_FIELDS}
+
+def extract_usage(resp) -> dict:
+    """Token counts from a Gemini response (usage_metadata), zeros when the SDK did not return any."""
+    meta = getattr(resp, "usage_metadata", None)
+    def count(name):
+        return int(getattr(meta, name, None) or 0)
+    return {
+        "input":    count("prompt_token_count"),            # includes the cached part
+        "output":   count("candidates_token_count"),
+        "thinking": count("thoughts_token_count"),
+        "cached":   count("cached_content_token_count"),
+    }
+
+def pricing_key(model: str) -> str:
+    # "gemini-2.5-flash" -> "gemini_2_5_flash", the key used in global.yaml -> pricing
+    return re.sub(r"[^0-9a-z]+", "_", model.lower()).strip("_")
+
+def compute_cost(usage: dict, model: str) -> float | None:
+    """USD cost from global.yaml -> pricing, None when the model has no pricing entry."""
+    price = get_config("global").get("pricing", {}).get(pricing_key(model))
+    if price is None:
+        return None
+    input_rate    = price["input_per_million"]
+    output_rate   = price["output_per_million"]
+    cached_rate   = price.get("cached_input_per_million", input_rate)
+    thinking_rate = price.get("thinking_per_million", output_rate)     # Gemini bills thinking as output
+    cost = (
+        (usage["input"] - usage["cached"]) * input_rate
+        + usage["cached"] * cached_rate
+        + usage["output"] * output_rate
+        + usage["thinking"] * thinking_rate
+    ) / 1_000_000
+    return round(cost, 8)
+
+def summarize_usage(usage_by_section: dict, model: str) -> dict:
+    """Sum of per-section usages with the cost of the whole request, for GlobalAggregator.fn3."""
+    total = empty_usage()
+    for usage in usage_by_section.values():
+        for field in USAGE_FIELDS:
+            total[field] += usage[field]
+    return {
+        **total,
+        "total": total["input"] + total["output"] + total["thinking"],
+        "cost_usd": compute_cost(total, model),
+        "sections": usage_by_section,
+    }
+
+class UsageTracker(Helper):
+    """
+    Process-wide token and cost counters per (model, section), plus an estimate per criterion.
+    A section call scores all its criteria at once, so its tokens are split evenly over them.
+    """
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self._sections = {}     # (model, section) -> counters
+        self._criteria = {}     # (model, section, criterion) -> counters
+
+    @staticmethod
+    def _new_counters() -> dict:
+        return {"calls": 0, **empty_usage(), "cost_usd": 0.0}
+
+    def record(self, model: str, section: str, criteria: list, usage: dict):
+        cost  = compute_cost(usage, model) or 0.0
+        share = 1 / len(criteria) if criteria else 0
+        with self._lock:
+            counters = self._sections.setdefault((model, section), self._new_counters())
+            counters["calls"] += 1
+            for field in USAGE_FIELDS:
+                counters[field] += usage[field]
+            counters["cost_usd"] += cost
+            for criterion in criteria:
+                counters = self._criteria.setdefault((model, section, criterion), self._new_counters())
+                counters["calls"] += 1
+                for field in USAGE_FIELDS:
+                    counters[field] += usage[field] * share
+                counters["cost_usd"] += cost * share
+
+    def snapshot(self) -> dict:
+        def rows(table, names):
+            return [
+                {
+                    **dict(zip(names, key)),
+                    **{field: round(value, 8) if isinstance(value, float) else value
+                       for field, value in counters.items()},
+                }
+                for key, counters in sorted(table.items())
+            ]
+        with self._lock:
+            by_section   = rows(self._sections, ("model", "section"))
+            by_criterion = rows(self._criteria, ("model", "section", "criterion"))
+        totals = self._new_counters()
+        for row in by_section:
+            for field in totals:
+                totals[field] += row[field]
+        totals["cost_usd"] = round(totals["cost_usd"], 8)
+        return {"totals": totals, "by_section": by_section, "by_criterion": by_criterion}
+
+    def reset(self):
+        with self._lock:
+            self._sections.clear()
+            self._criteria.clear()
+
+
+usage_tracker = UsageTracker()
@@ -0,0 +1,67 @@
+"""
+Startup warmup (model.yaml -> warmup): the one-time work of the first request, done before the API
+takes traffic. Prompt templates and response schemas are compiled, google-genai is imported, the
+client is built, and with `connect` its sync and async HTTP connections are opened and the context
+cache of the static prefix is created.
+"""
+import asyncio
+import logging
+from time import perf_counter
+from core.configregistry import get_config
+from core.pipeline import COMPOSITE_SECTIONS, DEFAULT_TARGET_ROLE, build_section_prompts
+from core.promptbuilder import FusedPromptBuilder
+from core.metrics import WARMUP_SECONDS
+
+logger = logging.getLogger("uvicorn.error")
+
+async def warm_up(acaller) -> dict:
+    """
+    Run the warmup steps in order, return {"seconds": {step: s}, "errors": {step: message}}.
+    A failed step is logged and skipped, the API starts regardless and the request pays for it instead.
+    """
+    cfg     = get_config("model").get("warmup", {})
+    caller  = acaller.caller
+    timeout = cfg.get("timeout_seconds", 15)
+    report  = {"seconds": {}, "errors": {}}
+    if not cfg.get("enabled", True):
+        return report
+    prompts = []
+
+    async def prompt_templates():
+        # Every section and the fused prompt with an empty resume : prefix, heads and schemas get memoized
+        prompts.extend(build_section_prompts({}))
+        prompts.append(FusedPromptBuilder(COMPOSITE_SECTIONS, DEFAULT_TARGET_ROLE, {}).build())
+        for prompt in prompts:
+            caller._generation_config(prompt, None)     # imports google.genai.types
+            caller._context_cache_key(prompt.static_prefix)
+
+    async def client():
+        return caller.client
+
+    async def connections():
+        # Metadata reads, no tokens : leave one open connection in each client's pool
+        await asyncio.gather(
+            asyncio.to_thread(caller.client.models.get, model=caller.model),
+            acaller.client.models.get(model=caller.model),
+        )
+
+    async def context_cache():
+        for prefix in dict.fromkeys(prompt.static_prefix for prompt in prompts):
+            await acaller._context_cache_name(prefix)
+
+    steps = [("prompt_templates", prompt_templates), ("client", client)]
+    if cfg.get("connect", True):
+        steps += [("connections", connections), ("context_cache", context_cache)]
+    for name, step in steps:
+        start = perf_counter()
+        try:
+            await asyncio.wait_for(step(), timeout)
+        except Exception as e:
+            report["errors"][name] = f"{type(e).__name__}: {e}"
+            logger.warning("warmup step %s failed: %s", name, report["errors"][name])
+        seconds = perf_counter() - start
+        report["seconds"][name] = round(seconds, 4)
+        WARMUP_SECONDS.labels(name).set(seconds)
+        if name == "client" and name in report["errors"]:
+            break                                       # no client (API key, provider), nothing to connect
+    return report
@@ -1,4 +1,5 @@
 from core.helper import Helper
+from core.configregistry import registry
 
 def deep_merge(oldconfig:dict,newpayload:dict):
     for key,value in newpayload.items():
@@ -18,6 +19,7 @@ def update_weight(payload):
         newpayload = payload
     )
     Helper.save_yaml(updated,config_path)
+    registry.invalidate("weight")
     return updated
 
 
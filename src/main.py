@@ -1,15 +1,22 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from datetime import datetime, timezone, timedelta
 from typing import Optional,Literal
 
 from core.llmcaller import LlmCaller
+from core.asyncllmcaller import AsyncLlmCaller
+from core.admission import AdmissionControl, Overloaded
+from core.warmup import warm_up
 from core.getmetadata import get_metadata      # 13
 from core.globalupdate import update_global    # 14
 from core.scoreaggregator import SectionScoreAggregator
+from core.usagetracker import compute_cost, summarize_usage, usage_tracker
+from core.metrics import MetricsMiddleware, current_endpoint, render_metrics
 
 from time import time
+import asyncio
 class AnalyseRequest(BaseModel):
     JSON: str | None = None
 
@@ -35,6 +42,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 ### Health & Metadata #######################################################
 ### Health & Metadata.API:01 ################################################
 @app.get("/", tags=["Health & Metadata"],
@@ -55,6 +63,27 @@ def health_fastapi():
 ### Health & Metadata.API:02 ################################################
 caller = LlmCaller()
 agg = SectionScoreAggregator()
+# /evaluation/* handlers are async : they await Gemini through acaller (same cache, limiter and usage
+# as caller) and hold one admission slot each (model.yaml -> backpressure)
+acaller   = AsyncLlmCaller(caller)
+admission = AdmissionControl.from_config()
+
+@app.on_event("startup")
+async def warm_up_llm():
+    # Prompt templates, Gemini client and connections ready before the first request (model.yaml -> warmup)
+    app.state.warmup = await warm_up(acaller)
+
+async def evaluation_slot():
+    async with admission.slot():
+        yield
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code = 503,
+        content     = {"detail": str(exc)},
+        headers     = {"Retry-After": str(max(1, int(exc.retry_after)))}
+    )
 
 @app.get("/health/gemini", tags=["Health & Metadata"],
                 description="Connectivity health check for Gemini LLM service. Verifies API availability and measures round-trip response latency."
@@ -62,7 +91,8 @@ agg = SectionScoreAggregator()
 def health_gemini():
     start_time = time()
     res = caller.call(
-        "Return this as JSON: {'status': 'connected'}"
+        "Return this as JSON: {'status': 'connected'}",
+        use_cache = False
     )
     finish_time   = time()
     process_time = finish_time - start_time
@@ -84,7 +114,7 @@ def metadata():
     finish_time   = time()
     process_time = finish_time - start_time
     return {
-        "message":get_metadata(),
+        "message":res,
         "response_time" : f"{process_time:.5f} s"
         }
 
@@ -100,7 +130,13 @@ from fastapi import Response
 
 ### Debug & Lab.API:04 ######################################################
 from core.helper import Helper
-mock_data = Helper.load_json("src/mock/resume3.json")
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def mock_data():
+    # Debug endpoints only, read on first use instead of at startup
+    return Helper.load_json("src/mock/resume3.json")
+
 @app.get(
     "/evaluation/logexamplepayload",
     tags=["Debug & Lab"],
@@ -108,7 +144,7 @@ mock_data = Helper.load_json("src/mock/resume3.json")
 )
 
 def show_example_of_payload_json_body():
-    return {"response":mock_data}
+    return {"response":mock_data()}
 
 ### Debug & Lab.API:05 ######################################################
 @app.get(
@@ -118,7 +154,7 @@ def show_example_of_payload_json_body():
 )
 
 def call_example_payload_json_body():
-    test_payload = {"resume_json": mock_data}
+    test_payload = {"resume_json": mock_data()}
     start_time = time()
     p1 = PromptBuilder(
         section  = "Profile",
@@ -291,10 +327,11 @@ class EvaluationPayload(BaseModel):
 
 @app.post(
     "/evaluation/profile",
+    dependencies=[Depends(evaluation_slot)],
     tags=["Evaluation"],
     description="Evaluates the Profile section of a resume using predefined criteria and role context, returning aggregated LLM-based scores with processing latency."
 )
-def evaluation_profile(payload: EvaluationPayload):
+async def evaluation_profile(payload: EvaluationPayload):
     start_time = time()
     p1 = PromptBuilder(
         section      = "Profile",
@@ -304,22 +341,28 @@ def evaluation_profile(payload: EvaluationPayload):
         output_lang  = payload.output_lang 
     )
     prompt = p1.build()
-    op1 = caller.call(prompt)
+    op1, meta = await acaller.call_with_meta(prompt)
     s1 = agg.aggregate(op1)
     finish_time = time()
     return {
         "response": s1,
+        "cache": {"status": meta["cache"], "stats": caller.cache.stats()},
+        "metadata": {
+            "input_tokens_estimate": Helper.estimate_tokens(prompt),
+            "token_usage": {**meta["usage"], "cost_usd": compute_cost(meta["usage"], caller.model)}
+        },
         "response_time": f"{finish_time - start_time:.5f} s"
     }
 
 ### Evaluation.API:09 #######################################################
 @app.post(
     "/evaluation/summary",
+    dependencies=[Depends(evaluation_slot)],
     tags=["Evaluation"],
     description="Evaluates the Summary section of a resume against multiple quality and relevance criteria, returning aggregated LLM-based scores with processing latency."
 )
 
-def evaluate_summary(payload: EvaluationPayload):
+async def evaluate_summary(payload: EvaluationPayload):
     start_time = time()
     resume_json = payload.resume_json
     p2 = PromptBuilder( 
@@ -330,22 +373,28 @@ def evaluate_summary(payload: EvaluationPayload):
         output_lang  = payload.output_lang 
     )
     prompt = p2.build()
-    op2 = caller.call(prompt)
+    op2, meta = await acaller.call_with_meta(prompt)
     s2 = agg.aggregate(op2)
     finish_time   = time()
     return {
         "response": s2,
+        "cache": {"status": meta["cache"], "stats": caller.cache.stats()},
+        "metadata": {
+            "input_tokens_estimate": Helper.estimate_tokens(prompt),
+            "token_usage": {**meta["usage"], "cost_usd": compute_cost(meta["usage"], caller.model)}
+        },
         "response_time" : f"{finish_time - start_time:.5f} s"
         }
 
 ### Evaluation.API:10 #######################################################
 @app.post(
     "/evaluation/education",
+    dependencies=[Depends(evaluation_slot)],
     tags=["Evaluation"],
     description="Evaluates the Education section of a resume for completeness and role relevance, returning aggregated LLM-based scores with processing latency."
 )
 
-def evaluate_education(payload: EvaluationPayload):
+async def evaluate_education(payload: EvaluationPayload):
     start_time = time()
     resume_json = payload.resume_json
     p3 = PromptBuilder( 
@@ -356,22 +405,28 @@ def evaluate_education(payload: EvaluationPayload):
         output_lang  = payload.output_lang 
     )
     prompt3 = p3.build()
-    op3 = caller.call(prompt3)
+    op3, meta = await acaller.call_with_meta(prompt3)
     s3 = agg.aggregate(op3)
     finish_time   = time()
     return {
         "response": s3,
+        "cache": {"status": meta["cache"], "stats": caller.cache.stats()},
+        "metadata": {
+            "input_tokens_estimate": Helper.estimate_tokens(prompt3),
+            "token_usage": {**meta["usage"], "cost_usd": compute_cost(meta["usage"], caller.model)}
+        },
         "response_time" : f"{finish_time - start_time:.5f} s"
         }
 
 ### Evaluation.API:11 #######################################################
 @app.post(
     "/evaluation/experience",
+    dependencies=[Depends(evaluation_slot)],
     tags=["Evaluation"],
     description="Evaluates the Experience section of a resume using content quality, completeness, grammar, length, and role relevance criteria, returning aggregated LLM-based scores with processing latency."
 )
 
-def evaluate_experience(payload: EvaluationPayload):
+async def evaluate_experience(payload: EvaluationPayload):
     start_time = time()
     resume_json = payload.resume_json
     p4 = PromptBuilder( 
@@ -382,11 +437,16 @@ def evaluate_experience(payload: EvaluationPayload):
         output_lang  = payload.output_lang 
     )
     prompt4 = p4.build()
-    op4 = caller.call(prompt4)
+    op4, meta = await acaller.call_with_meta(prompt4)
     s4 = agg.aggregate(op4)
     finish_time   = time()
     return {
         "response": s4,
+        "cache": {"status": meta["cache"], "stats": caller.cache.stats()},
+        "metadata": {
+            "input_tokens_estimate": Helper.estimate_tokens(prompt4),
+            "token_usage": {**meta["usage"], "cost_usd": compute_cost(meta["usage"], caller.model)}
+        },
         "response_time" : f"{finish_time - start_time:.5f} s"
         }
 
@@ -394,11 +454,12 @@ def evaluate_experience(payload: EvaluationPayload):
 ### Evaluation.API:12 #######################################################
 @app.post(
     "/evaluation/activities",
+    dependencies=[Depends(evaluation_slot)],
     tags=["Evaluation"],
     description="Evaluates the Activities section of a resume based on completeness, content quality, grammar, and length criteria, returning aggregated LLM-based scores with processing latency."
 )
 
-def evaluate_activities(payload: EvaluationPayload):
+async def evaluate_activities(payload: EvaluationPayload):
     start_time = time()
     resume_json = payload.resume_json
     p5 = PromptBuilder( 
@@ -409,11 +470,16 @@ def evaluate_activities(payload: EvaluationPayload):
         output_lang  = payload.output_lang 
     )
     prompt5 = p5.build()
-    op5 = caller.call(prompt5)
+    op5, meta = await acaller.call_with_meta(prompt5)
     s5 = agg.aggregate(op5)
     finish_time   = time()
     return {
         "response": s5,
+        "cache": {"status": meta["cache"], "stats": caller.cache.stats()},
+        "metadata": {
+            "input_tokens_estimate": Helper.estimate_tokens(prompt5),
+            "token_usage": {**meta["usage"], "cost_usd": compute_cost(meta["usage"], caller.model)}
+        },
         "response_time" : f"{finish_time - start_time:.5f} s"
         }
 
@@ -421,11 +487,12 @@ def evaluate_activities(payload: EvaluationPayload):
 ### Evaluation.API:13 #######################################################
 @app.post(
     "/evaluation/skills",
+    dependencies=[Depends(evaluation_slot)],
     tags=["Evaluation"],
     description="Evaluates the Skills section of a resume based on completeness, length, and role relevance criteria, returning aggregated LLM-based scores with processing latency."
 )
 
-def evaluate_skills(payload: EvaluationPayload):
+async def evaluate_skills(payload: EvaluationPayload):
     start_time = time()
     resume_json = payload.resume_json
     p6 = PromptBuilder( 
@@ -436,11 +503,16 @@ def evaluate_skills(payload: EvaluationPayload):
         output_lang  = payload.output_lang 
     )
     prompt6 = p6.build()
-    op6 = caller.call(prompt6)
+    op6, meta = await acaller.call_with_meta(prompt6)
     s6 = agg.aggregate(op6)
     finish_time   = time()
     return {
         "response": s6,
+        "cache": {"status": meta["cache"], "stats": caller.cache.stats()},
+        "metadata": {
+            "input_tokens_estimate": Helper.estimate_tokens(prompt6),
+            "token_usage": {**meta["usage"], "cost_usd": compute_cost(meta["usage"], caller.model)}
+        },
         "response_time" : f"{finish_time - start_time:.5f} s"
         }
 
@@ -449,99 +521,380 @@ def evaluate_skills(payload: EvaluationPayload):
 
 ### Composite evaluation ####################################################
 ### Composite evaluation.API:14 #############################################
-from core.globalaggregator import GlobalAggregator
+from core.promptbuilder import FusedPromptBuilder
+from core.pipeline import (
+    COMPOSITE_SECTIONS, DEFAULT_TARGET_ROLE,
+    build_section_prompts, estimate_prompt_tokens, global_aggregate, token_usage,
+    reuse_sections, remember_sections
+)
+from core.sectionstore import get_section_store
+from core.deadline import Deadline, DeadlineExceeded
+from fastapi import Header, HTTPException
+
+section_store = get_section_store()
+
+class CompositeEvaluationPayload(EvaluationPayload):
+    mode: Literal["per_section","fused"] = Field(
+        default = "per_section",
+        description = "per_section sends one LLM call per section, fused scores every section in a single call"
+    )
+    resume_id: str | None = Field(
+        default = None,
+        description = "Stable id of the resume. On resubmission only the sections whose content changed are sent to the LLM"
+    )
+    timeout_seconds: float | None = Field(
+        default = None,
+        gt = 0,
+        description = "Request deadline in seconds (also X-Request-Timeout header, the smaller one wins). Sections not scored in time are left out of a partial result"
+    )
 
 @app.post(
     "/evaluation/final-resume-score",
+    dependencies=[Depends(evaluation_slot)],
     tags=["Composite Evaluation"],
     description="Performs a full resume evaluation by scoring all major sections and aggregating them into a final composite resume score with overall processing latency."
 )
 
-def evaluate_resume(payload: EvaluationPayload):
+async def evaluate_resume(payload: CompositeEvaluationPayload,
+                    x_request_timeout: float | None = Header(default=None, gt=0)):
     start_time = time()
+    deadline = Deadline.from_request(x_request_timeout, payload.timeout_seconds)
     resume_json = payload.resume_json
-    p1 = PromptBuilder(
-        section  = "Profile",
-        criteria = ["Completeness", "ContentQuality"],
-        targetrole = "Data science",
-        cvresume = resume_json,
-        output_lang  = payload.output_lang 
+    prompts = build_section_prompts(resume_json, payload.output_lang)
+    # Sections whose input is unchanged since the last evaluation of this resume id are not re-scored
+    fingerprints, reused = await asyncio.to_thread(
+        reuse_sections, section_store, payload.resume_id, prompts, caller.model, agg
     )
-    prompt1 = p1.build()
-    
-    p2 = PromptBuilder( 
-        section  = "Summary", 
-        criteria = ["Completeness", "ContentQuality","Grammar","Length","RoleRelevance"],
-        targetrole = "Data science",
-        cvresume = resume_json,
-        output_lang  = payload.output_lang 
-    )
-    prompt2 = p2.build()
-    
-    p3 = PromptBuilder( 
-        section  = "Education", 
-        criteria = ["Completeness","RoleRelevance"],
-        targetrole = "Data science",
-        cvresume = resume_json,
-        output_lang  = payload.output_lang 
+    todo     = [i for i in range(len(prompts)) if i not in reused]
+    sections = [COMPOSITE_SECTIONS[i] for i in todo]
+    cache_status = {COMPOSITE_SECTIONS[i][0]: "unchanged" for i in reused}
+    if payload.mode == "fused":
+        # One prompt for all (changed) sections, the answer is split back per section
+        ops, token_estimate, usage = [], {"fused": 0}, summarize_usage({}, caller.model)
+        if sections:
+            fp = FusedPromptBuilder(
+                sections    = sections,
+                targetrole  = DEFAULT_TARGET_ROLE,
+                cvresume    = resume_json,
+                output_lang = payload.output_lang
+            )
+            prompt = fp.build()
+            token_estimate["fused"] = Helper.estimate_tokens(prompt)
+            ops, meta = await acaller.call_fused(prompt, fp.sections, with_meta=True, deadline=deadline)
+            cache_status.update({section: meta["cache"] for section in fp.sections})
+            usage = summarize_usage({"fused": meta["usage"]}, caller.model)
+        token_estimate["total"] = token_estimate["fused"]
+    else:
+        changed = [prompts[i] for i in todo]
+        token_estimate = estimate_prompt_tokens(changed, sections)
+        # Section calls are independent, run them concurrently (model.yaml -> concurrency.max_parallel_calls)
+        results = await acaller.call_many(changed, with_meta=True, deadline=deadline)
+        ops = [op for op, _ in results]
+        cache_status.update({
+            section: meta["cache"]
+            for (section, _), (_, meta) in zip(sections, results)
+        })
+        usage = token_usage([meta for _, meta in results], caller.model, sections)
+
+    # Sections past the deadline come back as None and are left out, a failed call fails the request
+    section_outputs = [reused.get(i) for i in range(len(prompts))]
+    for i, op in zip(todo, ops):
+        if op is not None:
+            section_outputs[i] = agg.aggregate(op)
+    done    = {i: (op, section_outputs[i]) for i, op in zip(todo, ops) if op is not None}
+    missing = [COMPOSITE_SECTIONS[i][0] for i, op in zip(todo, ops) if op is None]
+    if len(missing) == len(prompts):
+        raise HTTPException(status_code=504, detail={
+            "error": "no section was scored within the request deadline", "sections": cache_status
+        })
+    await asyncio.to_thread(remember_sections, section_store, payload.resume_id, fingerprints, done)
+    output = global_aggregate([op for op in section_outputs if op is not None], {
+        "input_tokens_estimate": token_estimate,
+        "token_usage": usage,
+        "incremental": {
+            "resume_id": payload.resume_id,
+            "reused_sections": [COMPOSITE_SECTIONS[i][0] for i in sorted(reused)],
+            "rescored_sections": [COMPOSITE_SECTIONS[i][0] for i in sorted(done)],
+        },
+        "deadline": {
+            **(deadline.to_dict() if deadline else {}),
+            "missing": {section: cache_status[section] for section in missing},
+        },
+    }, missing)
+
+    finish_time   = time()
+    return {
+        "response": output,
+        "mode": payload.mode,
+        "cache": {"status": cache_status, "stats": caller.cache.stats()},
+        "response_time" : f"{finish_time - start_time:.5f} s"
+    }
+
+### Composite evaluation.API:19 #############################################
+from fastapi.responses import StreamingResponse
+import json
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post(
+    "/evaluation/final-resume-score/stream",
+    tags=["Composite Evaluation"],
+    description="Streaming variant of the composite evaluation (Server-Sent Events). Emits one `section` event per SectionScoreAggregator result as soon as its LLM call completes, then a `final` event with the GlobalAggregator output and metadata. Sections not scored within the request deadline are left out of a partial `final` result."
+)
+
+async def evaluate_resume_stream(payload: CompositeEvaluationPayload,
+                                 x_request_timeout: float | None = Header(default=None, gt=0)):
+    start_time = time()
+    prompts = build_section_prompts(payload.resume_json, payload.output_lang)
+    token_estimate = estimate_prompt_tokens(prompts)
+
+    async def events():
+        section_outputs = [None] * len(prompts)
+        metas           = [None] * len(prompts)
+        cache_status    = {}
+        try:
+            # The slot is held while the stream runs, an overloaded server answers with an error event
+            async with admission.slot():
+                deadline = Deadline.from_request(x_request_timeout, payload.timeout_seconds)
+                async for index, op, meta in acaller.iter_many(prompts, deadline):
+                    section = COMPOSITE_SECTIONS[index][0]
+                    metas[index]          = meta
+                    cache_status[section] = meta["cache"]
+                    if op is None:                      # out of request deadline
+                        continue
+                    section_outputs[index] = agg.aggregate(op)
+                    yield sse_event("section", {
+                        "index": index,
+                        "response": section_outputs[index],
+                        "cache": meta["cache"],
+                        "elapsed": f"{time() - start_time:.5f} s"
+                    })
+            missing = [COMPOSITE_SECTIONS[i][0] for i, op in enumerate(section_outputs) if op is None]
+            if len(missing) == len(prompts):
+                raise DeadlineExceeded("no section was scored within the request deadline")
+            # GlobalAggregator keeps COMPOSITE_SECTIONS order whatever the completion order was
+            output = global_aggregate([op for op in section_outputs if op is not None], {
+                "input_tokens_estimate": token_estimate,
+                "token_usage": token_usage(metas, caller.model),
+                "deadline": {
+                    **(deadline.to_dict() if deadline else {}),
+                    "missing": {section: cache_status[section] for section in missing},
+                },
+            }, missing)
+        except Exception as e:
+            yield sse_event("error", {"error": f"{type(e).__name__}: {e}"})
+            return
+        yield sse_event("final", {
+            "response": output,
+            "cache": {"status": cache_status, "stats": caller.cache.stats()},
+            "response_time": f"{time() - start_time:.5f} s"
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type = "text/event-stream",
+        headers    = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    prompt3 = p3.build()
 
-    p4 = PromptBuilder( 
-        section  = "Experience", 
-        criteria = ["Completeness", "ContentQuality","Grammar","Length","RoleRelevance"],
-        targetrole = "Data science",
-        cvresume = resume_json,
-        output_lang  = payload.output_lang 
+#############################################################################
+#############################################################################
+
+### Batch evaluation ########################################################
+### Batch evaluation.API:18 #################################################
+from core.batchevaluator import BatchEvaluator
+
+class BatchItem(BaseModel):
+    id: str | None = Field(default=None, description="Caller reference, echoed back on the result line")
+    output_lang: Literal["en","th"] = Field(default="en")
+    targetrole: str = Field(default=DEFAULT_TARGET_ROLE)
+    resume_json: dict
+
+class BatchPayload(BaseModel):
+    items: list[BatchItem]
+
+batch_evaluator = BatchEvaluator(acaller, admission)
+
+@app.post(
+    "/evaluation/batch",
+    tags=["Batch Evaluation"],
+    description=(
+        "Composite evaluation for many resumes. Body is {\"items\": [...]} (or a bare list) as JSON, "
+        "or one item per line with Content-Type application/x-ndjson. Section calls across the batch "
+        "share a global concurrency limit (model.yaml -> batch) and every resume is streamed back as one "
+        "NDJSON line as soon as it completes, in completion order. Each resume in progress holds one "
+        "evaluation slot (model.yaml -> backpressure), 503 when the server is saturated."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": BatchPayload.model_json_schema()},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def evaluate_batch(request: Request):
+    body = await request.body()
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            items = [BatchItem.model_validate_json(line) for line in body.splitlines() if line.strip()]
+        else:
+            data  = json.loads(body)
+            items = BatchPayload.model_validate(data if isinstance(data, dict) else {"items": data}).items
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # Every resume takes its own evaluation slot while it runs, a saturated server says so before streaming
+    admission.check()
+    lines = (
+        json.dumps(line, ensure_ascii=False) + "\n"
+        async for line in batch_evaluator.run(item.model_dump() for item in items)
     )
-    prompt4 = p4.build()
-    
-    p5 = PromptBuilder( 
-        section  = "Activities", 
-        criteria = ["Completeness", "ContentQuality","Grammar","Length"],
-        targetrole = "Data science",
-        cvresume = resume_json,
-        output_lang  = payload.output_lang 
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+#############################################################################
+#############################################################################
+
+
+### Evaluation jobs ########################################################
+### Evaluation jobs.API:20 ###################################################
+from core.jobqueue import JobQueue, QueueFullError
+from core.pipeline import run_composite
+
+def run_evaluation_job(payload: dict) -> dict:
+    current_endpoint.set("/jobs/evaluation")           # worker threads are outside any request
+    start_time = time()
+    output = run_composite(
+        caller, agg,
+        resume_json = payload["resume_json"],
+        output_lang = payload.get("output_lang", "en"),
+        targetrole  = payload.get("targetrole", DEFAULT_TARGET_ROLE),
+        resume_id   = payload.get("resume_id")
     )
-    prompt5 = p5.build()
-    
-    p6 = PromptBuilder( 
-        section  = "Skills", 
-        criteria = ["Completeness","Length","RoleRelevance"],
-        targetrole = "Data science",
-        cvresume = resume_json,
-        output_lang  = payload.output_lang 
+    return {"response": output, "response_time": f"{time() - start_time:.5f} s"}
+
+job_queue = JobQueue.from_config(run_evaluation_job)
+
+@app.on_event("startup")
+def start_job_workers():
+    job_queue.start()
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    job_queue.stop()
+
+class JobPayload(EvaluationPayload):
+    targetrole: str = Field(default=DEFAULT_TARGET_ROLE)
+    resume_id: str | None = Field(
+        default = None,
+        description = "Stable id of the resume, stores the section results and reuses the unchanged ones"
     )
-    prompt6 = p6.build()
 
-    op1 = caller.call(prompt1)
-    op2 = caller.call(prompt2)
-    op3 = caller.call(prompt3)
-    op4 = caller.call(prompt4)
-    op5 = caller.call(prompt5)
-    op6 = caller.call(prompt6)
+@app.post(
+    "/jobs/evaluation",
+    status_code=202,
+    tags=["Evaluation Jobs"],
+    description="Queues a full composite evaluation and returns its job id right away. Poll GET /jobs/{job_id} for the status and the result. Queued jobs survive a restart (global.yaml -> jobs)."
+)
+def submit_evaluation_job(payload: JobPayload):
+    try:
+        job = job_queue.submit(payload.model_dump())
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job
 
-    s1 = agg.aggregate(op1)
-    s2 = agg.aggregate(op2)
-    s3 = agg.aggregate(op3)
-    s4 = agg.aggregate(op4)
-    s5 = agg.aggregate(op5)
-    s6 = agg.aggregate(op6)
+@app.get(
+    "/jobs/{job_id}",
+    tags=["Evaluation Jobs"],
+    description="Status of an evaluation job: queued (with queue_position), running, done (with result) or failed (with error)."
+)
+def get_evaluation_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"job {job_id} not found")
+    return job
 
-    x = GlobalAggregator(SectionScoreAggregator_output = [s1,s2,s3,s4,s5,s6])
+@app.get(
+    "/jobs",
+    tags=["Evaluation Jobs"],
+    description="Job queue counters per status."
+)
+def get_job_stats():
+    return job_queue.stats()
 
-    output = x.fn0()
+#############################################################################
+#############################################################################
 
-    finish_time   = time()
+
+### Rescoring ################################################################
+### Rescoring.API:22 #########################################################
+from core.configregistry import get_config, thaw
+
+@lru_cache(maxsize=1)
+def get_rescorer():
+    # core.rescorer pulls in NumPy, imported by the first rescore instead of at startup
+    from core.rescorer import Rescorer
+    return Rescorer(section_store)
+
+class RescorePayload(BaseModel):
+    weights: dict | None = Field(
+        default = None,
+        description = "weight.yaml `weights` entries to try instead of the current ones, e.g. {\"Skills\": {\"section_weight\": 0.3}}"
+    )
+    resume_ids: list[str] | None = Field(default=None, description="Only these resumes, every stored resume by default")
+    persist: bool = Field(
+        default = False,
+        description = "Store the rescored section results, only with the current weight.yaml weights"
+    )
+
+@app.post(
+    "/evaluation/rescore",
+    tags=["Composite Evaluation"],
+    description="Recomputes section totals and final scores of the stored evaluations (composite requests and jobs sent with a resume_id) from their raw LLM scores, under the current or the given weights. No LLM call is made."
+)
+def rescore_evaluations(payload: RescorePayload):
+    start_time = time()
+    if payload.persist and payload.weights:
+        raise HTTPException(status_code=400, detail="persist only applies the current weight.yaml weights")
+    weight_config = thaw(get_config("weight"))
+    weights = weight_config["weights"]
+    for section, values in (payload.weights or {}).items():
+        weights.setdefault(section, {}).update(values)
+    result = get_rescorer().rescore(weights, payload.resume_ids, payload.persist)
     return {
-        "response": output,
-        "response_time" : f"{finish_time - start_time:.5f} s"
+        "weights_version": "override" if payload.weights else weight_config.get("version", "unknown"),
+        **result,
+        "response_time": f"{time() - start_time:.5f} s"
     }
 
 #############################################################################
 #############################################################################
 
 
+### Usage ####################################################################
+### Usage.API:21 #############################################################
+@app.get(
+    "/usage",
+    tags=["Health & Metadata"],
+    description="Real Gemini token counts and cost (global.yaml -> pricing) since the process started, per model and section. by_criterion splits each section call evenly over the criteria it scored."
+)
+def get_usage():
+    return usage_tracker.snapshot()
+
+@app.get(
+    "/metrics",
+    tags=["Health & Metadata"],
+    description="Prometheus / OpenMetrics scrape endpoint: per-stage latency histograms by section and endpoint, LLM error, parse failure and cache counters, in-flight LLM calls."
+)
+def get_metrics(request: Request):
+    body, content_type = render_metrics(request.headers.get("accept", ""))
+    return Response(content=body, media_type=content_type)
+
+#############################################################################
+#############################################################################
+
+
 ### Admin ####################################################################
 ### Admin.API:15 #############################################################
 # class test(BaseModel):
@@ -0,0 +1,50 @@
+"""
+Run from the repo root with `python -m pytest`. The tests import from src/ the way the API does
+(`core.*`, `main`) and run Gemini on the simulated provider, no API key or network needed.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)                                          # config and mock paths are relative to the repo root
+os.environ["LLM_PROVIDER"] = "simulated"
+
+from core.hedger import Hedger
+from core.llmcaller import LlmCaller
+from core.providers import SimulatedProvider
+from core.ratelimiter import RateLimiter
+from core.responsecache import ResponseCache
+
+@pytest.fixture(scope="session")
+def mock_resumes():
+    names = sorted(name for name in os.listdir("src/mock") if name.startswith("resume") and name.endswith(".json"))
+    return [json.load(open(os.path.join("src/mock", name), encoding="utf-8")) for name in names]
+
+@pytest.fixture
+def simulated_caller():
+    """
+    LlmCaller factory on a fresh simulated provider. `simulated` : model.yaml -> simulated entries, zero
+    latency by default. No response cache, rate limit or hedging unless one is given.
+    """
+    def make(simulated: dict | None = None, cache=None, limiter=None, hedger=None) -> LlmCaller:
+        cfg    = {"latency": {"distribution": "fixed", "seconds": 0}, **(simulated or {})}
+        caller = LlmCaller(client=SimulatedProvider({"simulated": cfg}))
+        caller.cache   = cache or ResponseCache(enabled=False)
+        caller.limiter = limiter or RateLimiter(enabled=False)
+        caller.hedger  = hedger or Hedger(enabled=False)
+        return caller
+    return make
+
+@pytest.fixture
+def simulated(monkeypatch):
+    """main.caller on a fresh zero-latency simulated client, without response cache or rate limit."""
+    import main
+    latency = {"distribution": "fixed", "seconds": 0}
+    monkeypatch.setattr(main.caller, "client", SimulatedProvider({"simulated": {"latency": latency}}))
+    monkeypatch.setattr(main.caller, "cache", ResponseCache(enabled=False))
+    monkeypatch.setattr(main.caller, "limiter", RateLimiter(enabled=False))
+    return main.caller.client
@@ -0,0 +1,58 @@
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from core.aggregationengine import AggregationEngine
+from core.pipeline import COMPOSITE_SECTIONS, aggregate_composite, build_section_prompts, global_aggregate
+from core.providers import SimulatedProvider
+from core.rescorer import Rescorer
+from core.scoreaggregator import SectionScoreAggregator
+from core.sectionstore import SectionStore
+
+def section_answers(resume) -> list:
+    provider = SimulatedProvider({"simulated": {"latency": {"distribution": "fixed", "seconds": 0}}})
+    json_mode = SimpleNamespace(response_mime_type="application/json")
+    return [
+        json.loads(provider.models.generate_content("simulated", str(prompt), json_mode).text)
+        for prompt in build_section_prompts(resume)
+    ]
+
+def without_timestamp(response: dict) -> str:
+    response["metadata"].pop("timestamp", None)
+    return json.dumps(response, ensure_ascii=False)
+
+def test_engine_matches_per_resume_aggregation(mock_resumes):
+    answers  = [section_answers(resume) for resume in mock_resumes]
+    expected = [without_timestamp(aggregate_composite(outputs, SectionScoreAggregator())) for outputs in answers]
+    results  = AggregationEngine().aggregate_composites(answers)
+    assert [without_timestamp(result.to_dict()) for result in results] == expected
+
+def test_shared_aggregator_across_threads(mock_resumes):
+    aggregator = SectionScoreAggregator()                # like main.agg : event loop, batch and job workers
+    answers    = [answer for resume in mock_resumes for answer in section_answers(resume)] * 200
+    expected   = [aggregator.aggregate(answer) for answer in answers]
+    interval   = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)                          # switch threads as often as possible
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            assert list(pool.map(aggregator.aggregate, answers)) == expected
+    finally:
+        sys.setswitchinterval(interval)
+
+def test_rescore_renormalizes_a_resume_with_a_missing_section(tmp_path, mock_resumes):
+    aggregator = SectionScoreAggregator()
+    answers    = section_answers(mock_resumes[0])[:-1]             # Skills never completed
+    outputs    = [aggregator.aggregate(answer) for answer in answers]
+    store      = SectionStore(sqlite_path=str(tmp_path / "sections.sqlite3"))
+    store.save("partial", {
+        output["section"]: {"fingerprint": "", "weights_fingerprint": "", "llm_output": answer, "section_output": output}
+        for answer, output in zip(answers, outputs)
+    })
+    missing  = [COMPOSITE_SECTIONS[-1][0]]
+    expected = global_aggregate(outputs, missing_sections=missing)["conclution"]
+    assert expected["final_resume_score"] > global_aggregate(outputs)["conclution"]["final_resume_score"]
+
+    [result] = Rescorer(store).rescore()["results"]
+    assert result["missing_sections"] == missing
+    assert result["final_resume_score"] == expected["final_resume_score"]
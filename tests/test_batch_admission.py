@@ -0,0 +1,57 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from core.admission import AdmissionControl
+from core.batchevaluator import BatchEvaluator
+
+def use_admission(monkeypatch, **kwargs) -> AdmissionControl:
+    admission = AdmissionControl(**kwargs)
+    monkeypatch.setattr(main, "admission", admission)
+    monkeypatch.setattr(main.batch_evaluator, "admission", admission)
+    return admission
+
+def test_batch_streams_one_line_per_resume(simulated, monkeypatch, mock_resumes):
+    admission = use_admission(monkeypatch, max_inflight=1, max_queued=10, queue_timeout_seconds=5)
+    items = [{"id": str(i), "resume_json": resume} for i, resume in enumerate(mock_resumes[:3])]
+    r = TestClient(main.app).post("/evaluation/batch", json={"items": items})
+    assert r.status_code == 200
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert sorted(line["id"] for line in lines) == ["0", "1", "2"]
+    assert all("response" in line for line in lines)
+    assert admission.inflight == 0
+
+def test_batch_is_rejected_when_saturated(simulated, monkeypatch, mock_resumes):
+    admission = use_admission(monkeypatch, max_inflight=1, max_queued=0, queue_timeout_seconds=0.2)
+    simulated.models.latency = {"distribution": "fixed", "seconds": 1.0}
+    client = TestClient(main.app)
+    busy = threading.Thread(target=client.post, args=("/evaluation/profile",), kwargs={"json": {"resume_json": mock_resumes[0]}})
+    busy.start()
+    try:
+        for _ in range(200):                            # until the single evaluation holds the only slot
+            if admission.inflight:
+                break
+            threading.Event().wait(0.01)
+        assert admission.inflight == 1
+        r = client.post("/evaluation/batch", json={"items": [{"resume_json": mock_resumes[1]}]})
+        assert r.status_code == 503
+        assert "Retry-After" in r.headers
+    finally:
+        busy.join()
+
+def test_resume_without_a_slot_comes_back_as_an_error_line(simulated, mock_resumes):
+    admission = AdmissionControl(max_inflight=1, max_queued=10, queue_timeout_seconds=0.1)
+    evaluator = BatchEvaluator(main.acaller, admission)
+    item = {"resume_json": mock_resumes[0], "targetrole": "Data science"}
+
+    async def run():
+        async with admission.slot():                    # another evaluation holds the only slot
+            busy = [line async for line in evaluator.run([item])]
+        return busy, [line async for line in evaluator.run([item])]
+    busy, free = asyncio.run(run())
+    assert busy[0]["error"].startswith("Overloaded")
+    assert "response" in free[0]
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.asyncllmcaller import AsyncLlmCaller
+from core.deadline import Deadline
+from core.pipeline import build_section_prompts
+
+def track_in_flight(provider) -> dict:
+    """Counts the simulated provider's calls in flight, the most at once in ["peak"]."""
+    models, state, lock = provider.models, {"now": 0, "peak": 0}, threading.Lock()
+    wait, respond = models._wait, models._respond
+    def tracked_wait(config):
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        return wait(config)
+    def tracked_respond(*args):
+        with lock:
+            state["now"] -= 1
+        return respond(*args)
+    models._wait, models._respond = tracked_wait, tracked_respond
+    return state
+
+@pytest.mark.parametrize("transport", ["threads", "tasks", "tasks with deadline"])
+def test_fan_out_is_capped_per_request(transport, simulated_caller, mock_resumes):
+    caller  = simulated_caller({"latency": {"distribution": "fixed", "seconds": 0.05}})
+    caller.max_parallel_calls = 2
+    in_flight = track_in_flight(caller.client)
+    prompts = build_section_prompts(mock_resumes[0])
+    if transport == "threads":
+        outputs = caller.call_many(prompts)
+    else:
+        deadline = Deadline(10) if transport == "tasks with deadline" else None
+        outputs  = asyncio.run(AsyncLlmCaller(caller).call_many(prompts, deadline=deadline))
+    assert len(outputs) == len(prompts) and all(output is not None for output in outputs)
+    assert in_flight["peak"] == 2
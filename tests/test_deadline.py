@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from core.asyncllmcaller import AsyncLlmCaller
+from core.deadline import Deadline
+from core.pipeline import build_section_prompts
+from core.providers import SimulatedAPIError
+
+def test_sections_out_of_time_come_back_missing(simulated_caller, mock_resumes):
+    caller  = simulated_caller({"latency": {"distribution": "fixed", "seconds": 1.0}})
+    prompts = build_section_prompts(mock_resumes[0])
+    results = asyncio.run(AsyncLlmCaller(caller).call_many(prompts, with_meta=True, deadline=Deadline(0.1)))
+    assert [output for output, _ in results] == [None] * len(prompts)
+    assert {meta["cache"] for _, meta in results} == {"timeout"}
+
+def test_failed_call_under_a_deadline_fails_the_request(simulated_caller, mock_resumes):
+    caller = simulated_caller({"error_rate": 1.0})
+    caller.retry_cfg = {**caller.retry_cfg, "max_attempts": 1}
+    prompts = build_section_prompts(mock_resumes[0])
+    with pytest.raises(SimulatedAPIError):
+        asyncio.run(AsyncLlmCaller(caller).call_many(prompts, deadline=Deadline(10)))
+
+def stream_events(response) -> list:
+    return [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+        for block in response.text.strip().split("\n\n")
+    ]
+
+def test_stream_applies_the_request_deadline(simulated, mock_resumes):
+    client = TestClient(main.app)
+    body   = {"resume_json": mock_resumes[0]}
+    events = stream_events(client.post("/evaluation/final-resume-score/stream", json=body))
+    assert [event for event, _ in events][-1] == "final"
+
+    simulated.models.latency = {"distribution": "fixed", "seconds": 1.0}
+    r = client.post("/evaluation/final-resume-score/stream", json=body, headers={"X-Request-Timeout": "0.2"})
+    (event, data), = stream_events(r)
+    assert event == "error" and data["error"].startswith("DeadlineExceeded")
@@ -0,0 +1,74 @@
+import asyncio
+from time import monotonic, sleep
+
+import pytest
+
+from core.asyncllmcaller import AsyncLlmCaller
+from core.hedger import Hedger
+from core.pipeline import build_section_prompts
+
+def script_latency(provider, seconds: list) -> list:
+    """The simulated provider's calls take these seconds in order (the last one repeats), answered calls are returned."""
+    models, queue, answered = provider.models, list(seconds), []
+    models._latency = lambda: queue.pop(0) if len(queue) > 1 else queue[0]
+    respond = models._respond
+    models._respond = lambda *args: answered.append(args) or respond(*args)
+    return answered
+
+def fast_hedger(**kwargs) -> Hedger:
+    return Hedger(**{"min_samples": 5, "refresh": 1, "min_delay_seconds": 0.05, "max_hedge_rate": 1.0, **kwargs})
+
+def test_delay_follows_the_latency_window():
+    hedger = fast_hedger(percentile=95)
+    for _ in range(4):
+        hedger.observe("Skills", 0.2)
+    assert hedger.delay("Skills") is None                  # fewer than min_samples
+    for seconds in (0.1, 0.3, 0.4, 0.5, 0.6):
+        hedger.observe("Skills", seconds)
+    assert hedger.delay("Skills") == 0.6
+    assert hedger.delay("Profile") is None                 # windows are per section
+    hedger.observe("Summary", 0.001)
+    for _ in range(4):
+        hedger.observe("Summary", 0.001)
+    assert hedger.delay("Summary") == 0.05                 # min_delay_seconds
+    assert Hedger(enabled=False).delay("Skills") is None
+
+def test_budget_caps_the_hedge_rate():
+    hedger = fast_hedger(max_hedge_rate=0.25, max_budget=2)
+    hedges = 0
+    for _ in range(8):
+        hedger.delay("Skills")                             # every call earns max_hedge_rate
+        hedges += hedger.try_hedge()
+    assert hedges == 2
+    for _ in range(100):
+        hedger.delay("Skills")
+    assert [hedger.try_hedge() for _ in range(3)] == [True, True, False]   # max_budget
+
+@pytest.mark.parametrize("transport", ["threads", "tasks"])
+def test_slow_call_is_hedged_and_the_loser_cancelled(transport, simulated_caller, mock_resumes):
+    caller   = simulated_caller(hedger=fast_hedger())
+    prompt   = build_section_prompts(mock_resumes[0])[0]
+    answered = script_latency(caller.client, [0.01] * 5 + [0.8, 0.01])
+    for _ in range(5):                                     # fills the section's latency window
+        caller.call(prompt)
+    start = monotonic()
+    if transport == "threads":
+        output = caller.call(prompt)
+    else:
+        output = asyncio.run(AsyncLlmCaller(caller).call(prompt))
+    assert output is not None and monotonic() - start < 0.5
+    if transport == "tasks":
+        assert len(answered) == 6                          # the slow call was cancelled
+    else:
+        sleep(0.9)                                         # a thread cannot be cancelled, its answer is ignored
+        assert len(answered) == 7
+
+def test_no_hedge_once_the_budget_is_spent(simulated_caller, mock_resumes):
+    caller   = simulated_caller(hedger=fast_hedger(max_hedge_rate=0.0))
+    prompt   = build_section_prompts(mock_resumes[0])[0]
+    answered = script_latency(caller.client, [0.01] * 5 + [0.3, 0.01])
+    for _ in range(5):
+        caller.call(prompt)
+    start = monotonic()
+    assert asyncio.run(AsyncLlmCaller(caller).call(prompt)) is not None
+    assert monotonic() - start >= 0.3 and len(answered) == 6
@@ -0,0 +1,81 @@
+import asyncio
+from time import monotonic
+
+import pytest
+
+from core.pipeline import build_section_prompts
+from core.providers import SimulatedAPIError
+from core.ratelimiter import RateLimiter, RateLimitTimeout
+
+FAST_RETRY = {"max_attempts": 4, "base_delay_seconds": 0.001, "max_delay_seconds": 0.002, "retry_on": [429, 503]}
+
+def fail_first(provider, rate: str, times: int) -> list:
+    """The simulated provider fails its first `times` calls (rate : rate_limit_rate | error_rate), then answers."""
+    models = provider.models
+    models.cfg[rate] = 1.0
+    respond, calls = models._respond, []
+    def counted(*args):
+        calls.append(args)
+        if len(calls) > times:
+            models.cfg[rate] = 0.0
+        return respond(*args)
+    models._respond = counted
+    return calls
+
+def test_token_bucket_spaces_calls_beyond_the_burst():
+    limiter = RateLimiter(rpm=600, burst_seconds=0.2)    # 10 calls/s, bursts of 2
+    waits = []
+    for _ in range(3):
+        waits.append(limiter.acquire(1))
+        limiter.release("ok")
+    assert max(waits[:2]) < 0.01
+    assert 0.05 < waits[2] < 0.5
+
+def test_aimd_halves_on_429_once_per_cooldown_and_grows_on_success():
+    limiter = RateLimiter(initial_concurrency=8, decrease_factor=0.5, decrease_cooldown_seconds=60)
+    for _ in range(2):                                   # one burst of 429s counts once
+        limiter.acquire(1)
+        limiter.release("rate_limited")
+    assert limiter.limit == 4
+    for _ in range(4):                                   # `limit` successes in a row : +1
+        limiter.acquire(1)
+        limiter.release("ok")
+    assert limiter.limit == 5
+
+def test_acquire_times_out_when_no_slot_frees_up():
+    limiter = RateLimiter(initial_concurrency=1, min_concurrency=1, acquire_timeout_seconds=0.05)
+    limiter.acquire(1)                                   # holds the only slot
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(1)
+    with pytest.raises(RateLimitTimeout):
+        asyncio.run(limiter.acquire_async(1))
+    limiter.release("ok")
+    assert limiter.acquire(1) < 0.01
+
+def test_call_waits_for_the_rate_limiter_then_times_out(simulated_caller, mock_resumes):
+    limiter = RateLimiter(initial_concurrency=1, min_concurrency=1, acquire_timeout_seconds=0.05)
+    caller  = simulated_caller(limiter=limiter)
+    limiter.acquire(1)
+    start = monotonic()
+    with pytest.raises(RateLimitTimeout):
+        caller.call(build_section_prompts(mock_resumes[0])[0])
+    assert monotonic() - start >= 0.05
+
+@pytest.mark.parametrize("rate, code", [("rate_limit_rate", 429), ("error_rate", 503)])
+def test_failed_attempts_are_retried(rate, code, simulated_caller, mock_resumes):
+    limiter = RateLimiter(initial_concurrency=8, decrease_cooldown_seconds=60)
+    caller  = simulated_caller(limiter=limiter)
+    caller.retry_cfg = FAST_RETRY
+    calls = fail_first(caller.client, rate, 2)
+    assert caller.call(build_section_prompts(mock_resumes[0])[0]) is not None
+    assert len(calls) == 3
+    assert limiter.inflight == 0
+    assert limiter.limit == (4 if code == 429 else 8)    # only a 429 lowers the concurrency limit
+
+def test_retries_stop_after_max_attempts(simulated_caller, mock_resumes):
+    caller = simulated_caller()
+    caller.retry_cfg = FAST_RETRY
+    calls = fail_first(caller.client, "rate_limit_rate", 10)
+    with pytest.raises(SimulatedAPIError) as error:
+        caller.call(build_section_prompts(mock_resumes[0])[0])
+    assert error.value.code == 429 and len(calls) == FAST_RETRY["max_attempts"]
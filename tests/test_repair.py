@@ -0,0 +1,79 @@
+import json
+import re
+
+import pytest
+
+from core.pipeline import build_section_prompts
+from core.responseschema import check_section, parse_json, salvage_scores
+
+TEMPLATE = re.compile(r"Otput :\n(\{.*?\n\})\n", re.S)          # the response template of a prompt
+
+def mangle_answers(provider, mangle, times: int = 1) -> list:
+    """The simulated provider's first `times` answers are rewritten by mangle(answer) -> text, the prompts are returned."""
+    models, prompts = provider.models, []
+    respond = models._respond
+    def scripted(contents, config, timed_out):
+        resp = respond(contents, config, timed_out)
+        prompts.append(contents)
+        if len(prompts) <= times:
+            resp.text = mangle(parse_json(resp.text))
+        return resp
+    models._respond = scripted
+    return prompts
+
+def asked_criteria(prompt: str) -> list:
+    return list(json.loads(TEMPLATE.search(prompt).group(1))["scores"])
+
+def test_parse_json_reads_fenced_and_wrapped_answers():
+    answer = {"section": "Skills", "scores": {}}
+    assert parse_json(json.dumps(answer)) == answer
+    assert parse_json(f"```json\n{json.dumps(answer)}\n```") == answer
+    assert parse_json(f"Here is the result: {json.dumps(answer)} Thanks") == answer
+    with pytest.raises(ValueError):
+        parse_json('{"section": "Skills", "scores": {')
+
+def test_salvage_keeps_the_complete_criteria_of_a_truncated_answer():
+    text = '{"section": "Skills", "scores": {"Completeness": {"score": 4, "feedback": "ok"}, "Length": {"score": 3, "fee'
+    assert salvage_scores(text, ["Completeness", "Length", "RoleRelevance"]) == {
+        "Completeness": {"score": 4, "feedback": "ok"}
+    }
+
+def test_check_section_drops_missing_and_out_of_range_criteria():
+    output = {"section": "skills", "scores": {
+        "Length": {"score": "3", "feedback": ""},
+        "Completeness": {"score": 9, "feedback": ""},
+    }}
+    answer, missing = check_section(output, "Skills", ["Completeness", "Length", "RoleRelevance"])
+    assert answer == {"section": "Skills", "scores": {"Length": {"score": 3, "feedback": ""}}}
+    assert missing == ["Completeness", "RoleRelevance"]
+
+def truncated(answer: dict) -> str:
+    text = json.dumps(answer)
+    return text[: text.index(list(answer["scores"])[-1]) + 5]    # cut inside the last criterion
+
+def without_first(answer: dict) -> str:
+    answer["scores"].pop(list(answer["scores"])[0])
+    return json.dumps(answer)
+
+def out_of_range(answer: dict) -> str:
+    answer["scores"][list(answer["scores"])[0]]["score"] = 9
+    return json.dumps(answer)
+
+@pytest.mark.parametrize("mangle, reasked", [(truncated, -1), (without_first, 0), (out_of_range, 0)])
+def test_one_repair_asks_only_for_the_broken_criterion(mangle, reasked, simulated_caller, mock_resumes):
+    caller  = simulated_caller()
+    prompt  = build_section_prompts(mock_resumes[0])[1]               # Summary, five criteria
+    prompts = mangle_answers(caller.client, mangle)
+    output  = caller.call(prompt)
+    criteria = prompt.builder.criteria
+    assert len(prompts) == 2                                           # the answer and one repair
+    assert asked_criteria(prompts[1]) == [criteria[reasked]]
+    assert list(output["scores"]) == list(criteria)
+    assert all(0 <= body["score"] <= 5 for body in output["scores"].values())
+
+def test_answer_still_broken_after_the_repair_fails(simulated_caller, mock_resumes):
+    caller  = simulated_caller()
+    prompts = mangle_answers(caller.client, out_of_range, times=2)
+    with pytest.raises(ValueError, match="no valid answer"):
+        caller.call(build_section_prompts(mock_resumes[0])[1])
+    assert len(prompts) == 1 + caller.structured_cfg.get("repair_attempts", 1)
@@ -0,0 +1,94 @@
+import os
+import shutil
+
+import pytest
+
+import core.llmcaller
+import core.responsecache
+from core.configregistry import CONFIG_PATHS, ConfigRegistry
+from core.pipeline import build_section_prompts
+from core.responsecache import ResponseCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    """The cache's time(), moved by hand : clock[0] += seconds."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(core.responsecache, "time", lambda: now[0])
+    return now
+
+def test_memory_tier_evicts_the_least_recently_used():
+    cache = ResponseCache(memory_max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == ({"v": 1}, "hit_memory")         # b is now the oldest
+    cache.set("c", {"v": 3})
+    assert cache.get("b") == (None, "miss")
+    assert cache.get("a") == ({"v": 1}, "hit_memory")
+    assert cache.get("c") == ({"v": 3}, "hit_memory")
+    assert cache.stats()["memory_entries"] == 2
+
+def test_sqlite_tier_serves_what_memory_evicted(tmp_path):
+    cache = ResponseCache(memory_max_entries=1, sqlite_path=str(tmp_path / "responses.sqlite3"))
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})                                    # a leaves memory, stays on disk
+    assert cache.get("a") == ({"v": 1}, "hit_disk")
+    assert cache.get("a") == ({"v": 1}, "hit_memory")           # promoted back to memory
+    # A new process (fresh cache on the same file) starts from disk
+    reopened = ResponseCache(memory_max_entries=1, sqlite_path=str(tmp_path / "responses.sqlite3"))
+    assert reopened.get("b") == ({"v": 2}, "hit_disk")
+    assert reopened.counters == {"memory_hits": 0, "disk_hits": 1, "misses": 0}
+
+def test_expired_answers_miss_in_both_tiers(tmp_path, clock):
+    cache = ResponseCache(ttl_seconds=60, sqlite_path=str(tmp_path / "responses.sqlite3"))
+    cache.set("a", {"v": 1})
+    clock[0] += 59
+    assert cache.get("a") == ({"v": 1}, "hit_memory")
+    clock[0] += 2
+    assert cache.get("a") == (None, "miss")                     # dropped from memory, then from disk
+    assert cache.get("a") == (None, "miss")
+    assert cache.stats()["memory_entries"] == 0
+
+def test_expired_rows_are_purged_when_the_file_is_opened(tmp_path, clock):
+    path = str(tmp_path / "responses.sqlite3")
+    ResponseCache(ttl_seconds=60, sqlite_path=path).set("a", {"v": 1})
+    clock[0] += 61
+    reopened = ResponseCache(ttl_seconds=60, sqlite_path=path)
+    assert reopened._conn().execute("SELECT COUNT(*) FROM responses").fetchone() == (0,)
+
+def test_key_covers_model_and_config_versions():
+    key = ResponseCache.make_key("prompt", "gemini-2.5-flash", "prompt_v2", "weights_v1")
+    assert key == ResponseCache.make_key("prompt", "gemini-2.5-flash", "prompt_v2", "weights_v1")
+    assert key != ResponseCache.make_key("prompt", "gemini-2.5-pro", "prompt_v2", "weights_v1")
+    assert key != ResponseCache.make_key("prompt", "gemini-2.5-flash", "prompt_v3", "weights_v1")
+    assert key != ResponseCache.make_key("prompt", "gemini-2.5-flash", "prompt_v2", "weights_v2")
+    assert key != ResponseCache.make_key("prompt!", "gemini-2.5-flash", "prompt_v2", "weights_v1")
+
+def bump_version(path: str, version: str):
+    """Rewrite the `version:` line of a config copy, its new mtime makes the registry reload it."""
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines(keepends=True)
+    lines[0] = f"version: {version}\n"
+    stat = os.stat(path)
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_config_or_model_change_invalidates_cached_answers(tmp_path, monkeypatch, simulated_caller, mock_resumes):
+    paths = {}
+    for name, path in CONFIG_PATHS.items():
+        paths[name] = str(tmp_path / os.path.basename(path))
+        shutil.copy(path, paths[name])
+    monkeypatch.setattr(core.llmcaller, "registry", ConfigRegistry(paths))
+    caller = simulated_caller(cache=ResponseCache(sqlite_path=str(tmp_path / "responses.sqlite3")))
+    prompt = build_section_prompts(mock_resumes[0])[0]
+
+    def cache_status():
+        return caller.call_with_meta(prompt)[1]["cache"]
+
+    assert [cache_status(), cache_status()] == ["miss", "hit_memory"]
+    bump_version(paths["prompt"], "prompt_test")
+    assert [cache_status(), cache_status()] == ["miss", "hit_memory"]
+    bump_version(paths["weight"], "weights_test")
+    assert [cache_status(), cache_status()] == ["miss", "hit_memory"]
+    caller.model = "gemini-2.5-pro"
+    assert [cache_status(), cache_status()] == ["miss", "hit_memory"]
@@ -0,0 +1,18 @@
+import pytest
+
+from core.pipeline import COMPOSITE_SECTIONS, build_section_prompts
+from core.promptbuilder import FusedPromptBuilder, PromptBuilder
+
+@pytest.mark.parametrize("section", [section for section, _ in COMPOSITE_SECTIONS])
+def test_every_section_gets_part_of_every_mock_resume(section, mock_resumes):
+    criteria = dict(COMPOSITE_SECTIONS)[section]
+    for resume in mock_resumes:
+        builder = PromptBuilder(section, criteria, "Data science", resume)
+        assert builder.resume_slice, f"{section} slice is empty"
+        assert builder.resume_slice != resume or section not in builder.config["resume_fields"]
+
+def test_resume_without_mapped_fields_is_sent_whole():
+    resume = {"candidate": {"name": "A", "clubs": ["Chess"]}}
+    for prompt in build_section_prompts(resume):
+        assert prompt.builder.resume_slice == resume
+    assert FusedPromptBuilder(COMPOSITE_SECTIONS, "Data science", resume).resume_slice == resume
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.asyncllmcaller import AsyncLlmCaller
+from core.pipeline import build_section_prompts
+from core.providers import SimulatedAPIError
+from core.singleflight import AsyncSingleFlight, SingleFlight
+
+def count_calls(provider) -> list:
+    models, calls = provider.models, []
+    respond = models._respond
+    models._respond = lambda *args: calls.append(args) or respond(*args)
+    return calls
+
+def test_threads_share_one_call_and_its_exception():
+    flights, release, runs = SingleFlight(), threading.Event(), []
+    def slow(result):
+        runs.append(result)
+        release.wait(5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    def together(result, count: int) -> list:
+        release.clear()
+        with ThreadPoolExecutor(count) as pool:
+            futures = [pool.submit(flights.do, "key", lambda: slow(result)) for _ in range(count)]
+            threading.Event().wait(0.1)                 # one thread runs slow, the others wait for it
+            release.set()
+        return futures
+
+    answers = together("answer", 5)
+    assert sorted(future.result() for future in answers) == [("answer", False)] + [("answer", True)] * 4
+    for future in together(ValueError("boom"), 3):
+        with pytest.raises(ValueError, match="boom"):
+            future.result()
+    assert len(runs) == 2 and flights.inflight() == 0
+
+def test_coroutines_share_one_call_and_its_exception():
+    flights = AsyncSingleFlight()
+    async def slow(result):
+        await asyncio.sleep(0.05)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    async def run():
+        answers = await asyncio.gather(*(flights.do("key", lambda: slow("answer")) for _ in range(5)))
+        errors  = await asyncio.gather(
+            *(flights.do("key", lambda: slow(ValueError("boom"))) for _ in range(3)), return_exceptions=True
+        )
+        return answers, errors
+    answers, errors = asyncio.run(run())
+    assert answers == [("answer", False)] + [("answer", True)] * 4
+    assert all(isinstance(error, ValueError) for error in errors) and len(errors) == 3
+    assert flights.inflight() == 0
+
+@pytest.mark.parametrize("transport", ["threads", "tasks"])
+def test_identical_prompts_make_one_provider_call(transport, simulated_caller, mock_resumes):
+    caller  = simulated_caller({"latency": {"distribution": "fixed", "seconds": 0.1}})
+    calls   = count_calls(caller.client)
+    prompts = [build_section_prompts(mock_resumes[0])[0]] * 5
+    if transport == "threads":
+        results = caller.call_many(prompts, with_meta=True)
+    else:
+        results = asyncio.run(AsyncLlmCaller(caller).call_many(prompts, with_meta=True))
+    assert len(calls) == 1
+    assert len({str(output) for output, _ in results}) == 1
+    assert sorted(meta["cache"] for _, meta in results) == ["coalesced"] * 4 + ["disabled"]
+
+@pytest.mark.parametrize("transport", ["threads", "tasks"])
+def test_leader_error_reaches_every_follower(transport, simulated_caller, mock_resumes):
+    caller = simulated_caller({"latency": {"distribution": "fixed", "seconds": 0.1}, "error_rate": 1.0})
+    caller.retry_cfg = {**caller.retry_cfg, "max_attempts": 1}
+    calls  = count_calls(caller.client)
+    prompt = build_section_prompts(mock_resumes[0])[0]
+    if transport == "threads":
+        with ThreadPoolExecutor(5) as pool:
+            results = [pool.submit(caller.call, prompt) for _ in range(5)]
+            errors  = [future.exception() for future in results]
+    else:
+        async def run():
+            flow = AsyncLlmCaller(caller)
+            return await asyncio.gather(*(flow.call(prompt) for _ in range(5)), return_exceptions=True)
+        errors = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(isinstance(error, SimulatedAPIError) and error.code == 503 for error in errors)
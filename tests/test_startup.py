@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+IMPORT_MAIN = """
+import sqlite3
+opened = []
+connect = sqlite3.connect
+sqlite3.connect = lambda path, *args, **kwargs: opened.append(path) or connect(path, *args, **kwargs)
+import main
+print(opened)
+"""
+
+def test_importing_main_opens_no_database():
+    # A fresh interpreter : the test session has already imported main
+    env = {**os.environ, "PYTHONPATH": "src", "LLM_PROVIDER": "simulated"}
+    result = subprocess.run([sys.executable, "-c", IMPORT_MAIN], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"